@@ -129,5 +129,126 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# fbref scraping
+# Fetched pages are cached on disk, each page type keeps its own time to live (in seconds)
+
+FBREF_CACHE_DIR = os.getenv('FBREF_CACHE_DIR', BASE_DIR / '.cache' / 'fbref')
+
+# Hot pages are also kept in process memory, both tiers are bounded in bytes and evict 'lru' or 'lfu' entries first
+FBREF_CACHE_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+FBREF_CACHE_DISK_MAX_BYTES = 1024 * 1024 * 1024
+FBREF_CACHE_EVICTION = 'lru'
+
+# Cleaned stats tables of player pages, stored as columnar NumPy buffers next to the page cache (in a directory of their own)
+FBREF_STATS_CACHE_DIR = os.getenv('FBREF_STATS_CACHE_DIR', BASE_DIR / '.cache' / 'fbref-stats')
+FBREF_STATS_CACHE_MEMORY_MAX_BYTES = 16 * 1024 * 1024
+FBREF_STATS_CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# Rendered chart images, keyed by the compared players, the chart and a digest of the data drawn (in a directory of their own)
+FBREF_CHART_CACHE_DIR = os.getenv('FBREF_CHART_CACHE_DIR', BASE_DIR / '.cache' / 'fbref-charts')
+FBREF_CHART_CACHE_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+FBREF_CHART_CACHE_DISK_MAX_BYTES = 1024 * 1024 * 1024
+
+FBREF_CACHE_TTL = {
+    'player': 12 * 60 * 60,
+    'squad': 12 * 60 * 60,
+    'league': 6 * 60 * 60,
+    'default': 60 * 60,
+}
+
+# Expired pages are still served (in seconds after expiry): right away while a background refresh runs,
+# or when fetching them again fails or takes longer than REVALIDATE_TIMEOUT seconds
+FBREF_CACHE_STALE = {
+    'WHILE_REVALIDATE': 24 * 60 * 60,
+    'IF_ERROR': 7 * 24 * 60 * 60,
+    'REVALIDATE_TIMEOUT': 5,
+}
+
+# Threads refreshing stale pages in the background
+FBREF_REFRESH_WORKERS = 2
+
+# Shared HTTP session: connection pool per host, timeouts (in seconds), retries with backoff on 5xx
+# and how many requests a process may have in flight to the same host. Every attempt takes a token of FBREF_RATE_LIMIT,
+# 429 is not retried and a Retry-After longer than READ_TIMEOUT fails the request rather than waiting for it.
+# Player pages are only read up to their last stats table. A connection can only go back to the pool once its body
+# is read to the end: the rest of the page (match logs, scouting report) is read and thrown away when it is at most
+# DRAIN_MAX_BYTES, trading that download for the TCP+TLS handshake of the next request. Beyond it the connection is
+# closed, 0 always closes it. With the rate limit spacing requests by 3 seconds, the server may close idle
+# connections before they are reused anyway, so keep it small.
+FBREF_HTTP = {
+    'POOL_CONNECTIONS': 2,
+    'POOL_MAXSIZE': 4,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'RETRIES': 2,
+    'BACKOFF_FACTOR': 0.5,
+    'MAX_CONCURRENT_PER_HOST': 2,
+    'DRAIN_MAX_BYTES': int(os.getenv('FBREF_DRAIN_MAX_BYTES', 256 * 1024)),
+}
+
+# Token bucket shared by every process fetching from fbref (sports-reference allows about 20 requests per minute)
+# BACKEND is dashboard.ratelimit.SQLiteBackend for a single machine or dashboard.ratelimit.DatabaseBackend across nodes,
+# callers queue for a token up to TIMEOUT seconds. The cache warmer (manage.py warm_cache) only takes WARM_SHARE of RATE,
+# so interactive fetches of pages missing from the cache do not queue behind it
+FBREF_RATE_LIMIT = {
+    'BACKEND': 'dashboard.ratelimit.SQLiteBackend',
+    'OPTIONS': {'path': BASE_DIR / '.cache' / 'ratelimit.sqlite3'},
+    'RATE': 20 / 60,
+    'BURST': 3,
+    'TIMEOUT': 20,
+    'WARM_SHARE': float(os.getenv('FBREF_WARM_SHARE', 0.25)),
+}
+if os.getenv('FBREF_RATE_LIMIT_BACKEND') == 'database':
+    FBREF_RATE_LIMIT.update({'BACKEND': 'dashboard.ratelimit.DatabaseBackend', 'OPTIONS': {}})
+
+# How pages are fetched: 'live' from fbref, 'record' from fbref while saving every response into FIXTURE_DIR,
+# or 'replay' from FIXTURE_DIR only (offline), delaying each response by LATENCY plus up to JITTER seconds
+FBREF_TRANSPORT = {
+    'MODE': os.getenv('FBREF_TRANSPORT', 'live'),
+    'FIXTURE_DIR': os.getenv('FBREF_FIXTURE_DIR', BASE_DIR / 'dashboard' / 'fixtures' / 'fbref'),
+    'LATENCY': float(os.getenv('FBREF_REPLAY_LATENCY', 0)),
+    'JITTER': float(os.getenv('FBREF_REPLAY_JITTER', 0)),
+    'SEED': os.getenv('FBREF_REPLAY_SEED'),
+}
+
+# Threads used to scrap several pages (e.g. both compared players) at the same time
+FBREF_SCRAP_WORKERS = 4
+
+# Processes parsing and cleaning cached player pages off the request threads (downloaded pages are parsed while
+# streaming and only their tables are cleaned in the request thread): WORKERS pages are cleaned at once, MAX_PENDING
+# more may wait and callers wait up to TIMEOUT seconds for a place before the request fails with 503, as does a page
+# not cleaned within JOB_TIMEOUT seconds of its submission. The pool is spawned by every web process and each worker
+# takes about 116 MB once it imported dashboard.utils, so WORKERS is not derived from os.cpu_count() (the host's cores
+# on Heroku, not the dyno's share). With 0 workers pages are cleaned in the request thread.
+# The cache warmer sharing the web dyno (see Procfile) runs without memory tiers nor parse workers
+FBREF_PARSE_POOL = {
+    'WORKERS': int(os.getenv('FBREF_PARSE_WORKERS', 1)),
+    'MAX_PENDING': 8,
+    'TIMEOUT': 10,
+    'JOB_TIMEOUT': 20,
+}
+
+# Threads building the charts of async compares, the images are drawn by the chart view when the page loads them
+FBREF_RENDER_WORKERS = 4
+
+# Processes drawing the chart images: WORKERS charts are drawn at once, MAX_PENDING more may wait and callers
+# wait up to TIMEOUT seconds for a place before the request fails with 503. A chart not drawn within JOB_TIMEOUT seconds
+# of its submission is answered with 503, and workers are replaced by new ones after MAX_JOBS charts.
+# Like the parse pool it is spawned by every web process and each worker takes about 61 MB once it imported
+# dashboard.charts, so WORKERS is set with FBREF_RENDER_PROCESSES rather than derived from os.cpu_count().
+# With the memory tiers of the caches (64 + 16 + 64 MB) on top, keep to one worker of each pool per web process
+# on a 512 MB dyno. With 0 workers charts are drawn in the request thread
+FBREF_RENDER_POOL = {
+    'WORKERS': int(os.getenv('FBREF_RENDER_PROCESSES', 1)),
+    'MAX_PENDING': 64,
+    'TIMEOUT': 10,
+    'JOB_TIMEOUT': 30,
+    'MAX_JOBS': 2000,
+}
+
+# Serve compare with the async view (needs an ASGI server, see Procfile), set to 0 when deploying with WSGI
+ASYNC_COMPARE = os.getenv('ASYNC_COMPARE', '1') == '1'
+
+
 import django_heroku
 django_heroku.settings(locals())
@@ -0,0 +1,101 @@
+"""
+    Alignment of the seasons of two players' stats frames.
+
+    The seasons of both players are outer-joined once per compared pair, and the stats of each player are laid out
+    as one float array over those seasons, NaN in the seasons the player has no row for. Every chart of the pair
+    reads its columns from these arrays, so the bars of a season always stand above the label of that season.
+"""
+import numpy as np
+
+
+class AlignedTable:
+    """
+        Columns of one player on the seasons of an alignment: table[name] is a float array, NaN where the player has no row.
+        Columns computed by a chart (e.g. table['Non-Starter'] = table['MP'] - table['Starts']) are kept apart.
+    """
+
+    def __init__(self, values, positions):
+        self.values = values
+        self.positions = positions
+        self.computed = {}
+
+    @property
+    def columns(self):
+        return list(self.positions) + list(self.computed)
+
+    def __contains__(self, name):
+        return name in self.positions or name in self.computed
+
+    def __getitem__(self, name):
+        if name in self.computed:
+            return self.computed[name]
+        return self.values[:, self.positions[name]]
+
+    def __setitem__(self, name, values):
+        self.computed[name] = values
+
+
+class SeasonAlignment:
+    """
+        Stats of players A and B over the union of their seasons, in chronological order.
+        values_A is a (season, column) float array of player A, mask_A tells the seasons player A has a row for.
+        Windows (last, since_latest_debut) are views of the same arrays.
+    """
+
+    def __init__(self, seasons, values_A, values_B, mask_A, mask_B, columns_A, columns_B):
+        self.seasons = seasons
+        self.values_A = values_A
+        self.values_B = values_B
+        self.mask_A = mask_A
+        self.mask_B = mask_B
+        self.columns_A = columns_A
+        self.columns_B = columns_B
+
+    def __len__(self):
+        return len(self.seasons)
+
+    def _slice(self, rows):
+        return SeasonAlignment(
+            self.seasons[rows], self.values_A[rows], self.values_B[rows], self.mask_A[rows], self.mask_B[rows],
+            self.columns_A, self.columns_B,
+        )
+
+    def last(self, n):
+        """ Alignment of the last n seasons, sliced like table[-n:] """
+        return self._slice(slice(-n, None))
+
+    def since_latest_debut(self):
+        """ Alignment of the seasons from the first season of the player who started later """
+        return self._slice(slice(max(self.mask_A.argmax(), self.mask_B.argmax()), None))
+
+    def tables(self, prefix=''):
+        """
+            (AlignedTable of A, AlignedTable of B) of the columns starting with prefix, named without it,
+            e.g. prefix 'standard:Playing Time - ' gives the columns 'MP', 'Starts', 'Min' and '90s'
+        """
+        return (
+            AlignedTable(self.values_A, get_positions(self.columns_A, prefix)),
+            AlignedTable(self.values_B, get_positions(self.columns_B, prefix)),
+        )
+
+
+def get_positions(columns, prefix):
+    return {col[len(prefix):]: position for position, col in enumerate(columns) if col.startswith(prefix)}
+
+
+def align_rows(stats, seasons):
+    """ (values, mask) of the stats frame on the seasons, rows of seasons missing from the frame are NaN """
+    rows = stats.index.get_indexer(seasons)
+    mask = rows >= 0
+    values = np.full((len(seasons), len(stats.columns)), np.nan)
+    values[mask] = stats.to_numpy(dtype=np.float64)[rows[mask]]
+    return values, mask
+
+
+def align_seasons(stats_A, stats_B):
+    """ SeasonAlignment of the stats frames of two players (from utils.clean_player_stats), indexed by season """
+    # season labels ('2017-2018', or '2018' for calendar year leagues) sort chronologically as strings
+    seasons = np.array(sorted(set(stats_A.index) | set(stats_B.index)), dtype=object)
+    values_A, mask_A = align_rows(stats_A, seasons)
+    values_B, mask_B = align_rows(stats_B, seasons)
+    return SeasonAlignment(seasons, values_A, values_B, mask_A, mask_B, list(stats_A.columns), list(stats_B.columns))
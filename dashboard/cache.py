@@ -0,0 +1,487 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .schema import get_season_index
+
+
+class CacheEntry:
+    """ Cached value together with the time it was stored """
+
+    def __init__(self, value, created):
+        self.value = value
+        self.created = created
+
+    @property
+    def age(self):
+        return time.time() - self.created
+
+
+class CacheStats:
+    """ Hit/miss/eviction counters of a cache tier """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class MemoryCache:
+    """ In-process cache bounded by the total bytes of its values, evicting with the given policy ('lru' or 'lfu') """
+
+    def __init__(self, max_bytes, policy='lru'):
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._hits = Counter()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._hits[key] += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, created=None):
+        # values larger than the whole budget would only evict everything else
+        if len(value) > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(value, created or time.time())
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                # the entry just set is the most recent one and has no hits yet, it is never the victim
+                if self.policy == 'lfu':
+                    # entries are kept in recency order, so min() breaks ties on the least recent one
+                    victim = min((k for k in self._entries if k != key), key=lambda k: self._hits[k])
+                else:
+                    victim = next(iter(self._entries))
+                self._remove(victim)
+                self.stats.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry.value)
+        self._hits.pop(key, None)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._bytes = 0
+
+
+class DiskCache:
+    """
+        Key-value store that keeps every entry as a single file on disk.
+        Each file starts with a JSON header line (key and creation time) followed by the raw bytes value.
+        When max_bytes is set, the directory is kept under it by evicting entries with the given policy ('lru' or 'lfu').
+        The directory can be shared by several processes: eviction rescans it, file mtimes record the last access
+        and hit counts (for 'lfu') are only known to this process.
+    """
+
+    def __init__(self, directory, max_bytes=None, policy='lru'):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.stats = CacheStats()
+        self._hits = Counter()
+        self._bytes = None
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.cache')
+
+    def _scan(self):
+        """ {path: (size, mtime)} of every entry in the directory """
+        files = {}
+        for root, dirs, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.cache'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime)
+        return files
+
+    @property
+    def size(self):
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for size, mtime in self._scan().values())
+            return self._bytes
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                value = f.read()
+        except (OSError, ValueError):
+            self.stats.misses += 1
+            return None
+        # guard against sha1 collisions and foreign files
+        if header.get('key') != key:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        if self.max_bytes is not None:
+            self._hits[path] += 1
+            # the mtime is the last access time used by the eviction, the creation time lives in the header
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return CacheEntry(value, header['created'])
+
+    def set(self, key, value, created=None):
+        if self.max_bytes is not None:
+            # measure the directory before the first write of this process
+            self.size
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = json.dumps({'key': key, 'created': created or time.time()}).encode('utf-8') + b'\n'
+        # write to a temporary file first so readers never see a half written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(value)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if self.max_bytes is not None:
+            with self._lock:
+                self._bytes += len(header) + len(value)
+                if self._bytes > self.max_bytes:
+                    self._evict(keep=path)
+
+    def _evict(self, keep):
+        # other processes write to the same directory, so start from what is actually on disk
+        files = self._scan()
+        self._bytes = sum(size for size, mtime in files.values())
+        # free a bit more than needed so the directory is not rescanned on every write
+        target = self.max_bytes * 0.9
+        if self.policy == 'lfu':
+            # least frequently used first, ties broken by the least recently used
+            eviction_order = sorted(files, key=lambda path: (self._hits[path], files[path][1]))
+        else:
+            eviction_order = sorted(files, key=lambda path: files[path][1])
+        for victim in eviction_order:
+            if self._bytes <= target:
+                break
+            if victim == keep:
+                continue
+            try:
+                os.remove(victim)
+            except FileNotFoundError:
+                pass
+            self._bytes -= files[victim][0]
+            self._hits.pop(victim, None)
+            self.stats.evictions += 1
+
+    def delete(self, key):
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes -= size
+            self._hits.pop(path, None)
+        return True
+
+    def clear(self):
+        with self._lock:
+            for path in self._scan():
+                os.remove(path)
+            self._hits.clear()
+            self._bytes = 0
+
+
+class TieredCache:
+    """ Memory tier for hot entries in front of a disk tier for warm ones """
+
+    def __init__(self, memory, disk):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry.value, entry.created)
+        return entry
+
+    def set(self, key, value, created=None):
+        created = created or time.time()
+        self.disk.set(key, value, created)
+        self.memory.set(key, value, created)
+
+    def delete(self, key):
+        in_memory = self.memory.delete(key)
+        return self.disk.delete(key) or in_memory
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self):
+        return {
+            'memory': dict(self.memory.stats.as_dict(), bytes=self.memory.size, max_bytes=self.memory.max_bytes),
+            'disk': dict(self.disk.stats.as_dict(), bytes=self.disk.size, max_bytes=self.disk.max_bytes),
+        }
+
+
+"""
+    FBREF PAGE CACHE
+"""
+
+class Page:
+    """
+        HTML document of an fbref url and the time it was fetched.
+        tables holds the {table_id: <table>} parsed while the page was downloaded, None for pages read from the cache.
+    """
+
+    def __init__(self, url, text, fetched_at, tables=None):
+        self.url = url
+        self.text = text
+        self.fetched_at = fetched_at
+        self.tables = tables
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+_page_cache = None
+
+
+def get_page_cache():
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = TieredCache(
+            MemoryCache(settings.FBREF_CACHE_MEMORY_MAX_BYTES, settings.FBREF_CACHE_EVICTION),
+            DiskCache(settings.FBREF_CACHE_DIR, settings.FBREF_CACHE_DISK_MAX_BYTES, settings.FBREF_CACHE_EVICTION),
+        )
+    return _page_cache
+
+
+def get_page_type(url):
+    """ Page type of an fbref url: 'player', 'squad' or 'league' """
+    if '/players/' in url:
+        return 'player'
+    if '/squads/' in url:
+        return 'squad'
+    if '/comps/' in url:
+        return 'league'
+    return None
+
+
+def get_page_ttl(url):
+    """ Number of seconds a cached page of the given url stays fresh """
+    ttls = settings.FBREF_CACHE_TTL
+    return ttls.get(get_page_type(url), ttls['default'])
+
+
+def get_cached_page(url):
+    """ Return the cached Page of the url whatever its age, or None if it was never cached """
+    entry = get_page_cache().get(url)
+    if entry is None:
+        return None
+    return Page(url, entry.value.decode('utf-8'), entry.created)
+
+
+def cache_page(url, html_doc):
+    page = Page(url, html_doc, time.time())
+    get_page_cache().set(url, html_doc.encode('utf-8'), created=page.fetched_at)
+    return page
+
+
+def invalidate_page(url):
+    """ Drop the cached page of the url so the next request fetches it from fbref again """
+    return get_page_cache().delete(url)
+
+
+def clear_page_cache():
+    get_page_cache().clear()
+
+
+"""
+    PARSED STATS CACHE
+"""
+
+# part of the keys, bump it whenever the cleaned tables change so older archives are never read
+STATS_CACHE_VERSION = 5
+
+_stats_cache = None
+
+
+def get_stats_cache():
+    global _stats_cache
+    if _stats_cache is None:
+        _stats_cache = TieredCache(
+            MemoryCache(settings.FBREF_STATS_CACHE_MEMORY_MAX_BYTES, settings.FBREF_CACHE_EVICTION),
+            DiskCache(settings.FBREF_STATS_CACHE_DIR, settings.FBREF_STATS_CACHE_DISK_MAX_BYTES, settings.FBREF_CACHE_EVICTION),
+        )
+    return _stats_cache
+
+
+def get_stats_key(player_id, html_doc):
+    """ Key of the stats cleaned from this version of the player's page """
+    digest = hashlib.sha1(html_doc.encode('utf-8')).hexdigest()
+    return f'{player_id}:{digest}:v{STATS_CACHE_VERSION}'
+
+
+def frames_to_bytes(frames):
+    """
+        Columnar encoding of {name: DataFrame}: a JSON header line (index, columns and layout of every table)
+        followed by one raw NumPy block per dtype of each table, stored column by column, which are read back
+        with np.frombuffer without any parsing. Object columns are kept in the header.
+    """
+    header = {}
+    blocks = []
+    offset = 0
+    for name, frame in frames.items():
+        dtypes = frame.dtypes.to_numpy()
+        table = {
+            'index': frame.index.tolist(),
+            'index_name': frame.index.name,
+            'columns': frame.columns.tolist(),
+            'blocks': [],
+            'objects': {},
+        }
+        for dtype in pd.unique(dtypes):
+            positions = np.flatnonzero(dtypes == dtype)
+            if dtype == object:
+                table['objects'].update({int(position): frame.iloc[:, position].tolist() for position in positions})
+                continue
+            block = np.ascontiguousarray(frame.iloc[:, positions].to_numpy().T)
+            table['blocks'].append({'dtype': block.dtype.str, 'positions': positions.tolist(), 'offset': offset, 'shape': block.shape})
+            blocks.append(block.tobytes())
+            offset += block.nbytes
+        header[name] = table
+    return json.dumps(header).encode('utf-8') + b'\n' + b''.join(blocks)
+
+
+def frames_from_bytes(data):
+    end = data.index(b'\n')
+    header = json.loads(data[:end])
+    body = memoryview(data)[end + 1:]
+    frames = {}
+    for name, table in header.items():
+        columns = table['columns']
+        values = [None] * len(columns)
+        for block in table['blocks']:
+            rows, cols = block['shape']
+            array = np.frombuffer(body, dtype=block['dtype'], count=rows * cols, offset=block['offset']).reshape(rows, cols)
+            for row, position in enumerate(block['positions']):
+                values[position] = array[row]
+        for position, column_values in table['objects'].items():
+            values[int(position)] = np.array(column_values, dtype=object)
+        index = pd.Index(table['index'], name=table['index_name'])
+        frames[name] = pd.DataFrame(dict(zip(columns, values)), index=index)
+    return frames
+
+
+def encode_stats(stats):
+    return frames_to_bytes({'stats': stats})
+
+
+def decode_stats(data):
+    stats = frames_from_bytes(data)['stats']
+    # the archive keeps the season labels, not their categorical dtype
+    stats.index = get_season_index(stats.index)
+    return stats
+
+
+def get_cached_stats(player_id, html_doc):
+    """ Stats frame cleaned from this version of the player's page, or None """
+    entry = get_stats_cache().get(get_stats_key(player_id, html_doc))
+    if entry is None:
+        return None
+    return decode_stats(entry.value)
+
+
+def cache_stats(player_id, html_doc, stats):
+    """ stats: stats frame of the player, or already encoded by encode_stats """
+    data = stats if isinstance(stats, bytes) else encode_stats(stats)
+    get_stats_cache().set(get_stats_key(player_id, html_doc), data)
+
+
+"""
+    CHART IMAGE CACHE
+"""
+
+_chart_cache = None
+
+
+def get_chart_cache():
+    global _chart_cache
+    if _chart_cache is None:
+        _chart_cache = TieredCache(
+            MemoryCache(settings.FBREF_CHART_CACHE_MEMORY_MAX_BYTES, settings.FBREF_CACHE_EVICTION),
+            DiskCache(settings.FBREF_CHART_CACHE_DIR, settings.FBREF_CHART_CACHE_DISK_MAX_BYTES, settings.FBREF_CACHE_EVICTION),
+        )
+    return _chart_cache
+
+
+def get_chart_key(player_ids, metric, last_few_seasons, style, digest):
+    """
+        Key of a chart image: the compared players (in any order), the metric, the last few seasons asked for,
+        the style it is drawn with and the digest of what is drawn (charts.get_chart_digest).
+        The digest changes with the stats of either player, so a chart of older stats is never served.
+    """
+    players = '-'.join(sorted(str(player_id) for player_id in player_ids))
+    return f'{players}:{metric}:{last_few_seasons}:{style}:{digest}'
+
+
+def get_cached_chart(key):
+    """ Encoded image of the chart, or None """
+    entry = get_chart_cache().get(key)
+    return None if entry is None else entry.value
+
+
+def cache_chart(key, image):
+    get_chart_cache().set(key, image)
@@ -0,0 +1,108 @@
+"""
+    Comparison charts drawn with the object-oriented API of matplotlib.
+
+    A Chart only describes what is drawn: the seasons, the bars of both players and the labels. render_chart draws it
+    on a Figure of its own attached to an Agg canvas, so no pyplot state is shared between charts, charts can be drawn
+    from several threads at once and every figure is freed as soon as its image is encoded.
+    get_chart_data gives the same description as JSON for the charts drawn by the browser (static/dashboard/compare.js).
+"""
+import hashlib
+import io
+import json
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+FIGURE_SIZE = (10, 6)
+BAR_WIDTH = 0.4
+
+# part of the keys of cached chart images, bump it whenever render_chart draws differently so older images are never served
+CHART_STYLE = 1
+
+
+class Chart:
+    """ Bar chart of two players per season, filled by the get_*_chart functions of utils """
+
+    def __init__(self, seasons, name=None, xlabel_size=None):
+        self.seasons = [str(season) for season in seasons]
+        # the comparison drawn, e.g. 'Minutes Played'
+        self.name = name
+        self.xlabel_size = xlabel_size
+        self.title = ''
+        self.ylabel = ''
+        self.yticks = None
+        # (offset from the season tick, heights, bottoms or None, legend label)
+        self.bars = []
+
+    def bar(self, offset, values, bottom=None, label=None):
+        """ Bars of a player shifted by offset from the season ticks, stacked on bottom when given """
+        values = np.asarray(values, dtype=np.float64)
+        if bottom is not None:
+            bottom = np.asarray(bottom, dtype=np.float64)
+        self.bars.append((offset, values, bottom, label))
+
+
+def get_chart_digest(chart):
+    """ sha1 of everything drawn on the chart: the same chart of the same data always has the same digest """
+    digest = hashlib.sha1()
+    yticks = None if chart.yticks is None else np.asarray(chart.yticks).tolist()
+    digest.update(json.dumps([chart.seasons, chart.title, chart.ylabel, chart.xlabel_size, yticks]).encode('utf-8'))
+    for offset, values, bottom, label in chart.bars:
+        digest.update(json.dumps([offset, label, bottom is not None]).encode('utf-8'))
+        digest.update(values.tobytes())
+        if bottom is not None:
+            digest.update(bottom.tobytes())
+    return digest.hexdigest()
+
+
+def get_json_values(values):
+    # NaN (no row for the season) is null, counts are written without decimals and rates rounded like fbref does
+    return [None if np.isnan(value) else int(value) if value.is_integer() else round(value, 3) for value in values.tolist()]
+
+
+def get_chart_data(chart):
+    """
+        JSON-serializable description of the chart. The bottom of a stacked bar is always the sum of the bars drawn
+        before it at the same offset, so a stacked bar only has 'stacked': true instead of its bottoms.
+    """
+    return {
+        'name': chart.name,
+        'title': chart.title,
+        'ylabel': chart.ylabel,
+        'seasons': chart.seasons,
+        'yticks': None if chart.yticks is None else get_json_values(np.asarray(chart.yticks, dtype=np.float64)),
+        'bars': [
+            {'offset': offset, 'label': label, 'values': get_json_values(values), 'stacked': bottom is not None}
+            for offset, values, bottom, label in chart.bars
+        ],
+    }
+
+
+def render_chart(chart, format='png'):
+    """ Image of the chart, encoded as format """
+    figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+
+    X_axis = np.arange(len(chart.seasons))
+    ax.set_xticks(X_axis, chart.seasons, rotation=30, fontsize=12)
+    ax.set_xlabel("Seasons", **({'size': chart.xlabel_size} if chart.xlabel_size else {}))
+    for offset, values, bottom, label in chart.bars:
+        ax.bar(X_axis + offset, values, width=BAR_WIDTH, bottom=bottom, label=label)
+    ax.set_ylabel(chart.ylabel, size=12)
+    ax.tick_params(axis='y', labelsize=12)
+    ax.set_title(chart.title, size=18)
+    if chart.yticks is not None:
+        ax.set_yticks(chart.yticks)
+    ax.legend(loc='best', framealpha=0.5)
+
+    # adjusts the size of the chart to the size of the figure
+    figure.tight_layout()
+    with io.BytesIO() as buffer:
+        figure.savefig(buffer, format=format)
+        image = buffer.getvalue()
+    # drop the artists now rather than whenever the garbage collector gets to the figure
+    figure.clear()
+    return image
@@ -0,0 +1,425 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from collections import defaultdict
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+from django.conf import settings
+
+from . import ratelimit
+from .parse import TableStreamParser
+
+
+# 429 is not retried: fbref asks to slow down, the request fails with FetchError and the client is answered with 503
+RETRY_STATUSES = [500, 502, 503, 504]
+
+# bytes of the body read at a time when streaming a page into the table parser
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+# at most MAX_CONCURRENT_PER_HOST requests are in flight to the same host from this process
+_host_slots = defaultdict(lambda: threading.BoundedSemaphore(settings.FBREF_HTTP['MAX_CONCURRENT_PER_HOST']))
+_host_slots_lock = threading.Lock()
+
+
+def _build_session():
+    config = settings.FBREF_HTTP
+    # urllib3 only retries connections that could not be opened: a request that reached fbref is retried by fetch()
+    # itself, which takes a token of the budget for every attempt
+    retry = Retry(
+        total=config['RETRIES'],
+        connect=config['RETRIES'],
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=config['BACKOFF_FACTOR'],
+        allowed_methods=['GET', 'HEAD'],
+        raise_on_status=False,
+    )
+    # pool_block keeps the number of open connections per host bounded under threaded workers
+    adapter = HTTPAdapter(
+        pool_connections=config['POOL_CONNECTIONS'],
+        pool_maxsize=config['POOL_MAXSIZE'],
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # only advertise the encodings urllib3 can decode (br needs the optional brotli package)
+    session.headers.update(make_headers(keep_alive=True, accept_encoding=True))
+    return session
+
+
+def get_session():
+    """ Shared keep-alive session used for every request to fbref """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_host_slot(url):
+    host = urlsplit(url).netloc
+    with _host_slots_lock:
+        return _host_slots[host]
+
+
+def get_retry_delay(response, attempt):
+    """
+        Seconds to wait before sending the request of a 5xx response again, None when it is not retried:
+        other statuses, last attempt, or a Retry-After longer than READ_TIMEOUT (the request fails instead of
+        holding its thread). Without Retry-After the delay grows exponentially with BACKOFF_FACTOR.
+    """
+    config = settings.FBREF_HTTP
+    if response.status_code not in RETRY_STATUSES or attempt >= config['RETRIES']:
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None and retry_after.isdigit():
+        delay = int(retry_after)
+    else:
+        delay = config['BACKOFF_FACTOR'] * (2 ** attempt)
+    return delay if delay <= config['READ_TIMEOUT'] else None
+
+
+def fetch(url):
+    """ GET the url through the shared session with connect/read timeouts and retries on 5xx """
+    mode = settings.FBREF_TRANSPORT['MODE']
+    if mode == 'replay':
+        response = replay_response(url)
+        time.sleep(replay_delay())
+        return response
+
+    config = settings.FBREF_HTTP
+    for attempt in range(config['RETRIES'] + 1):
+        # every attempt waits for a token of the request budget shared with the other workers
+        ratelimit.acquire()
+        with get_host_slot(url):
+            response = get_session().get(url, timeout=(config['CONNECT_TIMEOUT'], config['READ_TIMEOUT']))
+        delay = get_retry_delay(response, attempt)
+        if delay is None:
+            break
+        time.sleep(delay)
+    if mode == 'record':
+        record_response(url, response.status_code, response.text)
+    return response
+
+
+def fetch_tables(url, table_ids):
+    """
+        Like fetch(), but the body is streamed into a TableStreamParser and the download stops once every table
+        of table_ids is parsed. Returns (response, text, tables): text is the part of the page that was read
+        and tables the {table_id: <table>} found in it (empty for error responses).
+    """
+    mode = settings.FBREF_TRANSPORT['MODE']
+    if mode == 'replay':
+        response = replay_response(url)
+        time.sleep(replay_delay())
+        return (response,) + read_tables(iter_text(response), table_ids)
+
+    config = settings.FBREF_HTTP
+    for attempt in range(config['RETRIES'] + 1):
+        ratelimit.acquire()
+        with get_host_slot(url):
+            with get_session().get(url, timeout=(config['CONNECT_TIMEOUT'], config['READ_TIMEOUT']), stream=True) as response:
+                if response.ok:
+                    # requests streams a body once, the rest is drained from the iterator the tables were read from
+                    chunks = iter_text(response)
+                    text, tables = read_tables(chunks, table_ids)
+                    # closing the response before the end of the body drops its connection, see DRAIN_MAX_BYTES
+                    drain(chunks, config['DRAIN_MAX_BYTES'])
+                else:
+                    text, tables = response.text, {}
+        delay = get_retry_delay(response, attempt)
+        if delay is None:
+            break
+        time.sleep(delay)
+    if mode == 'record':
+        record_response(url, response.status_code, text)
+    return response, text, tables
+
+
+def iter_text(response):
+    """ Text chunks of the body of a streamed response, decoded as utf-8 unless the response tells its encoding """
+    if response.encoding is None:
+        response.encoding = 'utf-8'
+    return response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True)
+
+
+def read_tables(chunks, table_ids):
+    """ Feed text chunks of a body to a TableStreamParser until it is done, returns (text read, tables) """
+    parser = TableStreamParser(table_ids)
+    read = []
+    for chunk in chunks:
+        read.append(chunk)
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return ''.join(read), parser.close()
+
+
+def drain(chunks, max_bytes):
+    """
+        Read the rest of a streamed body, so its connection goes back to the pool instead of being closed.
+        Stops after max_bytes, the connection is then closed with the response. Returns whether the body was all read.
+    """
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        if read > max_bytes:
+            return False
+    return True
+
+
+async def adrain(chunks, max_bytes):
+    read = 0
+    async for chunk in chunks:
+        read += len(chunk)
+        if read > max_bytes:
+            return False
+    return True
+
+
+class FetchError(Exception):
+    """ fbref answered with an error status """
+
+    def __init__(self, url, status_code):
+        super().__init__(f"{url} answered with status {status_code}")
+        self.url = url
+        self.status_code = status_code
+
+
+class SingleFlight:
+    """
+        Coalesce concurrent calls that share a key: the first caller runs the function,
+        callers arriving while it is in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+"""
+    ASYNC FETCHING
+"""
+
+# httpx clients and host slots are bound to the event loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+_async_host_slots = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """ Shared keep-alive httpx client of the running event loop """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        config = settings.FBREF_HTTP
+        client = _async_clients[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=config['POOL_MAXSIZE'], max_keepalive_connections=config['POOL_MAXSIZE']),
+            timeout=httpx.Timeout(config['READ_TIMEOUT'], connect=config['CONNECT_TIMEOUT']),
+            headers=make_headers(accept_encoding=True),
+        )
+    return client
+
+
+def get_async_host_slot(url):
+    loop = asyncio.get_running_loop()
+    slots = _async_host_slots.setdefault(loop, {})
+    host = urlsplit(url).netloc
+    if host not in slots:
+        slots[host] = asyncio.BoundedSemaphore(settings.FBREF_HTTP['MAX_CONCURRENT_PER_HOST'])
+    return slots[host]
+
+
+async def afetch(url):
+    """ Async counterpart of fetch(), same budget, timeouts and retries on 429/5xx """
+    mode = settings.FBREF_TRANSPORT['MODE']
+    if mode == 'replay':
+        response = replay_response(url)
+        await asyncio.sleep(replay_delay())
+        return response
+
+    config = settings.FBREF_HTTP
+    for attempt in range(config['RETRIES'] + 1):
+        await ratelimit.aacquire()
+        async with get_async_host_slot(url):
+            response = await get_async_client().get(url)
+        delay = get_retry_delay(response, attempt)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+    if mode == 'record':
+        record_response(url, response.status_code, response.text)
+    return response
+
+
+async def afetch_tables(url, table_ids):
+    """ Async counterpart of fetch_tables() """
+    mode = settings.FBREF_TRANSPORT['MODE']
+    if mode == 'replay':
+        response = replay_response(url)
+        await asyncio.sleep(replay_delay())
+        return (response,) + read_tables(iter_text(response), table_ids)
+
+    config = settings.FBREF_HTTP
+    for attempt in range(config['RETRIES'] + 1):
+        await ratelimit.aacquire()
+        async with get_async_host_slot(url):
+            async with get_async_client().stream('GET', url) as response:
+                if response.is_success:
+                    # httpx streams a body once, the rest is drained from the iterator the tables were read from
+                    chunks = response.aiter_text(STREAM_CHUNK_SIZE)
+                    text, tables = await aread_tables(chunks, table_ids)
+                    await adrain(chunks, config['DRAIN_MAX_BYTES'])
+                else:
+                    await response.aread()
+                    text, tables = response.text, {}
+        delay = get_retry_delay(response, attempt)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+    if mode == 'record':
+        record_response(url, response.status_code, text)
+    return response, text, tables
+
+
+async def aread_tables(chunks, table_ids):
+    """ Async counterpart of read_tables(), reading the text chunks of a streamed response """
+    # chunks are small enough to be parsed on the event loop
+    parser = TableStreamParser(table_ids)
+    read = []
+    async for chunk in chunks:
+        read.append(chunk)
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return ''.join(read), parser.close()
+
+
+class AsyncSingleFlight:
+    """ SingleFlight for coroutines, callers awaiting the same key share one task """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        # tasks can only be awaited from the event loop running them
+        call_key = (asyncio.get_running_loop(), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = self._calls[call_key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+        # one caller going away must not cancel the download for the others
+        return await asyncio.shield(task)
+
+
+"""
+    RECORD / REPLAY
+"""
+
+class FixtureNotFound(LookupError):
+    """ Raised in replay mode when no response was recorded for the url """
+
+
+class ReplayedResponse:
+    """ Recorded response, exposing the attributes of both requests and httpx responses that callers use """
+
+    def __init__(self, url, status_code, text):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for start in range(0, len(self.text), chunk_size):
+            chunk = self.text[start:start + chunk_size]
+            yield chunk if decode_unicode else chunk.encode('utf-8')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def is_success(self):
+        return 200 <= self.status_code < 300
+
+
+def get_fixture_path(url):
+    """ Readable and unique fixture file name, e.g. players_e342ad68_Mohamed-Salah.1a2b3c4d.json """
+    slug = re.sub(r'[^A-Za-z0-9-]+', '_', urlsplit(url).path.replace('/en/', '/')).strip('_')
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(str(settings.FBREF_TRANSPORT['FIXTURE_DIR']), f'{slug}.{digest}.json')
+
+
+def record_response(url, status_code, text):
+    path = get_fixture_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'status_code': status_code, 'text': text}, f)
+
+
+def replay_response(url):
+    try:
+        with open(get_fixture_path(url), encoding='utf-8') as f:
+            fixture = json.load(f)
+    except FileNotFoundError:
+        raise FixtureNotFound(f"No recorded response for {url}") from None
+    return ReplayedResponse(fixture['url'], fixture['status_code'], fixture['text'])
+
+
+_replay_random = None
+
+
+def replay_delay():
+    """ Injected latency of a replayed response: LATENCY plus a uniform random JITTER (seeded by SEED) """
+    global _replay_random
+    config = settings.FBREF_TRANSPORT
+    if _replay_random is None:
+        _replay_random = random.Random(config['SEED'])
+    return config['LATENCY'] + _replay_random.uniform(0, config['JITTER'])
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import ratelimit
+from dashboard.cache import get_page_cache, get_page_ttl
+from dashboard.database.ID_VAL_PAIRS import PLAYERS
+from dashboard.models import PlayerPopularity
+from dashboard.utils import get_player_stats, get_player_url, refresh_page
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the fbref page of every player in the catalog into the page cache, most requested players first, "
+        "and clean its stats tables into the stats cache. "
+        "Progress is checkpointed so an interrupted pass resumes where it stopped. "
+        "Runs next to the web server (see Procfile): the caches and the rate limit bucket are files of its machine. "
+        "Pages go straight to the disk tiers of the caches and are cleaned in this process, without a parse pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh-before', type=int, default=60 * 60,
+                            help="Refresh cached pages expiring within this many seconds (default: 3600)")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Only walk the first N players of the pass")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running, starting a new pass once the previous one is done")
+        parser.add_argument('--interval', type=int, default=15 * 60,
+                            help="Seconds to sleep between passes with --loop (default: 900)")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignore the checkpoint and start a new pass")
+
+    def handle(self, *args, **options):
+        # every Heroku dyno has a disk of its own: on a worker or one-off dyno the warmer would fill caches the web
+        # dyno never reads, and spend a request budget of its own on top of the web dyno's
+        dyno = os.getenv('DYNO')
+        if dyno and not dyno.startswith('web.'):
+            raise CommandError(f"warm_cache must run on the web dyno, whose caches it fills, not on {dyno} (see Procfile)")
+        # every page is read once here: keeping them in memory or spawning a parse worker would only take memory
+        # from the web process sharing the dyno
+        settings.FBREF_CACHE_MEMORY_MAX_BYTES = settings.FBREF_STATS_CACHE_MEMORY_MAX_BYTES = 0
+        settings.FBREF_PARSE_POOL = dict(settings.FBREF_PARSE_POOL, WORKERS=0)
+        os.makedirs(settings.FBREF_CACHE_DIR, exist_ok=True)
+        checkpoint_path = os.path.join(str(settings.FBREF_CACHE_DIR), 'warm_cache.json')
+        restart = options['restart']
+        while True:
+            self.warm(checkpoint_path, restart, options['refresh_before'], options['limit'])
+            restart = False
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def get_catalog(self):
+        """ Unique (player_id, player_name) of the catalog, most requested first """
+        popularity = dict(PlayerPopularity.objects.values_list('player_id', 'requests'))
+        players = list(dict(PLAYERS).items())
+        # sorted is stable, so players never requested keep the catalog order
+        return sorted(players, key=lambda player: -popularity.get(player[0], 0))
+
+    def load_checkpoint(self, checkpoint_path):
+        try:
+            with open(checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_checkpoint(self, checkpoint_path, checkpoint):
+        tmp_path = checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def needs_refresh(self, page_cache, url, refresh_before):
+        entry = page_cache.get(url)
+        return entry is None or get_page_ttl(url) - entry.age <= refresh_before
+
+    def warm(self, checkpoint_path, restart, refresh_before, limit):
+        checkpoint = None if restart else self.load_checkpoint(checkpoint_path)
+        if checkpoint is None or checkpoint['position'] >= len(checkpoint['players']):
+            players = self.get_catalog()[:limit]
+            checkpoint = {'started': time.time(), 'position': 0, 'players': players}
+            self.save_checkpoint(checkpoint_path, checkpoint)
+        else:
+            self.stdout.write(f"Resuming pass at player {checkpoint['position'] + 1}/{len(checkpoint['players'])}")
+
+        page_cache = get_page_cache()
+        players = checkpoint['players']
+        refreshed = skipped = failed = 0
+        for position in range(checkpoint['position'], len(players)):
+            player_id, player_name = players[position]
+            url = get_player_url(player_id, player_name)
+            progress = f"[{position + 1}/{len(players)}] {player_name}"
+
+            fetched = self.needs_refresh(page_cache, url, refresh_before)
+            if fetched:
+                start = time.time()
+                try:
+                    # the warmer's share of the budget, then the shared rate limit like every interactive request
+                    ratelimit.acquire_warm()
+                    # a compare may have fetched the page while the warmer waited for its share
+                    fetched = self.needs_refresh(page_cache, url, refresh_before)
+                    if fetched:
+                        page = refresh_page(url)
+                        # the first compare of the player then skips parsing as well
+                        get_player_stats(player_id, page)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{progress} failed: {e}")
+                else:
+                    if fetched:
+                        refreshed += 1
+                        self.stdout.write(f"{progress} refreshed in {time.time() - start:.1f}s")
+            if not fetched:
+                skipped += 1
+
+            checkpoint['position'] = position + 1
+            # fetches are slow anyway, fresh pages are cheap to check again after a restart
+            if fetched or checkpoint['position'] % 100 == 0:
+                self.save_checkpoint(checkpoint_path, checkpoint)
+        self.save_checkpoint(checkpoint_path, checkpoint)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pass done in {time.time() - checkpoint['started']:.0f}s: "
+            f"{refreshed} refreshed, {skipped} still fresh, {failed} failed"
+        ))
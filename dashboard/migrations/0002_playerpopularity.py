@@ -0,0 +1,22 @@
+# Generated by Django 4.0.4 on 2026-10-18 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerPopularity',
+            fields=[
+                ('player_id', models.CharField(max_length=16, primary_key=True, serialize=False)),
+                ('player_name', models.CharField(max_length=128)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('last_requested', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,31 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
+
+
+class RateLimitBucket(models.Model):
+    """ Shared token bucket state used by dashboard.ratelimit.DatabaseBackend """
+    name = models.CharField(max_length=64, primary_key=True)
+    tokens = models.FloatField()
+    updated = models.FloatField()
+
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.2f} tokens"
+
+
+class PlayerPopularity(models.Model):
+    """ How often a player was compared, used to warm the page cache most-requested first """
+    player_id = models.CharField(max_length=16, primary_key=True)
+    player_name = models.CharField(max_length=128)
+    requests = models.PositiveIntegerField(default=0)
+    last_requested = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.player_name}: {self.requests} requests"
+
+    @classmethod
+    def record(cls, player_id, player_name):
+        cls.objects.get_or_create(player_id=player_id, defaults={'player_name': player_name})
+        # increment in the database so concurrent requests are all counted
+        cls.objects.filter(player_id=player_id).update(requests=models.F('requests') + 1, last_requested=timezone.now())
@@ -0,0 +1,160 @@
+"""
+    Extraction of the stats tables of fbref pages with lxml, and their conversion to DataFrames.
+
+    fbref wraps every table in a <div id="all_..."> and ships most of them inside an HTML comment
+    that its javascript uncomments on load, so the wrapper is looked up first and its comments are
+    parsed when the table is not part of the tree.
+"""
+import lxml.html
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+
+# wrapper ids of the tables the compare charts are drawn from
+STATS_TABLES = ('all_stats_standard', 'all_stats_shooting', 'all_stats_passing', 'all_stats_defense')
+
+
+def find_table(element):
+    """ First <table> of the element, looking inside its HTML comments if none is part of the tree """
+    if element.tag == 'table':
+        return element
+    for table in element.iter('table'):
+        return table
+    for comment in element.iter(etree.Comment):
+        if comment.text is None or '<table' not in comment.text:
+            continue
+        table = find_table(lxml.html.fragment_fromstring(comment.text, create_parent='div'))
+        if table is not None:
+            return table
+    return None
+
+
+def extract_tables(html_doc, table_ids=STATS_TABLES):
+    """
+        Parse the page once and return {table_id: <table> element} of every id found in it.
+        table_ids are the ids of the tables or of the elements wrapping them (e.g. 'all_stats_standard').
+        The <tfoot> (career totals) of every table is removed.
+    """
+    root = lxml.html.fromstring(html_doc)
+    # a single XPath walk matching all ids: ' a b c ' contains ' b '
+    ids = ' ' + ' '.join(table_ids) + ' '
+    tables = {}
+    for element in root.xpath('//*[contains($ids, concat(" ", @id, " "))]', ids=ids):
+        table = find_table(element)
+        if table is None:
+            continue
+        for tfoot in table.findall('tfoot'):
+            tfoot.drop_tree()
+        tables[element.get('id')] = table
+    return tables
+
+
+class TableStreamParser:
+    """
+        Incremental extract_tables: feed() the page chunk by chunk as it is downloaded,
+        a table is extracted as soon as the end tag of its id is parsed and done tells when all of them were found.
+        Every other <div>/<table> is emptied once parsed, so the match logs and scouting reports of player pages
+        are never held in memory at once.
+    """
+
+    def __init__(self, table_ids=STATS_TABLES):
+        self.table_ids = set(table_ids)
+        self.tables = {}
+        # ids are on wrapper <div>s or on the <table>s, only their events reach Python
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), tag=('div', 'table'))
+        self._parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+        # number of wanted elements being parsed and the ancestors of those already extracted
+        self._open = 0
+        self._ancestors = set()
+
+    @property
+    def done(self):
+        return self.table_ids.issubset(self.tables)
+
+    def feed(self, data):
+        self._parser.feed(data)
+        self._read_events()
+
+    def close(self):
+        """ Parse what is left of the page (only needed when it ended before done) and return the tables found """
+        if not self.done:
+            self._parser.close()
+            self._read_events()
+        return self.tables
+
+    def _read_events(self):
+        for event, element in self._parser.read_events():
+            wanted = element.get('id') in self.table_ids and element.get('id') not in self.tables
+            if event == 'start':
+                self._open += wanted
+                continue
+            if wanted:
+                self._open -= 1
+                table = find_table(element)
+                if table is None:
+                    continue
+                for tfoot in table.findall('tfoot'):
+                    tfoot.drop_tree()
+                self.tables[element.get('id')] = table
+                self._ancestors.update(element.iterancestors())
+            elif not self._open and element not in self._ancestors:
+                element.clear()
+
+
+"""
+    TABLE TO DATAFRAME
+"""
+
+# rows of the <tbody> that are not data: repeated headers and separators
+SKIPPED_ROWS = {'thead', 'over_header', 'spacer'}
+
+
+def get_columns(table):
+    """
+        [(data_stat, name)] of the table columns. Names are flat: the label prefixed by its group of the over header,
+        e.g. 'Playing Time - MP', or only the label when the group is blank, e.g. 'Season'.
+    """
+    header_rows = table.findall('thead/tr')
+    groups = []
+    if len(header_rows) > 1:
+        for cell in header_rows[-2].iterchildren('th', 'td'):
+            groups += [cell.text_content().strip()] * int(cell.get('colspan', 1))
+    columns = []
+    for position, cell in enumerate(header_rows[-1].iterchildren('th', 'td')):
+        label = cell.text_content().strip()
+        group = groups[position] if position < len(groups) else ''
+        columns.append((cell.get('data-stat'), f'{group} - {label}' if group else label))
+    return columns
+
+
+def to_array(texts):
+    """ Typed array of cell texts: int64 or float64 when every cell is a number (thousands separators removed), else object """
+    empty = [text == '' for text in texts]
+    try:
+        numbers = np.array(['nan' if text == '' else text.replace(',', '') for text in texts], dtype=np.float64)
+    except ValueError:
+        return np.array([np.nan if is_empty else text for text, is_empty in zip(texts, empty)], dtype=object)
+    if not any(empty) and not any('.' in text for text in texts):
+        return numbers.astype(np.int64)
+    return numbers
+
+
+def table_to_frame(table):
+    """ DataFrame of an fbref <table> read from the data-stat attribute of its cells, one row per <tbody> data row """
+    columns = get_columns(table)
+    positions = {data_stat: position for position, (data_stat, name) in enumerate(columns) if data_stat}
+    values = [[] for _ in columns]
+    for row in table.iterfind('tbody/tr'):
+        if SKIPPED_ROWS.intersection(row.get('class', '').split()):
+            continue
+        cells = [''] * len(columns)
+        for cell in row.iterchildren('th', 'td'):
+            position = positions.get(cell.get('data-stat'))
+            if position is not None:
+                cells[position] = cell.text_content().strip()
+        for position, text in enumerate(cells):
+            values[position].append(text)
+    frame = pd.DataFrame({position: to_array(texts) for position, texts in enumerate(values)}, columns=range(len(columns)))
+    frame.columns = [name for data_stat, name in columns]
+    return frame
@@ -0,0 +1,195 @@
+"""
+    Token bucket rate limiter for outbound fbref traffic.
+
+    The bucket state lives in a backend shared by every process that fetches pages, so gunicorn workers
+    (and dynos, with the database backend) draw from a single request budget.
+    Callers reserve a token and sleep until it is due, which queues them in arrival order up to a deadline.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+
+class RateLimitTimeout(Exception):
+    """ Raised when no token becomes available before the caller's deadline """
+
+
+def _reserve(tokens, updated, now, rate, capacity, max_wait):
+    """
+        Refill the bucket and try to reserve one token.
+        Returns (wait, tokens) where wait is the number of seconds until the reserved token is due,
+        or None if it would not be due within max_wait (nothing is reserved then).
+    """
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    # tokens below zero are reservations already handed to queued callers
+    wait = max(0.0, (1 - tokens) / rate)
+    if wait > max_wait:
+        return None, tokens
+    return wait, tokens - 1
+
+
+class MemoryBackend:
+    """ Bucket kept in process memory, only shared between threads """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, name, rate, capacity, max_wait):
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(name, (capacity, now))
+            wait, tokens = _reserve(tokens, updated, now, rate, capacity, max_wait)
+            self._buckets[name] = (tokens, now)
+        return wait
+
+
+class SQLiteBackend:
+    """ Bucket kept in a local SQLite file, shared between all processes on one machine """
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute('CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def reserve(self, name, rate, capacity, max_wait):
+        connection = self._connect()
+        try:
+            # take the write lock up front so the read-modify-write is atomic across processes
+            connection.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE name = ?', (name,)).fetchone()
+            tokens, updated = row if row is not None else (capacity, now)
+            wait, tokens = _reserve(tokens, updated, now, rate, capacity, max_wait)
+            connection.execute('INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)', (name, tokens, now))
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+        return wait
+
+
+class DatabaseBackend:
+    """ Bucket kept in the configured Django database, shared between all nodes using it """
+
+    def reserve(self, name, rate, capacity, max_wait):
+        from .models import RateLimitBucket
+
+        # reservations also run on scrap, refresh and executor threads, where Django never recycles connections
+        # at the end of a request: a connection the database closed (restart, idle timeout) is dropped and the
+        # reservation retried once on a new one
+        for attempt in range(2):
+            close_old_connections()
+            try:
+                with transaction.atomic():
+                    now = time.time()
+                    bucket, created = RateLimitBucket.objects.select_for_update().get_or_create(
+                        name=name, defaults={'tokens': capacity, 'updated': now}
+                    )
+                    wait, bucket.tokens = _reserve(bucket.tokens, bucket.updated, now, rate, capacity, max_wait)
+                    bucket.updated = now
+                    bucket.save(update_fields=['tokens', 'updated'])
+            except (InterfaceError, OperationalError):
+                close_old_connections()
+                if attempt:
+                    raise
+            else:
+                break
+        return wait
+
+
+class TokenBucket:
+
+    def __init__(self, backend, name, rate, capacity):
+        self.backend = backend
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+
+    def reserve(self, timeout):
+        """ Reserve a token and return the seconds until it is due, raise RateLimitTimeout if that is beyond timeout """
+        wait = self.backend.reserve(self.name, self.rate, self.capacity, timeout)
+        if wait is None:
+            raise RateLimitTimeout(f"No request budget for '{self.name}' within {timeout} seconds")
+        return wait
+
+    def acquire(self, timeout):
+        """ Block until a token is available """
+        wait = self.reserve(timeout)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, timeout):
+        """ Wait for a token without blocking the event loop """
+        # backends do blocking I/O (SQLite file, Django ORM)
+        wait = await sync_to_async(self.reserve, thread_sensitive=False)(timeout)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_bucket():
+    """ Token bucket configured by FBREF_RATE_LIMIT """
+    global _bucket
+    if _bucket is None:
+        with _bucket_lock:
+            if _bucket is None:
+                config = settings.FBREF_RATE_LIMIT
+                backend = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+                _bucket = TokenBucket(backend, 'fbref', config['RATE'], config['BURST'])
+    return _bucket
+
+
+_warm_bucket = None
+
+
+def get_warm_bucket():
+    """ Token bucket of the cache warmer: WARM_SHARE of the request rate, kept by the backend of the shared bucket """
+    global _warm_bucket
+    if _warm_bucket is None:
+        bucket = get_bucket()
+        with _bucket_lock:
+            if _warm_bucket is None:
+                _warm_bucket = TokenBucket(bucket.backend, 'fbref-warm', bucket.rate * settings.FBREF_RATE_LIMIT['WARM_SHARE'], 1)
+    return _warm_bucket
+
+
+def acquire_warm():
+    """
+        Wait for a token of the cache warmer's share, before fetching a page through the shared bucket as usual.
+        The warmer then never takes more than its share of the budget and interactive fetches keep the rest.
+    """
+    get_warm_bucket().acquire(float('inf'))
+
+
+def acquire(timeout=None):
+    if timeout is None:
+        timeout = settings.FBREF_RATE_LIMIT['TIMEOUT']
+    get_bucket().acquire(timeout)
+
+
+async def aacquire(timeout=None):
+    if timeout is None:
+        timeout = settings.FBREF_RATE_LIMIT['TIMEOUT']
+    bucket = await sync_to_async(get_bucket, thread_sensitive=False)()
+    await bucket.aacquire(timeout)
@@ -0,0 +1,278 @@
+"""
+    Column schema of the fbref stats tables and of the cleaned stats frames.
+
+    Every parsed table is checked against the registry of its table id once, right after parsing: columns fbref renamed
+    are mapped back to the names the charts use, and a table lacking a required column raises SchemaDriftError
+    instead of failing in the middle of cleaning or plotting.
+
+    Counts are stored as the smallest integer type holding a season of them, rates, averages and expected values
+    as float32, and the Season index as a categorical shared by all players, which keeps the frames of thousands
+    of players small in memory and in the stats cache.
+"""
+import numpy as np
+import pandas as pd
+
+
+# dtype of every column of each namespace of the stats frame (see utils.clean_player_stats)
+STATS_SCHEMA = {
+    'standard': {
+        'Age': 'int16',
+        'Playing Time - MP': 'int16',
+        'Playing Time - Starts': 'int16',
+        'Playing Time - Min': 'int16',
+        'Playing Time - 90s': 'float32',
+        'Performance - Gls': 'int16',
+        'Performance - Ast': 'int16',
+        'Performance - G-PK': 'int16',
+        'Performance - PK': 'int16',
+        'Performance - PKatt': 'int16',
+        'Performance - CrdY': 'int16',
+        'Performance - CrdR': 'int16',
+        'Expected - xG': 'float32',
+        'Expected - npxG': 'float32',
+        'Expected - xA': 'float32',
+        'Expected - npxG+xA': 'float32',
+    },
+    'shooting': {
+        'Age': 'int16',
+        '90s': 'float32',
+        'Standard - Gls': 'int16',
+        'Standard - Sh': 'int16',
+        'Standard - SoT': 'int16',
+        'Standard - SoT%': 'float32',
+        'Standard - Sh/90': 'float32',
+        'Standard - SoT/90': 'float32',
+        'Standard - G/Sh': 'float32',
+        'Standard - G/SoT': 'float32',
+        'Standard - Dist': 'float32',
+        'Standard - FK': 'int16',
+        'Standard - PK': 'int16',
+        'Standard - PKatt': 'int16',
+        'Expected - xG': 'float32',
+        'Expected - npxG': 'float32',
+        'Expected - npxG/Sh': 'float32',
+        'Expected - G-xG': 'float32',
+        'Expected - np:G-xG': 'float32',
+    },
+    'passing': {
+        'Age': 'int16',
+        '90s': 'float32',
+        'Total - Cmp': 'int16',
+        'Total - Att': 'int16',
+        'Total - Cmp%': 'float32',
+        'Total - TotDist': 'int32',
+        'Total - PrgDist': 'int32',
+        'Short - Cmp': 'int16',
+        'Short - Att': 'int16',
+        'Short - Cmp%': 'float32',
+        'Medium - Cmp': 'int16',
+        'Medium - Att': 'int16',
+        'Medium - Cmp%': 'float32',
+        'Long - Cmp': 'int16',
+        'Long - Att': 'int16',
+        'Long - Cmp%': 'float32',
+        'Ast': 'int16',
+        'xA': 'float32',
+        'A-xA': 'float32',
+        'KP': 'int16',
+        '1/3': 'int16',
+        'PPA': 'int16',
+        'CrsPA': 'int16',
+        'Prog': 'int16',
+    },
+    'defense': {
+        'Age': 'int16',
+        '90s': 'float32',
+        'Tackles - Tkl': 'int16',
+        'Tackles - TklW': 'int16',
+        'Tackles - Def 3rd': 'int16',
+        'Tackles - Mid 3rd': 'int16',
+        'Tackles - Att 3rd': 'int16',
+        'Vs Dribbles - Tkl': 'int16',
+        'Vs Dribbles - Att': 'int16',
+        'Vs Dribbles - Tkl%': 'float32',
+        'Vs Dribbles - Past': 'int16',
+        'Pressures - Press': 'int16',
+        'Pressures - Succ': 'int16',
+        'Pressures - %': 'float32',
+        'Pressures - Def 3rd': 'int16',
+        'Pressures - Mid 3rd': 'int16',
+        'Pressures - Att 3rd': 'int16',
+        'Blocks - Blocks': 'int16',
+        'Blocks - Sh': 'int16',
+        'Blocks - ShSv': 'int16',
+        'Blocks - Pass': 'int16',
+        'Int': 'int16',
+        'Tkl+Int': 'int16',
+        'Clr': 'int16',
+        'Err': 'int16',
+    },
+}
+
+# columns missing from the schema are kept as rates
+DEFAULT_DTYPE = 'float32'
+
+# namespace of every stats table in the player's stats frame
+STATS_NAMESPACES = {
+    'all_stats_standard': 'standard',
+    'all_stats_shooting': 'shooting',
+    'all_stats_passing': 'passing',
+    'all_stats_defense': 'defense',
+}
+
+# names fbref published a column under since, mapped to the name of the schema
+COLUMN_ALIASES = {
+    'standard': {
+        'Expected - xAG': 'Expected - xA',
+        'Expected - npxG+xAG': 'Expected - npxG+xA',
+    },
+    'passing': {
+        'xAG': 'xA',
+        'Expected - xAG': 'xA',
+        'A-xAG': 'A-xA',
+        'Expected - A-xAG': 'A-xA',
+        'PrgP': 'Prog',
+    },
+    'defense': {
+        'Challenges - Tkl': 'Vs Dribbles - Tkl',
+        'Challenges - Att': 'Vs Dribbles - Att',
+        'Challenges - Tkl%': 'Vs Dribbles - Tkl%',
+        'Challenges - Lost': 'Vs Dribbles - Past',
+    },
+}
+
+# columns fbref stopped publishing, the charts drawn from them are skipped when they are missing
+OPTIONAL_COLUMNS = {
+    'defense': {
+        'Pressures - Press', 'Pressures - Succ', 'Pressures - %',
+        'Pressures - Def 3rd', 'Pressures - Mid 3rd', 'Pressures - Att 3rd',
+        'Blocks - ShSv',
+    },
+}
+
+# columns of the stats tables that are not summed per season
+IGNORED_COLUMNS = {'Matches', 'Squad', 'Country', 'Comp', 'LgRank'}
+IGNORED_GROUPS = {'Per 90 Minutes'}
+
+
+class SchemaDriftError(Exception):
+    """ Raised when a parsed table lacks columns of its schema, fbref most likely changed the layout of its pages """
+
+    def __init__(self, table_id, missing, unexpected=()):
+        self.table_id = table_id
+        self.missing = sorted(missing)
+        self.unexpected = sorted(unexpected)
+        super().__init__(f"Table {table_id} is missing the columns {self.missing} (unexpected columns: {self.unexpected})")
+
+    def __reduce__(self):
+        # raised in the parse pool and pickled back to the web worker
+        return type(self), (self.table_id, self.missing, self.unexpected)
+
+
+class TableSchema:
+    """ Expected columns of an fbref stats table: {name: dtype}, the aliases of renamed ones and the optional ones """
+
+    def __init__(self, table_id, namespace, columns, aliases=None, optional=()):
+        self.table_id = table_id
+        self.namespace = namespace
+        self.columns = columns
+        self.aliases = aliases or {}
+        self.optional = set(optional)
+        self.required = {'Season'} | (set(columns) - self.optional)
+
+    def normalize(self, table):
+        """
+            Frame of the table's Season and schema columns, in the order of the table, renamed ones under their schema name.
+            Raises SchemaDriftError when a required column is missing. Only the header is looked at.
+        """
+        renames = {}
+        selected = []
+        unexpected = []
+        names = set(table.columns)
+        for col in table.columns:
+            name = self.aliases.get(col, col)
+            # a renamed column never shadows the column of its schema name
+            if name != col and name in names:
+                continue
+            if name == 'Season' or name in self.columns:
+                selected.append(col)
+                if name != col:
+                    renames[col] = name
+            elif col not in IGNORED_COLUMNS and col.split(' - ')[0] not in IGNORED_GROUPS:
+                unexpected.append(col)
+        missing = self.required.difference(renames.get(col, col) for col in selected)
+        if missing:
+            raise SchemaDriftError(self.table_id, missing, unexpected)
+        table = table[selected]
+        return table.rename(columns=renames) if renames else table
+
+
+# schema of every stats table, by table id
+TABLE_SCHEMAS = {
+    table_id: TableSchema(
+        table_id, namespace, STATS_SCHEMA[namespace], COLUMN_ALIASES.get(namespace), OPTIONAL_COLUMNS.get(namespace, ()),
+    )
+    for table_id, namespace in STATS_NAMESPACES.items()
+}
+
+
+def normalize_table(table_id, table):
+    """ Check a parsed table against the schema of its id and return it normalized, see TableSchema.normalize """
+    return TABLE_SCHEMAS[table_id].normalize(table)
+
+
+def get_column_dtype(column):
+    """ Schema dtype of a namespaced column of the stats frame, e.g. 'standard:Playing Time - MP' """
+    namespace, _, name = column.partition(':')
+    return np.dtype(STATS_SCHEMA.get(namespace, {}).get(name, DEFAULT_DTYPE))
+
+
+def to_schema_dtype(values, dtype):
+    """ Cast a float64 column to its schema dtype, widening it rather than overflowing or truncating """
+    if dtype.kind != 'i':
+        return values.astype(dtype)
+    if not np.all(np.isfinite(values)) or not np.all(values == np.round(values)):
+        return values.astype(DEFAULT_DTYPE)
+    for int_dtype in (dtype, np.dtype('int32'), np.dtype('int64')):
+        if int_dtype.itemsize < dtype.itemsize:
+            continue
+        info = np.iinfo(int_dtype)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(int_dtype)
+    return values
+
+
+# every season label of fbref in chronological order: '2017-2018' for leagues spanning two years, '2018' for calendar
+# year leagues. Shared by all stats frames, so a season index only holds 2 byte codes and frames of different players
+# concatenate without converting their seasons
+SEASON_DTYPE = pd.CategoricalDtype(
+    [label for year in range(1870, 2100) for label in (str(year), f'{year}-{year + 1}')],
+    ordered=True,
+)
+
+
+def get_season_index(seasons):
+    """ Season index with the shared SEASON_DTYPE, or categories of its own if fbref uses a label outside of it """
+    seasons = pd.Index(seasons)
+    if seasons.isin(SEASON_DTYPE.categories).all():
+        return pd.CategoricalIndex(seasons, dtype=SEASON_DTYPE, name=seasons.name)
+    return pd.CategoricalIndex(seasons, categories=sorted(set(seasons)), ordered=True, name=seasons.name)
+
+
+def compact_stats(stats):
+    """ Stats frame with the dtypes of STATS_SCHEMA and a categorical Season index """
+    columns = {col: to_schema_dtype(stats[col].to_numpy(), get_column_dtype(col)) for col in stats.columns}
+    return pd.DataFrame(columns, index=get_season_index(stats.index))
+
+
+def memory_usage(stats):
+    """
+        Bytes held by a stats frame: {'index': ..., 'columns': ..., 'total': ...}.
+        The categories of SEASON_DTYPE are shared by every frame and not counted.
+    """
+    columns = int(stats.memory_usage(index=False, deep=True).sum())
+    if isinstance(stats.index, pd.CategoricalIndex) and stats.index.dtype == SEASON_DTYPE:
+        index = stats.index.codes.nbytes
+    else:
+        index = int(stats.index.memory_usage(deep=True))
+    return {'index': index, 'columns': columns, 'total': index + columns}
@@ -0,0 +1,76 @@
+// colors of the bars in the order they are drawn, the default colors of the charts drawn by the server (matplotlib)
+const BAR_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'];
+
+// charts are drawn once they are about to be scrolled into view, like the lazy images of the server-drawn page
+const chart_observer = new IntersectionObserver((entries, observer) => {
+    entries.filter((entry) => entry.isIntersecting).forEach((entry) => {
+        observer.unobserve(entry.target);
+        draw_chart(entry.target, entry.target.chart);
+    });
+}, {rootMargin: '200px'});
+
+function draw_chart(canvas, chart) {
+    // the bars of a player share a stack at the offset of the player: a stacked bar sits on the bars drawn before it,
+    // the other charts have a single bar per player
+    const datasets = chart.bars.map((bar, i) => ({
+        label: bar.label,
+        data: bar.values,
+        stack: `${bar.offset}`,
+        backgroundColor: BAR_COLORS[i % BAR_COLORS.length],
+    }));
+
+    const y_ticks = {font: {size: 12}};
+    if (chart.yticks && chart.yticks.length > 1) {
+        y_ticks.stepSize = chart.yticks[1] - chart.yticks[0];
+    }
+
+    new Chart(canvas, {
+        type: 'bar',
+        data: {labels: chart.seasons, datasets: datasets},
+        options: {
+            animation: false,
+            aspectRatio: 10 / 6,
+            plugins: {
+                title: {display: true, text: chart.title, font: {size: 18}},
+            },
+            scales: {
+                x: {stacked: true, title: {display: true, text: 'Seasons'}, ticks: {maxRotation: 30, minRotation: 30, font: {size: 12}}},
+                y: {stacked: true, title: {display: true, text: chart.ylabel, font: {size: 12}}, ticks: y_ticks},
+            },
+        },
+    });
+}
+
+function load_charts(section) {
+    fetch(section.dataset.chartsUrl)
+    .then((response) => response.ok ? response.json() : Promise.reject(response))
+    .then((data) => data.charts.forEach((chart) => {
+        const chart_col = document.createElement('div');
+        chart_col.className = 'col-6 p-3';
+        const canvas = document.createElement('canvas');
+        canvas.className = 'img-thumbnail';
+        canvas.setAttribute('aria-label', chart.title);
+        canvas.chart = chart;
+        chart_col.appendChild(canvas);
+        section.appendChild(chart_col);
+        chart_observer.observe(canvas);
+    }))
+    .catch((response) => {
+        const message = document.createElement('p');
+        message.textContent = response.status === 503 ? 'Too many comparisons in progress, please try again in a moment.' : 'The stats of these players could not be loaded.';
+        section.appendChild(message);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    // Chart.js did not load (blocked, or its integrity check failed): say so instead of leaving the sections empty
+    if (typeof Chart === 'undefined') {
+        document.querySelectorAll('[data-charts-url]').forEach((section) => {
+            const message = document.createElement('p');
+            message.textContent = 'The charts could not be drawn in this browser, compare the players with the images instead.';
+            section.appendChild(message);
+        });
+        return;
+    }
+    document.querySelectorAll('[data-charts-url]').forEach(load_charts);
+});
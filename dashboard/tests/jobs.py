@@ -0,0 +1,14 @@
+"""
+    Jobs of the worker pool tests. Spawned workers import the module of a job to unpickle it, this one imports
+    neither Django models nor views so it loads outside of a configured project.
+"""
+import os
+import time
+
+
+def slow_render(chart):
+    time.sleep(2)
+
+
+def dying_render(chart):
+    os._exit(1)
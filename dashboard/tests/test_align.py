@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from dashboard.align import align_seasons
+from dashboard.schema import compact_stats
+
+
+def make_stats(rows):
+    """ Stats frame of {season: (MP, Starts)} """
+    return pd.DataFrame(
+        list(rows.values()),
+        index=pd.Index(list(rows), name='Season'),
+        columns=['standard:Playing Time - MP', 'standard:Playing Time - Starts'],
+    )
+
+
+class AlignSeasonsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.stats_A = make_stats({'2016-2017': (10, 5), '2017-2018': (20, 15), '2018-2019': (30, 25)})
+        self.stats_B = make_stats({'2017-2018': (12, 2), '2019-2020': (8, 8)})
+
+    def test_seasons_of_one_player_only_are_nan_and_masked(self):
+        alignment = align_seasons(self.stats_A, self.stats_B)
+        self.assertEqual(list(alignment.seasons), ['2016-2017', '2017-2018', '2018-2019', '2019-2020'])
+        self.assertEqual(alignment.mask_A.tolist(), [True, True, True, False])
+        self.assertEqual(alignment.mask_B.tolist(), [False, True, False, True])
+        mp_A, mp_B = alignment.values_A[:, 0], alignment.values_B[:, 0]
+        np.testing.assert_array_equal(mp_A, [10, 20, 30, np.nan])
+        np.testing.assert_array_equal(mp_B, [np.nan, 12, np.nan, 8])
+
+    def test_since_latest_debut(self):
+        alignment = align_seasons(self.stats_A, self.stats_B).since_latest_debut()
+        self.assertEqual(list(alignment.seasons), ['2017-2018', '2018-2019', '2019-2020'])
+        self.assertEqual(alignment.mask_A.tolist(), [True, True, False])
+
+    def test_last_n_seasons(self):
+        alignment = align_seasons(self.stats_A, self.stats_B)
+        last = alignment.last(2)
+        self.assertEqual(list(last.seasons), ['2018-2019', '2019-2020'])
+        np.testing.assert_array_equal(last.values_B[:, 1], [np.nan, 8])
+        # more seasons than there are keeps them all
+        self.assertEqual(len(alignment.last(10)), 4)
+
+    def test_calendar_year_and_split_seasons_sort_chronologically(self):
+        stats_A = make_stats({'2017-2018': (20, 15), '2018-2019': (30, 25)})
+        stats_B = make_stats({'2018': (12, 2), '2019': (8, 8)})
+        alignment = align_seasons(stats_A, stats_B)
+        self.assertEqual(list(alignment.seasons), ['2017-2018', '2018', '2018-2019', '2019'])
+        self.assertEqual(alignment.mask_B.tolist(), [False, True, False, True])
+
+    def test_compacted_frames_align_like_plain_ones(self):
+        plain = align_seasons(self.stats_A, self.stats_B)
+        compact = align_seasons(compact_stats(self.stats_A), compact_stats(self.stats_B))
+        self.assertEqual(list(compact.seasons), list(plain.seasons))
+        np.testing.assert_array_equal(compact.values_A, plain.values_A)
+        np.testing.assert_array_equal(compact.mask_B, plain.mask_B)
+
+    def test_tables_strip_the_prefix(self):
+        table_A, table_B = align_seasons(self.stats_A, self.stats_B).tables('standard:Playing Time - ')
+        self.assertEqual(table_A.columns, ['MP', 'Starts'])
+        table_B['Non-Starter'] = table_B['MP'] - table_B['Starts']
+        np.testing.assert_array_equal(table_B['Non-Starter'], [np.nan, 10, np.nan, 0])
+        self.assertEqual(table_B.columns, ['MP', 'Starts', 'Non-Starter'])
@@ -0,0 +1,236 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from dashboard import cache
+from dashboard.cache import (
+    DiskCache, MemoryCache, TieredCache, cache_stats, decode_stats, encode_stats, frames_from_bytes, frames_to_bytes,
+    get_cached_stats, get_chart_key,
+)
+from dashboard.schema import SEASON_DTYPE, compact_stats
+
+
+class MemoryCacheTests(SimpleTestCase):
+
+    def test_byte_accounting(self):
+        cache = MemoryCache(100)
+        cache.set('a', b'x' * 10)
+        cache.set('b', b'x' * 20)
+        self.assertEqual(cache.size, 30)
+        # replacing an entry only counts its new value
+        cache.set('a', b'x' * 5)
+        self.assertEqual(cache.size, 25)
+        cache.delete('b')
+        self.assertEqual(cache.size, 5)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+
+    def test_lru_evicts_the_least_recently_used(self):
+        cache = MemoryCache(30, 'lru')
+        for key in 'abc':
+            cache.set(key, b'x' * 10)
+        cache.get('a')
+        cache.set('d', b'x' * 10)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([key for key in 'acd' if cache.get(key) is not None], ['a', 'c', 'd'])
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertEqual(cache.size, 30)
+
+    def test_lfu_evicts_the_least_frequently_used(self):
+        cache = MemoryCache(30, 'lfu')
+        for key in 'abc':
+            cache.set(key, b'x' * 10)
+        for key in 'aabbc':
+            cache.get(key)
+        # c is the least used, a and b were used as often but b more recently
+        cache.set('d', b'x' * 10)
+        self.assertIsNone(cache.get('c'))
+        cache.set('e', b'x' * 10)
+        self.assertIsNone(cache.get('d'))
+        self.assertIsNotNone(cache.get('a'))
+
+    def test_value_larger_than_the_budget_is_not_kept(self):
+        cache = MemoryCache(10)
+        cache.set('a', b'x' * 5)
+        cache.set('b', b'x' * 11)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.size, 5)
+
+    def test_hit_and_miss_counters(self):
+        cache = MemoryCache(100)
+        cache.set('a', b'x')
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual(cache.stats.as_dict(), {'hits': 1, 'misses': 1, 'evictions': 0})
+
+
+class DiskCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_entries_keep_their_value_and_creation_time(self):
+        cache = DiskCache(self.directory)
+        cache.set('a', b'\x00value\n', created=1234.5)
+        entry = DiskCache(self.directory).get('a')
+        self.assertEqual(entry.value, b'\x00value\n')
+        self.assertEqual(entry.created, 1234.5)
+        self.assertTrue(cache.delete('a'))
+        self.assertIsNone(cache.get('a'))
+
+    def test_byte_accounting_counts_headers(self):
+        cache = DiskCache(self.directory, max_bytes=10 ** 6)
+        cache.set('a', b'x' * 100)
+        cache.set('b', b'x' * 100)
+        on_disk = sum(os.path.getsize(os.path.join(root, name)) for root, dirs, names in os.walk(self.directory) for name in names)
+        self.assertEqual(cache.size, on_disk)
+        # a new process measures the directory
+        self.assertEqual(DiskCache(self.directory, max_bytes=10 ** 6).size, on_disk)
+        cache.delete('a')
+        self.assertLess(cache.size, on_disk)
+
+    def set_at(self, cache, key, value, accessed):
+        cache.set(key, value)
+        os.utime(cache._path(key), (accessed, accessed))
+
+    def test_lru_evicts_the_least_recently_accessed_down_to_90_percent(self):
+        entry_size = len(b'x' * 100) + len(b'{"key": "a", "created": 0.0}\n') + 20
+        cache = DiskCache(self.directory, max_bytes=entry_size * 3, policy='lru')
+        now = time.time()
+        for offset, key in enumerate('abc'):
+            self.set_at(cache, key, b'x' * 100, now - 100 + offset)
+        cache.set('d', b'x' * 100)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('d'))
+        self.assertLessEqual(cache.size, cache.max_bytes * 0.9)
+
+    def test_lfu_evicts_the_least_frequently_read(self):
+        cache = DiskCache(self.directory, max_bytes=500, policy='lfu')
+        now = time.time()
+        for offset, key in enumerate('abc'):
+            self.set_at(cache, key, b'x' * 100, now - 100 + offset)
+        for key in 'aab':
+            cache.get(key)
+        cache.set('d', b'x' * 100)
+        self.assertIsNone(cache.get('c'))
+        self.assertIsNotNone(cache.get('a'))
+
+    def test_the_entry_just_written_is_never_evicted(self):
+        cache = DiskCache(self.directory, max_bytes=50)
+        cache.set('a', b'x' * 100)
+        self.assertIsNotNone(cache.get('a'))
+
+
+class TieredCacheTests(SimpleTestCase):
+
+    def test_disk_hits_are_promoted_to_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk = DiskCache(directory)
+            disk.set('a', b'value', created=1234.5)
+            cache = TieredCache(MemoryCache(100), disk)
+            self.assertEqual(cache.get('a').value, b'value')
+            self.assertEqual(cache.memory.get('a').created, 1234.5)
+            self.assertTrue(cache.delete('a'))
+            self.assertIsNone(cache.get('a'))
+
+
+def make_stats():
+    return compact_stats(pd.DataFrame(
+        {
+            'standard:Playing Time - MP': [30.0, 12.0],
+            'standard:Playing Time - Min': [2345.0, 100000.0],
+            'standard:Expected - xG': [np.nan, 4.2],
+        },
+        index=pd.Index(['2017-2018', '2018'], name='Season'),
+    ))
+
+
+class FramesEncodingTests(SimpleTestCase):
+
+    def test_columns_keep_their_values_and_dtypes(self):
+        frame = pd.DataFrame({
+            'a': np.array([1, 2, 3], dtype='int16'),
+            'b': np.array([1.5, np.nan, 3.0], dtype='float32'),
+            'c': np.array([10, 20, 30], dtype='int16'),
+            'd': np.array([2 ** 40, 0, -1], dtype='int64'),
+            'e': ['Liverpool', np.nan, 'Southampton'],
+        }, index=pd.Index(['2016-2017', '2017-2018', '2018-2019'], name='Season'))
+        decoded = frames_from_bytes(frames_to_bytes({'frame': frame}))['frame']
+        pd.testing.assert_frame_equal(decoded, frame)
+        self.assertEqual(list(decoded.columns), ['a', 'b', 'c', 'd', 'e'])
+
+    def test_several_frames(self):
+        frames = {'first': pd.DataFrame({'a': [1.0]}), 'second': pd.DataFrame({'a': np.array([2], dtype='int32')})}
+        decoded = frames_from_bytes(frames_to_bytes(frames))
+        for name, frame in frames.items():
+            pd.testing.assert_frame_equal(decoded[name], frame, check_index_type=False)
+
+    def test_empty_frame(self):
+        frame = pd.DataFrame({'a': np.array([], dtype='int16'), 'b': np.array([], dtype='float32')},
+                             index=pd.Index([], name='Season', dtype=object))
+        decoded = frames_from_bytes(frames_to_bytes({'frame': frame}))['frame']
+        self.assertEqual(len(decoded), 0)
+        self.assertEqual(list(decoded.columns), ['a', 'b'])
+        self.assertEqual(list(decoded.dtypes), [np.dtype('int16'), np.dtype('float32')])
+
+    def test_stats_get_back_their_categorical_seasons(self):
+        stats = make_stats()
+        decoded = decode_stats(encode_stats(stats))
+        pd.testing.assert_frame_equal(decoded, stats)
+        self.assertEqual(decoded.index.dtype, SEASON_DTYPE)
+        # the minutes did not fit int16 and were widened
+        self.assertEqual(decoded['standard:Playing Time - Min'].dtype, np.dtype('int32'))
+
+
+class StatsCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(cache, '_stats_cache', TieredCache(MemoryCache(10 ** 6), DiskCache(directory.name)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stats_are_cached_per_version_of_the_page(self):
+        stats = make_stats()
+        cache_stats('6adbc307', '<html>v1</html>', stats)
+        pd.testing.assert_frame_equal(get_cached_stats('6adbc307', '<html>v1</html>'), stats)
+        self.assertIsNone(get_cached_stats('6adbc307', '<html>v2</html>'))
+        self.assertIsNone(get_cached_stats('c35e99d8', '<html>v1</html>'))
+
+    def test_encoded_stats_are_cached_as_is(self):
+        cache_stats('6adbc307', '<html></html>', encode_stats(make_stats()))
+        pd.testing.assert_frame_equal(get_cached_stats('6adbc307', '<html></html>'), make_stats())
+
+    def test_bumped_version_misses_the_cache(self):
+        cache_stats('6adbc307', '<html></html>', make_stats())
+        with mock.patch.object(cache, 'STATS_CACHE_VERSION', cache.STATS_CACHE_VERSION + 1):
+            self.assertIsNone(get_cached_stats('6adbc307', '<html></html>'))
+
+
+class ChartKeyTests(SimpleTestCase):
+
+    def key(self, player_ids=('6adbc307', 'c35e99d8'), metric='standard-xg', last_few_seasons=None, style='1', digest='abc'):
+        return get_chart_key(player_ids, metric, last_few_seasons, style, digest)
+
+    def test_players_in_any_order_share_the_key(self):
+        self.assertEqual(self.key(('6adbc307', 'c35e99d8')), self.key(('c35e99d8', '6adbc307')))
+
+    def test_key_changes_with_each_part(self):
+        keys = {
+            self.key(),
+            self.key(player_ids=('6adbc307', 'e342ad68')),
+            self.key(metric='standard-npxg'),
+            self.key(last_few_seasons=3),
+            self.key(style='2'),
+            self.key(digest='abd'),
+        }
+        self.assertEqual(len(keys), 6)
@@ -0,0 +1,166 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from dashboard import fetch
+
+
+TABLE = '<div id="all_stats_standard"><table><tbody><tr><th data-stat="year_id">2017-2018</th></tr></tbody></table></div>'
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # the player page goes on well after its stats tables
+    body = ('<html><body>' + TABLE + '<p>match logs</p>' * 20000 + '</body></html>').encode('utf-8')
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(FBREF_TRANSPORT=dict(settings.FBREF_TRANSPORT, MODE='live'))
+class FetchTablesConnectionTests(SimpleTestCase):
+    """ The rest of a page is drained up to DRAIN_MAX_BYTES so its connection is reused by the next request """
+
+    def setUp(self):
+        self.connections = []
+        connections = self.connections
+
+        class Server(ThreadingHTTPServer):
+            def process_request(self, request, client_address):
+                connections.append(client_address)
+                super().process_request(request, client_address)
+
+            def handle_error(self, request, client_address):
+                # the client closing a connection it did not read to the end is what some tests expect
+                pass
+
+        server = Server(('127.0.0.1', 0), PageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f'http://127.0.0.1:{server.server_port}/en/players/6adbc307/Jack-Stephens'
+
+        for patcher in (
+            mock.patch.object(fetch, '_session', None),
+            mock.patch.object(fetch, '_async_clients', fetch.weakref.WeakKeyDictionary()),
+            mock.patch('dashboard.ratelimit.acquire'),
+            mock.patch('dashboard.ratelimit.aacquire', new=mock.AsyncMock()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fetch_twice(self, drain_max_bytes):
+        with override_settings(FBREF_HTTP=dict(settings.FBREF_HTTP, DRAIN_MAX_BYTES=drain_max_bytes)):
+            for _ in range(2):
+                response, text, tables = fetch.fetch_tables(self.url, ('all_stats_standard',))
+                self.assertEqual(list(tables), ['all_stats_standard'])
+                self.assertLess(len(text), len(PageHandler.body))
+
+    def test_drained_connection_is_reused(self):
+        self.fetch_twice(len(PageHandler.body))
+        self.assertEqual(len(self.connections), 1)
+
+    def test_connection_is_closed_when_the_rest_is_too_large(self):
+        self.fetch_twice(0)
+        self.assertEqual(len(self.connections), 2)
+
+    def test_page_without_the_tables_is_read_to_the_end(self):
+        body = b'<html><body>' + b'<p>no stats</p>' * 10000 + b'</body></html>'
+        with mock.patch.object(PageHandler, 'body', body):
+            response, text, tables = fetch.fetch_tables(self.url, ('all_stats_standard',))
+        self.assertEqual(tables, {})
+        self.assertEqual(text, body.decode('utf-8'))
+
+    def test_async_drained_connection_is_reused(self):
+        async def fetch_twice():
+            for _ in range(2):
+                response, text, tables = await fetch.afetch_tables(self.url, ('all_stats_standard',))
+                self.assertEqual(list(tables), ['all_stats_standard'])
+
+        with override_settings(FBREF_HTTP=dict(settings.FBREF_HTTP, DRAIN_MAX_BYTES=len(PageHandler.body))):
+            async_to_sync(fetch_twice)()
+        self.assertEqual(len(self.connections), 1)
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """ Answers with the next (status, Retry-After) of the server's responses """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests += 1
+        status, retry_after = self.server.responses.pop(0)
+        body = b'<html></html>'
+        self.send_response(status)
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(
+    FBREF_TRANSPORT=dict(settings.FBREF_TRANSPORT, MODE='live'),
+    FBREF_HTTP=dict(settings.FBREF_HTTP, RETRIES=2, BACKOFF_FACTOR=0.01, READ_TIMEOUT=2),
+)
+class RetryTests(SimpleTestCase):
+    """ Every attempt takes a token, 429 is never retried and a long Retry-After is not waited for """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StatusHandler)
+        self.server.requests = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/en/players/6adbc307/Jack-Stephens'
+
+        self.acquire = mock.patch('dashboard.ratelimit.acquire').start()
+        self.aacquire = mock.patch('dashboard.ratelimit.aacquire', new=mock.AsyncMock()).start()
+        for patcher in (
+            mock.patch.object(fetch, '_session', None),
+            mock.patch.object(fetch, '_async_clients', fetch.weakref.WeakKeyDictionary()),
+        ):
+            patcher.start()
+        self.addCleanup(mock.patch.stopall)
+
+    def fetch_all(self, responses):
+        """ status of fetch, fetch_tables, afetch and afetch_tables each answered with the responses """
+        statuses = []
+        for get in (fetch.fetch, lambda url: fetch.fetch_tables(url, ('all_stats_standard',))[0],
+                    async_to_sync(fetch.afetch), lambda url: async_to_sync(fetch.afetch_tables)(url, ('all_stats_standard',))[0]):
+            self.server.responses = list(responses)
+            statuses.append(get(self.url).status_code)
+        return statuses
+
+    def test_server_errors_are_retried_with_a_token_per_attempt(self):
+        self.assertEqual(self.fetch_all([(503, None), (503, 0), (200, None)]), [200] * 4)
+        self.assertEqual(self.server.requests, 12)
+        self.assertEqual(self.acquire.call_count + self.aacquire.await_count, 12)
+
+    def test_too_many_requests_is_not_retried(self):
+        self.assertEqual(self.fetch_all([(429, 4)]), [429] * 4)
+        self.assertEqual(self.server.requests, 4)
+
+    def test_retry_after_longer_than_the_read_timeout_is_not_waited_for(self):
+        start = time.monotonic()
+        self.assertEqual(self.fetch_all([(503, 3600)]), [503] * 4)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(self.server.requests, 4)
+
+    def test_retries_stop_after_the_last_attempt(self):
+        self.assertEqual(self.fetch_all([(500, None)] * 3), [500] * 4)
+        self.assertEqual(self.server.requests, 12)
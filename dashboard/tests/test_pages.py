@@ -0,0 +1,73 @@
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from dashboard import utils
+from dashboard.cache import Page, get_page_ttl
+from dashboard.fetch import FetchError
+
+
+URL = 'https://fbref.com/en/players/6adbc307/Jack-Stephens'
+
+
+def get_stale_page(expired_for):
+    return Page(URL, '<html>stale</html>', time.time() - get_page_ttl(URL) - expired_for)
+
+
+@override_settings(FBREF_CACHE_STALE=dict(settings.FBREF_CACHE_STALE, WHILE_REVALIDATE=60, IF_ERROR=3600, REVALIDATE_TIMEOUT=0.1))
+class StalePageTests(SimpleTestCase):
+    """ Pages expired for longer than WHILE_REVALIDATE are fetched again, but served stale when fbref is slow or failing """
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow_download(self, url, use_cache=True):
+        self.release.wait(5)
+        return Page(url, '<html>fresh</html>', time.time())
+
+    def test_fresh_page_when_fbref_answers_in_time(self):
+        fresh = Page(URL, '<html>fresh</html>', time.time())
+        with mock.patch.object(utils, 'get_cached_page', return_value=get_stale_page(600)), \
+                mock.patch.object(utils, 'download_page', return_value=fresh):
+            self.assertIs(utils.get_page(URL), fresh)
+
+    def test_stale_page_when_fbref_is_slow(self):
+        stale = get_stale_page(600)
+        with mock.patch.object(utils, 'get_cached_page', return_value=stale), \
+                mock.patch.object(utils, 'download_page', side_effect=self.slow_download), \
+                self.assertLogs('dashboard.utils', 'WARNING'):
+            start = time.monotonic()
+            self.assertIs(utils.get_page(URL), stale)
+            self.assertLess(time.monotonic() - start, 1)
+            # the download goes on in the background
+            refresh = utils._refreshing[URL]
+            self.release.set()
+            self.assertEqual(refresh.result(5).text, '<html>fresh</html>')
+
+    def test_stale_page_when_fbref_fails(self):
+        stale = get_stale_page(600)
+        with mock.patch.object(utils, 'get_cached_page', return_value=stale), \
+                mock.patch.object(utils, 'download_page', side_effect=FetchError(URL, 500)), \
+                self.assertLogs('dashboard.utils', 'WARNING'):
+            self.assertIs(utils.get_page(URL), stale)
+
+    def test_async_stale_page_when_fbref_is_slow(self):
+        stale = get_stale_page(600)
+        with mock.patch.object(utils, 'get_cached_page', return_value=stale), \
+                mock.patch.object(utils, 'download_page', side_effect=self.slow_download), \
+                self.assertLogs('dashboard.utils', 'WARNING'):
+            self.assertIs(async_to_sync(utils.aget_page)(URL), stale)
+            refresh = utils._refreshing[URL]
+            self.release.set()
+            self.assertEqual(refresh.result(5).text, '<html>fresh</html>')
+
+    def test_page_too_old_to_serve_is_downloaded(self):
+        with mock.patch.object(utils, 'get_cached_page', return_value=get_stale_page(7200)), \
+                mock.patch.object(utils, 'download_page', side_effect=FetchError(URL, 500)):
+            with self.assertRaises(FetchError):
+                utils.get_page(URL)
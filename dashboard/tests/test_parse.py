@@ -0,0 +1,123 @@
+import lxml.html
+import numpy as np
+from django.test import SimpleTestCase
+
+from dashboard.parse import TableStreamParser, extract_tables, get_columns, table_to_frame, to_array
+
+
+TABLE = """
+<table id="stats_standard_dom_lg">
+  <thead>
+    <tr class="over_header">
+      <th colspan="2" data-stat=""></th>
+      <th colspan="2" data-stat="header_playing">Playing Time</th>
+      <th colspan="1" data-stat=""></th>
+    </tr>
+    <tr>
+      <th data-stat="year_id">Season</th>
+      <th data-stat="age">Age</th>
+      <th data-stat="games">MP</th>
+      <th data-stat="minutes">Min</th>
+      <th data-stat="xg">xG</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr><th data-stat="year_id">2017-2018</th><td data-stat="age">22</td><td data-stat="games">30</td><td data-stat="minutes">2,345</td><td data-stat="xg"></td></tr>
+    <tr class="thead"><th data-stat="year_id">Season</th><td data-stat="age">Age</td><td data-stat="games">MP</td><td data-stat="minutes">Min</td><td data-stat="xg">xG</td></tr>
+    <tr class="spacer partial_table"><th data-stat="year_id"></th><td data-stat="age"></td><td data-stat="games"></td><td data-stat="minutes"></td><td data-stat="xg"></td></tr>
+    <tr><th data-stat="year_id">2018-2019</th><td data-stat="minutes">1,001</td><td data-stat="xg">4.2</td><td data-stat="age">23</td><td data-stat="games">12</td></tr>
+  </tbody>
+  <tfoot><tr><th data-stat="year_id">2 Seasons</th><td data-stat="age"></td><td data-stat="games">42</td><td data-stat="minutes">3,346</td><td data-stat="xg">4.2</td></tr></tfoot>
+</table>
+"""
+
+
+def parse_table(html=TABLE):
+    return lxml.html.fragment_fromstring(html)
+
+
+class ToArrayTests(SimpleTestCase):
+
+    def test_counts_with_thousands_separators_are_int(self):
+        values = to_array(['1,234', '56'])
+        self.assertEqual(values.dtype, np.int64)
+        self.assertEqual(values.tolist(), [1234, 56])
+
+    def test_empty_cells_make_the_column_float(self):
+        values = to_array(['3', ''])
+        self.assertEqual(values.dtype, np.float64)
+        self.assertEqual(values[0], 3.0)
+        self.assertTrue(np.isnan(values[1]))
+
+    def test_decimals_are_float(self):
+        self.assertEqual(to_array(['1.5', '2']).dtype, np.float64)
+
+    def test_text_stays_object_with_empty_cells_as_nan(self):
+        values = to_array(['Liverpool', ''])
+        self.assertEqual(values.dtype, object)
+        self.assertEqual(values[0], 'Liverpool')
+        self.assertTrue(np.isnan(values[1]))
+
+
+class GetColumnsTests(SimpleTestCase):
+
+    def test_labels_are_prefixed_by_their_group(self):
+        self.assertEqual(get_columns(parse_table()), [
+            ('year_id', 'Season'),
+            ('age', 'Age'),
+            ('games', 'Playing Time - MP'),
+            ('minutes', 'Playing Time - Min'),
+            ('xg', 'xG'),
+        ])
+
+    def test_table_without_over_header(self):
+        table = parse_table('<table><thead><tr><th data-stat="year_id">Season</th><th data-stat="goals">Gls</th></tr></thead></table>')
+        self.assertEqual(get_columns(table), [('year_id', 'Season'), ('goals', 'Gls')])
+
+
+class TableToFrameTests(SimpleTestCase):
+
+    def test_data_rows_only(self):
+        frame = table_to_frame(parse_table())
+        self.assertEqual(list(frame.columns), ['Season', 'Age', 'Playing Time - MP', 'Playing Time - Min', 'xG'])
+        # the repeated header and the spacer rows are skipped
+        self.assertEqual(frame['Season'].tolist(), ['2017-2018', '2018-2019'])
+
+    def test_cells_are_read_by_data_stat_not_position(self):
+        frame = table_to_frame(parse_table())
+        self.assertEqual(frame['Age'].tolist(), [22, 23])
+        self.assertEqual(frame['Playing Time - Min'].tolist(), [2345, 1001])
+        self.assertEqual(frame['Playing Time - Min'].dtype, np.int64)
+
+    def test_empty_cells_are_nan(self):
+        xg = table_to_frame(parse_table())['xG']
+        self.assertEqual(xg.dtype, np.float64)
+        self.assertTrue(np.isnan(xg[0]))
+        self.assertEqual(xg[1], 4.2)
+
+
+class ExtractTablesTests(SimpleTestCase):
+
+    PAGE = (
+        '<html><body>'
+        f'<div id="all_stats_standard"><div>{TABLE}</div></div>'
+        f'<div id="all_stats_shooting"><!--{TABLE.replace("stats_standard", "stats_shooting")}--></div>'
+        '<div id="all_other"><table><tbody><tr><td>1</td></tr></tbody></table></div>'
+        '</body></html>'
+    )
+
+    def test_tables_in_the_tree_and_in_comments(self):
+        tables = extract_tables(self.PAGE, ('all_stats_standard', 'all_stats_shooting'))
+        self.assertEqual(sorted(tables), ['all_stats_shooting', 'all_stats_standard'])
+        self.assertEqual(tables['all_stats_shooting'].get('id'), 'stats_shooting_dom_lg')
+        # career totals are dropped
+        self.assertIsNone(tables['all_stats_standard'].find('tfoot'))
+
+    def test_stream_parser_matches_extract_tables(self):
+        parser = TableStreamParser(('all_stats_standard', 'all_stats_shooting'))
+        for start in range(0, len(self.PAGE), 100):
+            parser.feed(self.PAGE[start:start + 100])
+        tables = parser.close()
+        self.assertTrue(parser.done)
+        for table_id, table in extract_tables(self.PAGE, ('all_stats_standard', 'all_stats_shooting')).items():
+            self.assertTrue(table_to_frame(tables[table_id]).equals(table_to_frame(table)))
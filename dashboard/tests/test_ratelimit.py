@@ -0,0 +1,127 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dashboard import ratelimit
+from dashboard.models import RateLimitBucket
+from dashboard.ratelimit import DatabaseBackend, MemoryBackend, RateLimitTimeout, SQLiteBackend, TokenBucket, _reserve
+
+
+class ReserveTests(SimpleTestCase):
+
+    def test_burst_is_served_right_away(self):
+        tokens, updated = 3.0, 100.0
+        for expected_tokens in (2.0, 1.0, 0.0):
+            wait, tokens = _reserve(tokens, updated, 100.0, rate=1 / 3, capacity=3, max_wait=20)
+            self.assertEqual(wait, 0.0)
+            self.assertAlmostEqual(tokens, expected_tokens)
+
+    def test_callers_beyond_the_burst_queue_in_arrival_order(self):
+        # one token every 3 seconds: the 1st queued caller waits 3 seconds, the 2nd one 6 seconds
+        wait, tokens = _reserve(0.0, 100.0, 100.0, rate=1 / 3, capacity=3, max_wait=20)
+        self.assertAlmostEqual(wait, 3.0)
+        self.assertAlmostEqual(tokens, -1.0)
+        wait, tokens = _reserve(tokens, 100.0, 100.0, rate=1 / 3, capacity=3, max_wait=20)
+        self.assertAlmostEqual(wait, 6.0)
+        self.assertAlmostEqual(tokens, -2.0)
+
+    def test_refill_is_capped_by_capacity(self):
+        wait, tokens = _reserve(0.0, 0.0, 1000.0, rate=1 / 3, capacity=3, max_wait=20)
+        self.assertEqual(wait, 0.0)
+        self.assertAlmostEqual(tokens, 2.0)
+
+    def test_partial_refill_shortens_the_wait(self):
+        wait, tokens = _reserve(0.0, 100.0, 101.5, rate=1 / 3, capacity=3, max_wait=20)
+        self.assertAlmostEqual(wait, 1.5)
+        self.assertAlmostEqual(tokens, -0.5)
+
+    def test_caller_past_the_deadline_reserves_nothing(self):
+        # 6 callers queued already: the next token is due in 21 seconds
+        wait, tokens = _reserve(-6.0, 100.0, 100.0, rate=1 / 3, capacity=3, max_wait=20)
+        self.assertIsNone(wait)
+        self.assertAlmostEqual(tokens, -6.0)
+
+
+class MemoryBackendTests(SimpleTestCase):
+
+    def test_buckets_are_kept_apart_by_name(self):
+        backend = MemoryBackend()
+        with mock.patch('dashboard.ratelimit.time.time', return_value=100.0):
+            self.assertEqual(backend.reserve('a', 1 / 3, 1, 20), 0.0)
+            self.assertAlmostEqual(backend.reserve('a', 1 / 3, 1, 20), 3.0)
+            self.assertEqual(backend.reserve('b', 1 / 3, 1, 20), 0.0)
+
+
+class SQLiteBackendTests(SimpleTestCase):
+
+    def test_bucket_is_shared_between_backends_of_one_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ratelimit.sqlite3')
+            first, second = SQLiteBackend(path), SQLiteBackend(path)
+            with mock.patch('dashboard.ratelimit.time.time', return_value=100.0):
+                self.assertEqual(first.reserve('fbref', 1 / 3, 1, 20), 0.0)
+                self.assertAlmostEqual(second.reserve('fbref', 1 / 3, 1, 20), 3.0)
+                self.assertIsNone(first.reserve('fbref', 1 / 3, 1, 5))
+
+
+class DatabaseBackendTests(TestCase):
+
+    def test_reservations_update_the_bucket_row(self):
+        backend = DatabaseBackend()
+        with mock.patch('dashboard.ratelimit.time.time', return_value=100.0):
+            self.assertEqual(backend.reserve('fbref', 1 / 3, 2, 20), 0.0)
+            self.assertEqual(backend.reserve('fbref', 1 / 3, 2, 20), 0.0)
+            self.assertAlmostEqual(backend.reserve('fbref', 1 / 3, 2, 20), 3.0)
+        self.assertAlmostEqual(RateLimitBucket.objects.get(name='fbref').tokens, -1.0)
+
+    def test_reservation_is_retried_once_on_a_closed_connection(self):
+        backend = DatabaseBackend()
+        original = RateLimitBucket.objects.select_for_update
+        calls = []
+
+        def select_for_update():
+            calls.append(None)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection unexpectedly")
+            return original()
+
+        with mock.patch.object(RateLimitBucket.objects, 'select_for_update', side_effect=select_for_update):
+            self.assertEqual(backend.reserve('fbref', 1 / 3, 2, 20), 0.0)
+        self.assertEqual(len(calls), 2)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_no_token_within_timeout_raises(self):
+        bucket = TokenBucket(MemoryBackend(), 'fbref', 1 / 3, 1)
+        self.assertEqual(bucket.reserve(timeout=0), 0.0)
+        with self.assertRaises(RateLimitTimeout):
+            bucket.reserve(timeout=1)
+
+    def test_acquire_sleeps_until_the_token_is_due(self):
+        bucket = TokenBucket(MemoryBackend(), 'fbref', 1 / 3, 1)
+        with mock.patch('dashboard.ratelimit.time.time', return_value=100.0), \
+                mock.patch('dashboard.ratelimit.time.sleep') as sleep:
+            bucket.acquire(timeout=20)
+            bucket.acquire(timeout=20)
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args[0][0], 3.0)
+
+
+@override_settings(FBREF_RATE_LIMIT={'BACKEND': 'dashboard.ratelimit.MemoryBackend', 'RATE': 1 / 3, 'BURST': 3, 'TIMEOUT': 20, 'WARM_SHARE': 0.25})
+class WarmBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        for name in ('_bucket', '_warm_bucket'):
+            patcher = mock.patch.object(ratelimit, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_warmer_takes_its_share_of_the_shared_budget(self):
+        bucket = ratelimit.get_warm_bucket()
+        self.assertAlmostEqual(bucket.rate, 1 / 12)
+        self.assertEqual(bucket.capacity, 1)
+        self.assertIs(bucket.backend, ratelimit.get_bucket().backend)
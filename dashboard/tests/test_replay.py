@@ -0,0 +1,150 @@
+"""
+    End to end tests of the compare pipeline on replayed fbref pages (FBREF_TRANSPORT 'replay'), fully offline.
+
+    The fixtures in dashboard/fixtures/fbref are synthetic player pages laid out like the 2022 markup of fbref:
+    the tables of Jack-Stephens are in the page, those of Harry-Lewis (except the standard stats) in HTML comments.
+"""
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from dashboard import cache, utils
+from dashboard.align import align_seasons
+from dashboard.cache import DiskCache, MemoryCache, TieredCache
+from dashboard.charts import get_chart_digest, render_chart
+from dashboard.fetch import FixtureNotFound
+from dashboard.utils import COMPARISONS, get_comparison_chart, get_comparison_charts, scrap_player_page
+
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / 'fixtures' / 'fbref'
+
+PLAYER_A = ('6adbc307', 'Jack-Stephens')
+PLAYER_B = ('c35e99d8', 'Harry-Lewis')
+
+
+REPLAY = {'MODE': 'replay', 'FIXTURE_DIR': FIXTURE_DIR, 'LATENCY': 0, 'JITTER': 0, 'SEED': 0}
+
+
+class ReplayTestCase(SimpleTestCase):
+
+    def setUp(self):
+        # pages, stats and charts are cached in directories of their own, so every test downloads and parses again
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name in ('_page_cache', '_stats_cache', '_chart_cache'):
+            tiers = TieredCache(MemoryCache(16 * 1024 * 1024), DiskCache(Path(directory.name) / name))
+            patcher = mock.patch.object(cache, name, tiers)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+@override_settings(FBREF_TRANSPORT=REPLAY, FBREF_PARSE_POOL=dict(settings.FBREF_PARSE_POOL, WORKERS=0))
+class ReplayPipelineTests(ReplayTestCase):
+
+    def get_charts(self, table_opt):
+        (page_A, stats_A), (page_B, stats_B) = scrap_player_page(*PLAYER_A), scrap_player_page(*PLAYER_B)
+        alignment = align_seasons(stats_A, stats_B)
+        return get_comparison_charts((PLAYER_A[1], stats_A), (PLAYER_B[1], stats_B), table_opt, alignment=alignment)
+
+    def test_stats_of_replayed_pages(self):
+        page, stats = scrap_player_page(*PLAYER_A)
+        self.assertEqual(list(stats.index.astype(str)), [f'{year}-{year + 1}' for year in range(2012, 2019)])
+        self.assertIn('standard:Playing Time - Min', stats.columns)
+        # tables hidden in comments are found as well
+        page, stats = scrap_player_page(*PLAYER_B)
+        self.assertEqual(len(stats), 5)
+        self.assertIn('defense:Tackles - Tkl', stats.columns)
+
+    def test_every_comparison_has_a_chart(self):
+        for table_opt, (get_chart, comparisons) in COMPARISONS.items():
+            with self.subTest(table_opt=table_opt):
+                charts = self.get_charts(table_opt)
+                self.assertEqual(len(charts), len(comparisons))
+                for metric, chart in charts:
+                    for offset, values, bottom, label in chart.bars:
+                        self.assertEqual(len(values), len(chart.seasons))
+
+    def test_replay_is_deterministic(self):
+        digests = [[get_chart_digest(chart) for metric, chart in self.get_charts('shooting_stats')] for _ in range(2)]
+        self.assertEqual(digests[0], digests[1])
+        metric, chart = self.get_charts('standard_stats')[0]
+        image = render_chart(chart)
+        self.assertTrue(image.startswith(b'\x89PNG'))
+        self.assertEqual(image, render_chart(chart))
+
+    def test_unrecorded_page(self):
+        with self.assertRaises(FixtureNotFound):
+            scrap_player_page('00000000', 'Nobody')
+
+
+@override_settings(FBREF_TRANSPORT=REPLAY, FBREF_PARSE_POOL=dict(settings.FBREF_PARSE_POOL, WORKERS=1, JOB_TIMEOUT=60))
+class ParsePoolTests(ReplayTestCase):
+    """ Downloaded pages are cleaned from the tables parsed while streaming, only cached pages go to the parse pool """
+
+    def setUp(self):
+        super().setUp()
+        pool = utils.WorkerPool('parse', 1)
+        self.addCleanup(pool.shutdown)
+        patcher = mock.patch.object(utils, '_parse_pool', pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_downloaded_page_is_not_parsed_again(self):
+        with mock.patch.object(utils, 'get_parse_pool') as get_parse_pool:
+            page, stats = scrap_player_page(*PLAYER_A)
+        get_parse_pool.assert_not_called()
+        self.assertIsNotNone(page.tables)
+
+    def test_cached_page_is_parsed_in_the_pool(self):
+        page, stats = scrap_player_page(*PLAYER_A)
+        cache.get_stats_cache().clear()
+        with mock.patch.object(utils.WorkerPool, 'run', autospec=True, side_effect=utils.WorkerPool.run) as run:
+            cached_page, pool_stats = scrap_player_page(*PLAYER_A)
+        self.assertIsNone(cached_page.tables)
+        run.assert_called_once()
+        self.assertTrue(pool_stats.equals(stats))
+
+
+class StandardOnlyPageTests(ReplayTestCase):
+    """ fbref only has the standard stats of players of some leagues: the other categories have no charts """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for path in FIXTURE_DIR.iterdir():
+            shutil.copy(path, directory.name)
+        # cut the page of player A after its standard stats
+        path = next(Path(directory.name).glob(f'players_{PLAYER_A[0]}_*.json'))
+        fixture = json.loads(path.read_text())
+        fixture['text'] = fixture['text'][:fixture['text'].index('<div id="all_stats_shooting"')] + '</body></html>'
+        path.write_text(json.dumps(fixture))
+        replay = override_settings(
+            FBREF_TRANSPORT=dict(REPLAY, FIXTURE_DIR=Path(directory.name)),
+            FBREF_PARSE_POOL=dict(settings.FBREF_PARSE_POOL, WORKERS=0),
+            FBREF_RENDER_POOL=dict(settings.FBREF_RENDER_POOL, WORKERS=0),
+        )
+        replay.enable()
+        self.addCleanup(replay.disable)
+
+    def test_charts_of_missing_tables_are_left_out(self):
+        (page_A, stats_A), (page_B, stats_B) = scrap_player_page(*PLAYER_A), scrap_player_page(*PLAYER_B)
+        self.assertFalse(any(col.startswith('passing:') for col in stats_A.columns))
+        for table_opt in COMPARISONS:
+            with self.subTest(table_opt=table_opt):
+                charts = get_comparison_charts((PLAYER_A[1], stats_A), (PLAYER_B[1], stats_B), table_opt)
+                self.assertEqual(bool(charts), table_opt == 'standard_stats')
+        self.assertIsNone(get_comparison_chart((PLAYER_A[1], stats_A), (PLAYER_B[1], stats_B), 'passing-total-passes-completed'))
+
+    def test_views(self):
+        data = self.client.get(f'/data/{PLAYER_A[0]}/{PLAYER_B[0]}/passing_stats')
+        self.assertEqual(data.status_code, 200)
+        self.assertEqual(data.json()['charts'], [])
+        self.assertEqual(self.client.get(f'/data/{PLAYER_A[0]}/{PLAYER_B[0]}/standard_stats').status_code, 200)
+        self.assertEqual(self.client.get(f'/chart/{PLAYER_A[0]}/{PLAYER_B[0]}/passing-total-passes-completed.png').status_code, 404)
+        self.assertEqual(self.client.get(f'/chart/{PLAYER_A[0]}/{PLAYER_B[0]}/standard-minutes-played.png').status_code, 200)
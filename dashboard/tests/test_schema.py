@@ -0,0 +1,143 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from dashboard.align import align_seasons
+from dashboard.schema import (
+    SEASON_DTYPE, TABLE_SCHEMAS, SchemaDriftError, TableSchema, compact_stats, get_season_index, memory_usage,
+    normalize_table, to_schema_dtype,
+)
+from dashboard.workers import WorkerPool
+
+
+SCHEMA = TableSchema(
+    'all_stats_test', 'test',
+    {'Age': 'int16', 'Total - Cmp': 'int16', 'xA': 'float32', 'Pressures - Press': 'int16'},
+    aliases={'xAG': 'xA', 'Expected - xAG': 'xA'},
+    optional={'Pressures - Press'},
+)
+
+
+def make_table(*columns):
+    return pd.DataFrame([[0] * len(columns)], columns=list(columns))
+
+
+def raise_drift(table_id):
+    normalize_table(table_id, make_table('Season'))
+
+
+class TableSchemaTests(SimpleTestCase):
+
+    def test_renamed_columns_get_their_schema_name(self):
+        table = SCHEMA.normalize(make_table('Season', 'Age', 'Total - Cmp', 'Expected - xAG', 'Pressures - Press'))
+        self.assertEqual(list(table.columns), ['Season', 'Age', 'Total - Cmp', 'xA', 'Pressures - Press'])
+
+    def test_alias_never_shadows_the_schema_column(self):
+        table = make_table('Season', 'Age', 'Total - Cmp', 'xA', 'xAG')
+        table['xA'] = 1.5
+        table['xAG'] = 2.5
+        normalized = SCHEMA.normalize(table)
+        self.assertEqual(list(normalized.columns), ['Season', 'Age', 'Total - Cmp', 'xA'])
+        self.assertEqual(normalized['xA'].tolist(), [1.5])
+
+    def test_optional_columns_may_be_missing(self):
+        table = SCHEMA.normalize(make_table('Season', 'Age', 'Total - Cmp', 'xA'))
+        self.assertEqual(list(table.columns), ['Season', 'Age', 'Total - Cmp', 'xA'])
+
+    def test_columns_outside_the_schema_are_dropped(self):
+        table = SCHEMA.normalize(make_table('Season', 'Squad', 'Age', 'Per 90 Minutes - Gls', 'Total - Cmp', 'xA', 'New'))
+        self.assertEqual(list(table.columns), ['Season', 'Age', 'Total - Cmp', 'xA'])
+
+    def test_missing_required_columns_raise(self):
+        with self.assertRaises(SchemaDriftError) as raised:
+            SCHEMA.normalize(make_table('Age', 'Squad', 'Total - Completed', 'xA'))
+        error = raised.exception
+        self.assertEqual(error.table_id, 'all_stats_test')
+        self.assertEqual(error.missing, ['Season', 'Total - Cmp'])
+        # ignored columns are not reported as unexpected
+        self.assertEqual(error.unexpected, ['Total - Completed'])
+
+    def test_defense_table_without_pressures(self):
+        columns = ['Season'] + [
+            col.replace('Vs Dribbles', 'Challenges').replace('Challenges - Past', 'Challenges - Lost')
+            for col in TABLE_SCHEMAS['all_stats_defense'].columns if not col.startswith('Pressures') and col != 'Blocks - ShSv'
+        ]
+        table = normalize_table('all_stats_defense', make_table(*columns))
+        self.assertIn('Vs Dribbles - Past', table.columns)
+        self.assertNotIn('Pressures - Press', table.columns)
+
+
+class SchemaDriftErrorTests(SimpleTestCase):
+
+    def test_pickles_with_its_attributes(self):
+        error = pickle.loads(pickle.dumps(SchemaDriftError('all_stats_test', {'b', 'a'}, ['c'])))
+        self.assertEqual((error.table_id, error.missing, error.unexpected), ('all_stats_test', ['a', 'b'], ['c']))
+        self.assertIn("['a', 'b']", str(error))
+
+    def test_raised_in_the_parse_pool(self):
+        pool = WorkerPool('test', 1)
+        self.addCleanup(pool.shutdown)
+        with self.assertRaises(SchemaDriftError) as raised:
+            pool.run(raise_drift, 'all_stats_standard', job_timeout=30)
+        self.assertEqual(raised.exception.table_id, 'all_stats_standard')
+        self.assertIn('Age', raised.exception.missing)
+
+
+class SchemaDtypeTests(SimpleTestCase):
+
+    def test_counts_take_the_schema_dtype(self):
+        values = to_schema_dtype(np.array([30.0, 12.0]), np.dtype('int16'))
+        self.assertEqual(values.dtype, np.dtype('int16'))
+        self.assertEqual(values.tolist(), [30, 12])
+
+    def test_counts_overflowing_the_schema_dtype_are_widened(self):
+        self.assertEqual(to_schema_dtype(np.array([40000.0, 1.0]), np.dtype('int16')).dtype, np.dtype('int32'))
+        self.assertEqual(to_schema_dtype(np.array([-40000.0]), np.dtype('int16')).dtype, np.dtype('int32'))
+        values = to_schema_dtype(np.array([2.0 ** 40]), np.dtype('int16'))
+        self.assertEqual(values.dtype, np.dtype('int64'))
+        self.assertEqual(values[0], 2 ** 40)
+
+    def test_counts_with_gaps_or_fractions_become_float(self):
+        self.assertEqual(to_schema_dtype(np.array([1.0, np.nan]), np.dtype('int16')).dtype, np.dtype('float32'))
+        self.assertEqual(to_schema_dtype(np.array([1.5]), np.dtype('int16')).dtype, np.dtype('float32'))
+
+    def test_compact_stats(self):
+        stats = compact_stats(pd.DataFrame(
+            {'standard:Playing Time - MP': [30.0], 'standard:Expected - xG': [4.2], 'other:Unknown': [1.0]},
+            index=pd.Index(['2017-2018'], name='Season'),
+        ))
+        self.assertEqual(list(stats.dtypes), [np.dtype('int16'), np.dtype('float32'), np.dtype('float32')])
+        self.assertEqual(stats.index.dtype, SEASON_DTYPE)
+        self.assertEqual(stats.index.name, 'Season')
+        # the shared categories are not counted
+        self.assertEqual(memory_usage(stats)['index'], 2)
+
+
+class SeasonIndexTests(SimpleTestCase):
+
+    def test_seasons_share_one_ordered_dtype(self):
+        index = get_season_index(['2018-2019', '2018', '2017-2018'])
+        self.assertEqual(index.dtype, SEASON_DTYPE)
+        self.assertEqual(list(index.sort_values()), ['2017-2018', '2018', '2018-2019'])
+
+    def test_unknown_label_gets_categories_of_its_own(self):
+        index = get_season_index(['2017-2018', 'Career'])
+        self.assertNotEqual(index.dtype, SEASON_DTYPE)
+        self.assertEqual(list(index), ['2017-2018', 'Career'])
+
+    def test_categorical_seasons_of_two_players_align(self):
+        def make_stats(seasons):
+            return compact_stats(pd.DataFrame(
+                {'standard:Playing Time - MP': np.arange(len(seasons), dtype=float) + 1},
+                index=pd.Index(seasons, name='Season'),
+            ))
+
+        stats_A = make_stats(['2016-2017', '2017-2018'])
+        stats_B = make_stats(['2017', '2018', '2018-2019'])
+        self.assertEqual(pd.concat([stats_A, stats_B]).index.dtype, SEASON_DTYPE)
+        alignment = align_seasons(stats_A, stats_B)
+        self.assertEqual(list(alignment.seasons), ['2016-2017', '2017', '2017-2018', '2018', '2018-2019'])
+        np.testing.assert_array_equal(alignment.values_A[:, 0], [1, np.nan, 2, np.nan, np.nan])
+        np.testing.assert_array_equal(alignment.values_B[:, 0], [np.nan, 1, np.nan, 2, 3])
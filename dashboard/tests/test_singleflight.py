@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from dashboard.fetch import AsyncSingleFlight, SingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        runs = []
+
+        def download():
+            runs.append(None)
+            started.set()
+            release.wait(5)
+            return 'page'
+
+        with ThreadPoolExecutor(4) as executor:
+            leader = executor.submit(flight.do, 'url', download)
+            started.wait(5)
+            followers = [executor.submit(flight.do, 'url', download) for _ in range(3)]
+            # followers are waiting on the leader's call
+            self.assertFalse(any(follower.done() for follower in followers))
+            release.set()
+            results = [future.result(5) for future in [leader] + followers]
+        self.assertEqual(results, ['page'] * 4)
+        self.assertEqual(len(runs), 1)
+
+    def test_exception_is_shared_and_key_released(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError('fbref is down')
+
+        with self.assertRaises(ValueError):
+            flight.do('url', fail)
+        # the next call for the key runs again instead of getting the old failure
+        self.assertEqual(flight.do('url', lambda: 'page'), 'page')
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('a', lambda: 1), 1)
+        self.assertEqual(flight.do('b', lambda: 2), 2)
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_calls_share_one_task(self):
+        flight = AsyncSingleFlight()
+        runs = []
+
+        async def download():
+            runs.append(None)
+            await asyncio.sleep(0.01)
+            return 'page'
+
+        async def main():
+            return await asyncio.gather(*[flight.do('url', download) for _ in range(4)])
+
+        self.assertEqual(asyncio.run(main()), ['page'] * 4)
+        self.assertEqual(len(runs), 1)
+
+    def test_cancelled_caller_does_not_cancel_the_others(self):
+        flight = AsyncSingleFlight()
+
+        async def download():
+            await asyncio.sleep(0.05)
+            return 'page'
+
+        async def main():
+            first = asyncio.ensure_future(flight.do('url', download))
+            second = asyncio.ensure_future(flight.do('url', download))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), 'page')
+
+    def test_key_is_released_after_the_call(self):
+        flight = AsyncSingleFlight()
+        runs = []
+
+        async def download():
+            runs.append(None)
+            return 'page'
+
+        async def main():
+            await flight.do('url', download)
+            await flight.do('url', download)
+
+        asyncio.run(main())
+        self.assertEqual(len(runs), 2)
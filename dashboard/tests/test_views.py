@@ -0,0 +1,210 @@
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+
+from dashboard import utils, views
+from dashboard.database.ID_VAL_PAIRS import PLAYERS
+from dashboard.fetch import FetchError
+from dashboard.ratelimit import RateLimitTimeout
+from dashboard.schema import SchemaDriftError
+from dashboard.workers import WorkerPool, WorkerPoolBusy
+from dashboard.tests.jobs import dying_render, slow_render
+from dashboard.tests.test_replay import PLAYER_A, PLAYER_B, REPLAY, ReplayTestCase
+from dashboard.utils import scrap_player_page
+
+
+(PLAYER_1_ID, PLAYER_1), (PLAYER_2_ID, PLAYER_2) = PLAYERS[0], PLAYERS[5]
+
+ERRORS = (RateLimitTimeout("No request budget"), FetchError('https://fbref.com/en/players/', 500))
+
+
+class FbrefUnavailableTests(TestCase):
+    """ A page that could not be fetched and has no stale copy is answered with 503 and Retry-After, not 500 """
+
+    def assertUnavailable(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    def test_compare(self):
+        request = RequestFactory().get('/compare/', {'player_1': PLAYER_1, 'player_2': PLAYER_2})
+        for error in ERRORS:
+            with self.subTest(error=error), mock.patch('dashboard.views.scrap_players', side_effect=error), \
+                    self.assertLogs('dashboard.views', 'WARNING'):
+                self.assertUnavailable(views.compare(request))
+
+    def test_compare_async(self):
+        request = AsyncRequestFactory().get('/compare/', {'player_1': PLAYER_1, 'player_2': PLAYER_2})
+        for error in ERRORS:
+            with self.subTest(error=error), mock.patch('dashboard.views.ascrap_players', side_effect=error), \
+                    self.assertLogs('dashboard.views', 'WARNING'):
+                self.assertUnavailable(async_to_sync(views.compare_async)(request))
+
+    def test_chart(self):
+        for error in ERRORS:
+            with self.subTest(error=error), mock.patch('dashboard.views.scrap_players', side_effect=error), \
+                    self.assertLogs('dashboard.views', 'WARNING'):
+                self.assertUnavailable(self.client.get(f'/chart/{PLAYER_1_ID}/{PLAYER_2_ID}/standard-xg.png'))
+
+    def test_compare_data(self):
+        for error in ERRORS:
+            with self.subTest(error=error), mock.patch('dashboard.views.scrap_players', side_effect=error), \
+                    self.assertLogs('dashboard.views', 'WARNING'):
+                self.assertUnavailable(self.client.get(f'/data/{PLAYER_1_ID}/{PLAYER_2_ID}/standard_stats'))
+
+
+class ScrapErrorsTests(TestCase):
+    """ Every view scraping players answers the same errors the same way, see handle_scrap_errors """
+
+    def get_responses(self, error):
+        with mock.patch('dashboard.views.scrap_players', side_effect=error), \
+                mock.patch('dashboard.views.ascrap_players', side_effect=error):
+            compare = RequestFactory().get('/compare/', {'player_1': PLAYER_1, 'player_2': PLAYER_2})
+            compare_async = AsyncRequestFactory().get('/compare/', {'player_1': PLAYER_1, 'player_2': PLAYER_2})
+            return [
+                views.compare(compare),
+                async_to_sync(views.compare_async)(compare_async),
+                self.client.get(f'/chart/{PLAYER_1_ID}/{PLAYER_2_ID}/standard-xg.png'),
+                self.client.get(f'/data/{PLAYER_1_ID}/{PLAYER_2_ID}/standard_stats'),
+            ]
+
+    def test_full_pool(self):
+        for response in self.get_responses(WorkerPoolBusy("The parse pool is full")):
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response)
+
+    def test_schema_drift(self):
+        with self.assertLogs('dashboard.views', 'ERROR'):
+            responses = self.get_responses(SchemaDriftError('all_stats_standard', ['Age']))
+        self.assertEqual([response.status_code for response in responses], [502] * 4)
+
+
+@override_settings(
+    FBREF_TRANSPORT=REPLAY,
+    FBREF_PARSE_POOL=dict(settings.FBREF_PARSE_POOL, WORKERS=0),
+    FBREF_RENDER_POOL=dict(settings.FBREF_RENDER_POOL, WORKERS=1, JOB_TIMEOUT=0.5),
+)
+class RenderPoolTests(ReplayTestCase):
+    """ A chart the render pool does not draw in time, or whose worker dies, is answered with 503 """
+
+    URL = f'/chart/{PLAYER_A[0]}/{PLAYER_B[0]}/standard-minutes-played.png'
+
+    def setUp(self):
+        super().setUp()
+        pool = WorkerPool('render', 1)
+        self.addCleanup(pool.shutdown)
+        # start the worker before timing anything
+        pool.run(pow, 2, 10)
+        patcher = mock.patch.object(utils, '_render_pool', pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_chart(self, render_chart, error):
+        with mock.patch.object(utils, 'render_chart', render_chart), self.assertLogs('dashboard.utils', 'WARNING') as logs:
+            response = self.client.get(self.URL)
+        self.assertIn(error, logs.output[0])
+        return response
+
+    def test_chart_not_drawn_in_time(self):
+        start = time.monotonic()
+        response = self.get_chart(slow_render, 'TimeoutError')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_render_worker_dying(self):
+        # the worker dies as soon as it unpickles the job, however long that takes
+        with override_settings(FBREF_RENDER_POOL=dict(settings.FBREF_RENDER_POOL, JOB_TIMEOUT=60)):
+            self.assertEqual(self.get_chart(dying_render, 'BrokenProcessPool').status_code, 503)
+        # the next chart is drawn by a new worker, given the time to start
+        with override_settings(FBREF_RENDER_POOL=dict(settings.FBREF_RENDER_POOL, JOB_TIMEOUT=60)):
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+
+@override_settings(
+    FBREF_TRANSPORT=REPLAY,
+    FBREF_PARSE_POOL=dict(settings.FBREF_PARSE_POOL, WORKERS=0),
+    FBREF_RENDER_POOL=dict(settings.FBREF_RENDER_POOL, WORKERS=0),
+)
+class ChartViewTests(ReplayTestCase):
+    """ A chart URL linked by the compare page is kept for good, other URLs of the chart are revalidated by its ETag """
+
+    METRIC = 'standard-minutes-played'
+
+    def setUp(self):
+        super().setUp()
+        (page_A, stats_A), (page_B, stats_B) = scrap_player_page(*PLAYER_A), scrap_player_page(*PLAYER_B)
+        context = views.get_compare_context(PLAYER_A[1], PLAYER_B[1], stats_A, stats_B, 'standard_stats', player_ids=(PLAYER_A[0], PLAYER_B[0]))
+        self.url, = [url for url in context['std_stats_vizzes'] if f'/{self.METRIC}.png?' in url]
+        self.path, query = self.url.split('?')
+        self.version = query.split('v=')[1]
+
+    def test_versioned_url_is_immutable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['ETag'], f'"{self.version}"')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={views.CHART_MAX_AGE}, immutable')
+
+    def test_unversioned_or_outdated_url_is_revalidated(self):
+        for query in ({}, {'v': f'{views.CHART_STYLE}-outdated'}):
+            with self.subTest(query=query):
+                response = self.client.get(self.path, query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['ETag'], f'"{self.version}"')
+                self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_matching_etag_is_not_modified_without_drawing(self):
+        with mock.patch('dashboard.views.get_chart_images') as get_chart_images:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.version}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], f'"{self.version}"')
+        get_chart_images.assert_not_called()
+
+    def test_unknown_chart(self):
+        for path in (
+            f'/chart/{PLAYER_A[0]}/{PLAYER_B[0]}/standard-nope.png',
+            f'/chart/{PLAYER_A[0]}/00000000/{self.METRIC}.png',
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+
+
+@override_settings(FBREF_TRANSPORT=REPLAY, FBREF_PARSE_POOL=dict(settings.FBREF_PARSE_POOL, WORKERS=0))
+class CompareDataTests(ReplayTestCase):
+    """ The JSON of compare_data has the keys static/dashboard/compare.js reads, revalidated by its ETag """
+
+    URL = f'/data/{PLAYER_A[0]}/{PLAYER_B[0]}/standard_stats'
+
+    def test_charts_of_the_table_option(self):
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        data = response.json()
+        self.assertEqual(
+            (data['player_1'], data['player_2'], data['table_opt']), (PLAYER_A[1], PLAYER_B[1], 'standard_stats'),
+        )
+        self.assertIn('standard-minutes-played', [chart['metric'] for chart in data['charts']])
+        for chart in data['charts']:
+            with self.subTest(metric=chart['metric']):
+                self.assertTrue(chart['title'] and chart['ylabel'])
+                self.assertIn('yticks', chart)
+                self.assertTrue(chart['bars'])
+                for bar in chart['bars']:
+                    self.assertIsInstance(bar['label'], str)
+                    self.assertIsInstance(bar['offset'], (int, float))
+                    self.assertEqual(len(bar['values']), len(chart['seasons']))
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.URL)['ETag']
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_unknown_table_option(self):
+        self.assertEqual(self.client.get(f'/data/{PLAYER_A[0]}/{PLAYER_B[0]}/nope_stats').status_code, 404)
@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dashboard import cache, utils
+from dashboard.management.commands.warm_cache import Command
+
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / 'fixtures' / 'fbref'
+
+PLAYER = ('6adbc307', 'Jack-Stephens')
+
+
+class WarmCacheDynoTests(SimpleTestCase):
+
+    def test_refuses_to_run_off_the_web_dyno(self):
+        for dyno in ('worker.1', 'run.4242'):
+            with self.subTest(dyno=dyno), mock.patch.dict(os.environ, {'DYNO': dyno}):
+                with self.assertRaisesMessage(CommandError, dyno):
+                    call_command('warm_cache')
+
+
+@override_settings(FBREF_TRANSPORT={'MODE': 'replay', 'FIXTURE_DIR': FIXTURE_DIR, 'LATENCY': 0, 'JITTER': 0, 'SEED': 0})
+class WarmCacheTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        directories = override_settings(
+            FBREF_CACHE_DIR=Path(directory.name) / 'pages', FBREF_STATS_CACHE_DIR=Path(directory.name) / 'stats',
+        )
+        directories.enable()
+        self.addCleanup(directories.disable)
+        for patcher in (
+            # the command sets up caches of its own
+            mock.patch.object(cache, '_page_cache', None),
+            mock.patch.object(cache, '_stats_cache', None),
+            mock.patch.object(Command, 'get_catalog', return_value=[PLAYER]),
+            mock.patch('dashboard.ratelimit.acquire_warm'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def warm(self):
+        # the command changes the settings of its process, keep that to this test
+        with override_settings():
+            call_command('warm_cache', stdout=io.StringIO())
+
+    def test_pages_are_downloaded_once_and_cleaned_in_process(self):
+        with mock.patch.object(utils, 'refresh_page', wraps=utils.refresh_page) as refresh_page, \
+                mock.patch.object(utils, 'get_parse_pool') as get_parse_pool, \
+                mock.patch('dashboard.management.commands.warm_cache.refresh_page', new=refresh_page):
+            self.warm()
+        refresh_page.assert_called_once_with(utils.get_player_url(*PLAYER))
+        get_parse_pool.assert_not_called()
+        self.assertEqual(cache.get_page_cache().memory.max_bytes, 0)
+        self.assertIsNotNone(cache.get_page_cache().get(utils.get_player_url(*PLAYER)))
+
+    def test_page_fetched_while_waiting_for_a_token_is_skipped(self):
+        def fetched_by_a_compare():
+            utils.scrap_player_page(*PLAYER)
+
+        with mock.patch('dashboard.ratelimit.acquire_warm', side_effect=fetched_by_a_compare), \
+                mock.patch('dashboard.management.commands.warm_cache.refresh_page') as refresh_page:
+            self.warm()
+        refresh_page.assert_not_called()
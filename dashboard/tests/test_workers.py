@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.test import SimpleTestCase
+
+from dashboard.workers import WorkerPool, WorkerPoolBusy, WorkerPoolTimeout
+
+
+class WorkerPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = WorkerPool('test', 1, max_pending=1)
+        self.addCleanup(self.pool.shutdown)
+        # start the worker before timing anything
+        self.assertEqual(self.pool.run(pow, 2, 10), 1024)
+
+    def test_job_without_result_in_time_raises(self):
+        start = time.monotonic()
+        with self.assertRaises(WorkerPoolTimeout):
+            self.pool.run(time.sleep, 2, job_timeout=0.2)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_queued_job_timing_out_is_cancelled(self):
+        running = self.pool.submit(time.sleep, 1)
+        with self.assertRaises(WorkerPoolTimeout):
+            self.pool.run(pow, 2, 10, job_timeout=0.2)
+        running.result()
+        # the cancelled job gave its place back: the pool takes two more jobs
+        queued = [self.pool.submit(pow, 2, 10, timeout=1), self.pool.submit(pow, 2, 10, timeout=1)]
+        self.assertEqual([future.result() for future in queued], [1024, 1024])
+
+    def test_full_pool_raises_busy(self):
+        jobs = [self.pool.submit(time.sleep, 0.5), self.pool.submit(time.sleep, 0.5)]
+        with self.assertRaises(WorkerPoolBusy):
+            self.pool.submit(pow, 2, 10, timeout=0.1)
+        for future in jobs:
+            future.result()
+
+    def test_dead_worker_raises_busy_and_is_replaced(self):
+        with self.assertRaises(WorkerPoolBusy):
+            self.pool.run(os._exit, 1, job_timeout=30)
+        self.assertEqual(self.pool.run(pow, 2, 10, job_timeout=30), 1024)
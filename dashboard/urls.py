@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from . import views
 
 urlpatterns = [
    path('', views.index, name='index'),
-   path('compare/', views.compare, name='compare'),
+   path('compare/', views.compare_async if settings.ASYNC_COMPARE else views.compare, name='compare'),
+   path('compare/client/', views.compare_client, name='compare_client'),
+   path('chart/<str:player_1_id>/<str:player_2_id>/<slug:metric>.png', views.chart, name='chart'),
    
    # API Route
   path("data", views.database, name="database"),
+  path("data/<str:player_1_id>/<str:player_2_id>/<str:table_opt>", views.compare_data, name="compare_data"),
 ]
\ No newline at end of file
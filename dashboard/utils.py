@@ -1,17 +1,171 @@
 import numpy as np
 import pandas as pd
 import bs4
-import requests
-import matplotlib.pyplot as plt
-import io
 import base64
-
-
-def get_html_document(url):
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.text import slugify
+
+import logging
+import threading
+
+from .cache import Page, get_cached_page, cache_page, get_page_ttl, get_page_type, get_cached_stats, cache_stats, encode_stats, decode_stats
+from .cache import get_chart_key, get_cached_chart, cache_chart
+from .fetch import fetch, afetch, fetch_tables, afetch_tables, FetchError, SingleFlight, AsyncSingleFlight
+from .parse import STATS_TABLES, extract_tables, table_to_frame
+from .align import align_seasons
+from .charts import CHART_STYLE, Chart, get_chart_digest, render_chart
+from .schema import STATS_NAMESPACES, compact_stats, memory_usage, normalize_table
+from .workers import WorkerPool, WorkerPoolBusy
+
+
+logger = logging.getLogger(__name__)
+
+_page_requests = SingleFlight()
+_async_page_requests = AsyncSingleFlight()
+
+
+def get_html_document(url, use_cache=True):
+    return get_page(url, use_cache).text
+
+
+def get_page(url, use_cache=True):
+    """
+        Page of the given url:
+        - from the cache while it is fresh
+        - stale from the cache while a background refresh fetches it again (up to STALE_WHILE_REVALIDATE seconds after expiry)
+        - stale from the cache if fbref errors or does not answer within REVALIDATE_TIMEOUT seconds (up to IF_ERROR seconds
+          after expiry), the download then goes on in the background
+        - downloaded otherwise
+    """
+    if not use_cache:
+        return _page_requests.do(url, lambda: download_page(url, use_cache=False))
+
+    page = get_cached_page(url)
+    if page is not None:
+        expired_for = page.age - get_page_ttl(url)
+        if expired_for <= 0:
+            return page
+        if expired_for <= settings.FBREF_CACHE_STALE['WHILE_REVALIDATE']:
+            schedule_page_refresh(url)
+            return page
+        if expired_for <= settings.FBREF_CACHE_STALE['IF_ERROR']:
+            # fbref may take a minute to answer (rate limit queue, retries): only wait for it up to REVALIDATE_TIMEOUT,
+            # the download goes on in the background and caches the page for the next request
+            try:
+                fresh_page = schedule_page_refresh(url).result(timeout=settings.FBREF_CACHE_STALE['REVALIDATE_TIMEOUT'])
+            except FutureTimeoutError:
+                fresh_page = None
+            if fresh_page is None:
+                logger.warning("Serving stale page of %s, fbref did not answer in time", url)
+                return page
+            return fresh_page
+    return refresh_page(url)
+
+
+def refresh_page(url):
+  """ Download the url into the cache, concurrent requests for the same url share a single download """
+  return _page_requests.do(url, lambda: download_page(url))
+
+
+def download_page(url, use_cache=True):
     # request for HTML document of given url
-    response = requests.get(url)
-    # response will be provided in JSON format
-    return response.text
+    # player pages are only read for their stats tables: parse them while downloading and stop once they are all in,
+    # the cached document is then the beginning of the page, up to the last stats table
+    if get_page_type(url) == 'player':
+        response, html_doc, tables = fetch_tables(url, STATS_TABLES)
+    else:
+        response = fetch(url)
+        html_doc, tables = response.text, None
+    # only keep successful responses so error pages are never served
+    if not response.ok:
+        raise FetchError(url, response.status_code)
+    page = cache_page(url, html_doc) if use_cache else Page(url, html_doc, time.time())
+    page.tables = tables
+    return page
+
+
+async def aget_html_document(url, use_cache=True):
+    return (await aget_page(url, use_cache)).text
+
+
+async def aget_page(url, use_cache=True):
+    # async counterpart of get_page, the event loop is never blocked by disk or network
+    if not use_cache:
+        return await _async_page_requests.do(url, lambda: adownload_page(url, use_cache=False))
+
+    page = await sync_to_async(get_cached_page, thread_sensitive=False)(url)
+    if page is not None:
+        expired_for = page.age - get_page_ttl(url)
+        if expired_for <= 0:
+            return page
+        if expired_for <= settings.FBREF_CACHE_STALE['WHILE_REVALIDATE']:
+            schedule_page_refresh(url)
+            return page
+        if expired_for <= settings.FBREF_CACHE_STALE['IF_ERROR']:
+            # same as get_page, shielded so giving up on the refresh does not cancel it
+            refresh = asyncio.shield(asyncio.wrap_future(schedule_page_refresh(url)))
+            try:
+                fresh_page = await asyncio.wait_for(refresh, settings.FBREF_CACHE_STALE['REVALIDATE_TIMEOUT'])
+            except asyncio.TimeoutError:
+                fresh_page = None
+            if fresh_page is None:
+                logger.warning("Serving stale page of %s, fbref did not answer in time", url)
+                return page
+            return fresh_page
+    return await _async_page_requests.do(url, lambda: adownload_page(url))
+
+
+async def adownload_page(url, use_cache=True):
+    if get_page_type(url) == 'player':
+        response, html_doc, tables = await afetch_tables(url, STATS_TABLES)
+    else:
+        response = await afetch(url)
+        html_doc, tables = response.text, None
+    if not response.is_success:
+        raise FetchError(url, response.status_code)
+    if use_cache:
+        page = await sync_to_async(cache_page, thread_sensitive=False)(url, html_doc)
+    else:
+        page = Page(url, html_doc, time.time())
+    page.tables = tables
+    return page
+
+
+_refresh_executor = None
+_refreshing = {}
+_refreshing_lock = threading.Lock()
+
+
+def schedule_page_refresh(url):
+    """
+        Download the page again in the background, at most one refresh per url is queued.
+        Returns the Future of the refresh, its result is the downloaded page or None if the download failed.
+    """
+    global _refresh_executor
+    with _refreshing_lock:
+        future = _refreshing.get(url)
+        if future is None:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(max_workers=settings.FBREF_REFRESH_WORKERS, thread_name_prefix='refresh')
+            future = _refreshing[url] = _refresh_executor.submit(_refresh_page, url)
+    return future
+
+
+def _refresh_page(url):
+    try:
+        return _page_requests.do(url, lambda: download_page(url))
+    except Exception:
+        logger.warning("Background refresh of %s failed", url, exc_info=True)
+        return None
+    finally:
+        with _refreshing_lock:
+            _refreshing.pop(url, None)
 
 
 def scrap_league(league_id, league_name):
@@ -29,66 +183,160 @@ def scrap_team(team_id, team_name):
   return soup
 
 
+def get_player_url(player_id, player_name):
+  return f'https://fbref.com/en/players/{player_id}/{player_name}'
+
+
 def scrap_player(player_id, player_name):
-  player_url = f'https://fbref.com/en/players/{player_id}/{player_name}'
-  # scrape the html content
+  player_url = get_player_url(player_id, player_name)
   html_doc = get_html_document(player_url)
   soup = bs4.BeautifulSoup(html_doc, 'html.parser')
   return soup
 
 
-def get_player_table(player_soup, table_category='all_stats_standard'):
-  # find tag with specified id
-  html_std_stats = player_soup.find(id=table_category)
-  # remove <tfoot> and its children
-  for tfoot in player_soup.find_all('tfoot'):
-    tfoot.decompose()
-  # get the table
-  table = pd.read_html(str(html_std_stats))
-  return table[0]
+def scrap_player_page(player_id, player_name):
+  """
+    Returns (page, stats) of the player, the page tells when the data was fetched
+    and stats is the season frame of every stats table found on the page (see clean_player_stats)
+  """
+  player_url = get_player_url(player_id, player_name)
+  # scrape the html content
+  page = get_page(player_url)
+  stats = get_player_stats(player_id, page)
+  return page, stats
 
 
-"""
-    STANDARD STATISTICS
-"""
+def get_player_stats(player_id, page):
+  """ Stats frame of the player's page, parsed and cleaned only the first time this version of the page is seen """
+  stats = get_cached_stats(player_id, page.text)
+  if stats is not None:
+    return stats
+  config = settings.FBREF_PARSE_POOL
+  if page.tables is None and config['WORKERS']:
+    # cached pages are parsed again, which holds the GIL for a while: parse and clean them in the parse pool
+    data = get_parse_pool().run(clean_page, page.text.encode('utf-8'), timeout=config['TIMEOUT'], job_timeout=config['JOB_TIMEOUT'])
+    cache_stats(player_id, page.text, data)
+    return decode_stats(data)
+  # freshly downloaded pages were parsed while streaming, only their tables are cleaned here
+  tables = page.tables if page.tables is not None else extract_tables(page.text, STATS_TABLES)
+  stats = clean_player_stats(tables)
+  logger.debug("Stats of %s hold %d bytes", player_id, memory_usage(stats)['total'])
+  cache_stats(player_id, page.text, stats)
+  return stats
 
-def clean_standard_stats_table(raw_standard_stats_table):
-  """ Remove the multi-index """
-  """ Column name ('Playing Time', 'MP') becomes ('Playing Time - MP') """
-  # Drop Per 90 Minutes first index columns
-  raw_standard_stats_table.drop(['Per 90 Minutes'], axis=1, level=0, inplace=True)
 
-  # Change the column structure to make it just 1 level
-  for col in raw_standard_stats_table.columns:
-    if 'unnamed' in col[0].lower():
-      continue
-    new_colname = col[0] + ' - ' + col[1]
-    raw_standard_stats_table.rename(columns={col[1]: new_colname}, inplace=True, level=1)
-  raw_standard_stats_table = raw_standard_stats_table.droplevel(level=0, axis=1)
-
-  # Drop mathces column and 
-  raw_standard_stats_table = raw_standard_stats_table.drop(["Matches", "Squad", "Country", "Comp", "LgRank"], axis=1)
-  # # Drop NaN values
-  # raw_standard_stats_table = raw_standard_stats_table.dropna()
-  
-  # Convert string values to numeric
-  for col in raw_standard_stats_table.columns:
-    if col in ["Season"]:
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+  global _parse_pool
+  if _parse_pool is None:
+    with _parse_pool_lock:
+      if _parse_pool is None:
+        config = settings.FBREF_PARSE_POOL
+        _parse_pool = WorkerPool('parse', config['WORKERS'], config['MAX_PENDING'])
+  return _parse_pool
+
+
+def clean_page(page_bytes):
+  """ Job of the parse pool: utf-8 page in, stats frame out (encoded by encode_stats, which pickles cheaply) """
+  tables = extract_tables(page_bytes.decode('utf-8'), STATS_TABLES)
+  return encode_stats(clean_player_stats(tables))
+
+
+_scrap_executor = None
+
+
+def get_scrap_executor():
+  global _scrap_executor
+  if _scrap_executor is None:
+    _scrap_executor = ThreadPoolExecutor(max_workers=settings.FBREF_SCRAP_WORKERS, thread_name_prefix='scrap')
+  return _scrap_executor
+
+
+def scrap_players(players):
+  """
+    players: list of (player_id, player_name) tuples
+    Scrap every player concurrently, parsing a page that is already downloaded overlaps with the remaining downloads.
+    Returns the (page, stats) of every player in the same order as the players.
+  """
+  futures = [get_scrap_executor().submit(scrap_player_page, player_id, player_name) for player_id, player_name in players]
+  return [future.result() for future in futures]
+
+
+async def ascrap_player_page(player_id, player_name):
+  player_url = get_player_url(player_id, player_name)
+  page = await aget_page(player_url)
+  # the stats cache lives on disk and cleaning is CPU-bound, keep both off the event loop
+  loop = asyncio.get_running_loop()
+  stats = await loop.run_in_executor(get_scrap_executor(), get_player_stats, player_id, page)
+  return page, stats
+
+
+async def ascrap_players(players):
+  """ Async counterpart of scrap_players """
+  return await asyncio.gather(*[ascrap_player_page(player_id, player_name) for player_id, player_name in players])
+
+
+def get_player_table(player_tables, table_category='all_stats_standard'):
+  """
+    player_tables: {table_id: <table> element} from scrap_player_page, without <tfoot>
+    Column names are flat, e.g. 'Playing Time - MP', or 'Season' for the columns without a group
+  """
+  return table_to_frame(player_tables[table_category])
+
+
+def clean_player_stats(player_tables):
+  """
+    Clean every stats table of the player into one frame indexed by season.
+    Columns are namespaced by table, e.g. 'standard:Playing Time - MP' or 'shooting:Standard - Gls'.
+    The rows of all tables are stacked into one float array (a table lacking a column leaves it empty)
+    and summed per season at once, so a season counts for every category the player has a table of.
+    Columns then take the compact dtypes of schema.STATS_SCHEMA.
+    Every table is checked against its schema first, raises SchemaDriftError when one lacks a required column.
+  """
+  tables = []
+  for table_category, namespace in STATS_NAMESPACES.items():
+    if table_category not in player_tables:
       continue
-    raw_standard_stats_table[col] = pd.to_numeric(raw_standard_stats_table[col], errors='coerce', downcast='integer')
+    table = normalize_table(table_category, get_player_table(player_tables, table_category))
+    kept = [col for col in table.columns if col != "Season"]
+    tables.append((namespace, table, kept))
+
+  # Relabel every kept column at once and preallocate the stacked rows
+  columns = list(dict.fromkeys(f'{namespace}:{col}' for namespace, table, kept in tables for col in kept))
+  positions = {col: position for position, col in enumerate(columns)}
+  values = np.full((sum(len(table) for namespace, table, kept in tables), len(columns)), np.nan)
+  seasons = np.empty(len(values), dtype=object)
+
+  row = 0
+  for namespace, table, kept in tables:
+    rows = slice(row, row + len(table))
+    seasons[rows] = table["Season"].to_numpy()
+    # columns table_to_frame already typed are copied as a block, the others are converted to numbers in one call
+    numeric = [col for col in kept if table[col].dtype.kind in 'iuf']
+    others = [col for col in kept if table[col].dtype.kind not in 'iuf']
+    values[rows, [positions[f'{namespace}:{col}'] for col in numeric]] = table[numeric].to_numpy(dtype=np.float64)
+    if others:
+      coerced = pd.to_numeric(pd.Series(table[others].to_numpy().ravel()), errors='coerce').to_numpy(dtype=np.float64)
+      values[rows, [positions[f'{namespace}:{col}'] for col in others]] = coerced.reshape(len(table), len(others))
+    row += len(table)
 
   # Group by and Aggregate
-  standard_stats_table = raw_standard_stats_table.groupby(["Season"]).aggregate('sum')
-  standard_stats_table.reset_index(inplace=True)
-  standard_stats_table.set_index("Season", inplace=True)
-  del raw_standard_stats_table
-  
-  return standard_stats_table
+  stacked = pd.DataFrame(values, columns=columns, index=pd.Index(seasons, name="Season"))
+  return compact_stats(stacked.groupby(level="Season").sum())
+
 
+"""
+    STANDARD STATISTICS
+"""
 
-def compare_standard_stats_players(player_A_set: tuple, player_B_set: tuple, comparison='Minutes Played', last_few_seasons=None):
+def get_standard_stats_chart(player_A_set: tuple, player_B_set: tuple, comparison='Minutes Played', last_few_seasons=None, alignment=None):
   """
-    player_A_set: tuple of (player_name of player A, table of player A)
+    Chart of the comparison between both players, drawn by charts.render_chart
+    player_A_set: tuple of (player_name of player A, stats of player A from clean_player_stats)
+    alignment: align_seasons of both players' stats, computed once per pair by the caller drawing all of its charts
     Comparison options:
     - 'Time Playing' Comparisons: ["Minutes Played", "Starts", "Matches Played", "90s", "Starts Stack"]
     - 'Expected' Comparisons: ["xG", "npxG", "xA", "npxG+xA"]
@@ -105,137 +353,94 @@ def compare_standard_stats_players(player_A_set: tuple, player_B_set: tuple, com
     return
 
   # unpack the tuple
-  player_A, table_A = player_A_set
-  player_B, table_B = player_B_set
-  table_A = table_A.copy()
-  table_B = table_B.copy()
-
-  # take subset of table with chosen category in the column name while also removing the first index name
-  assert (table_A.columns == table_B.columns).all()
-  for col in table_A.columns:
-    if category in col:
-      table_A.rename(columns={col: col.replace(f"{category} - ", "")}, inplace=True)
-      table_B.rename(columns={col: col.replace(f"{category} - ", "")}, inplace=True)
-      continue
-    table_A.drop(col, axis=1, inplace=True)
-    table_B.drop(col, axis=1, inplace=True)
-  
-  # set axis for season length
-  X_axis_A = np.arange(len(table_A.index))
-  X_axis_B = np.arange(len(table_B.index))
-
-  # get the fewest number of seasons recorded between two players to get similar comparisons
-  season_len = len(X_axis_A) if len(X_axis_A) <= len(X_axis_B) else len(X_axis_B)
-  X_axis = np.arange(season_len)
+  player_A, stats_A = player_A_set
+  player_B, stats_B = player_B_set
 
-  # cut the table rows
-  table_A = table_A[-season_len:].copy()
-  table_B = table_B[-season_len:].copy()
+  # seasons of both players, from the first season of the player who started later to get similar comparisons
+  if alignment is None:
+    alignment = align_seasons(stats_A, stats_B)
+  seasons = alignment.since_latest_debut()
 
   # expected metrics only recorded 5 seasons prior (since 2017-2018, code is created at April, 2022)
   if category == "Expected":
-    table_A = table_A[-5:].copy()
-    table_B = table_B[-5:].copy()
-    X_axis = np.arange(len(table_A.index))
+    seasons = seasons.last(5)
   
   # if the number of last few seasons is provided
   if last_few_seasons != None:
     if not isinstance(last_few_seasons, int):
       print("Please provide integer to specify last few seasons")
       return
-    table_A = table_A[-last_few_seasons:].copy()
-    table_B = table_B[-last_few_seasons:].copy()
-    X_axis = np.arange(len(table_A.index))
+    seasons = seasons.last(last_few_seasons)
 
-  # initialize figure
-  plt.switch_backend('AGG')
-  plt.figure(figsize=(10, 6))
+  # columns of the chosen category, without the category in their name
+  table_A, table_B = seasons.tables(f"standard:{category} - ")
 
-  # get the rows where the seasons are recorded for both players
-  index = table_A.index
-  plt.xticks(X_axis, index, rotation=30, fontsize=12)
-  plt.xlabel("Seasons")
+  # initialize chart, a player without a row for a season has no bar above its label
+  chart = Chart(seasons.seasons, comparison)
 
   # Playing Time Sections
   if comparison == "Minutes Played":
-    plt.bar(X_axis - 0.2, table_A['Min'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Min'], width = 0.4, label = player_B)
-    plt.ylabel("Minutes Played", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Minutes Played per Season", size=18)
+    chart.bar(-0.2, table_A['Min'], label=player_A)
+    chart.bar(0.2, table_B['Min'], label=player_B)
+    chart.ylabel = "Minutes Played"
+    chart.title = "Minutes Played per Season"
 
   elif comparison == "Starts":
-    plt.bar(X_axis - 0.2, table_A['Starts'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Starts'], width = 0.4, label = player_B)
-    plt.ylabel("Starts", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Starts per Season", size=18)
+    chart.bar(-0.2, table_A['Starts'], label=player_A)
+    chart.bar(0.2, table_B['Starts'], label=player_B)
+    chart.ylabel = "Starts"
+    chart.title = "Starts per Season"
 
   elif comparison == "Matches Played":
-    plt.bar(X_axis - 0.2, table_A['MP'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['MP'], width = 0.4, label = player_B)
-    plt.ylabel("Matches Played", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Matches Played per Season", size=18)
+    chart.bar(-0.2, table_A['MP'], label=player_A)
+    chart.bar(0.2, table_B['MP'], label=player_B)
+    chart.ylabel = "Matches Played"
+    chart.title = "Matches Played per Season"
 
   elif comparison == "90s":
-    plt.bar(X_axis - 0.2, table_A['90s'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['90s'], width = 0.4, label = player_B)
-    plt.ylabel("Minutes Played per 90s", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Minutes Played per 90s per Season", size=18)
+    chart.bar(-0.2, table_A['90s'], label=player_A)
+    chart.bar(0.2, table_B['90s'], label=player_B)
+    chart.ylabel = "Minutes Played per 90s"
+    chart.title = "Minutes Played per 90s per Season"
 
   elif comparison == "Starts Stack":
     table_A["Non-Starter"] = table_A["MP"] - table_A["Starts"]
     table_B["Non-Starter"] = table_B["MP"] - table_B["Starts"]
-    plt.bar(X_axis - 0.2, table_A['Starts'], width = 0.4, label = player_A + ' Starter')
-    plt.bar(X_axis - 0.2, table_A['Non-Starter'], bottom = table_A["Starts"], width = 0.4, label = player_A + ' Non-Starter')
-    plt.bar(X_axis + 0.2, table_B['Starts'], width = 0.4, label = player_B + ' Starter')
-    plt.bar(X_axis + 0.2, table_B['Non-Starter'], bottom = table_B["Starts"], width = 0.4, label = player_B + ' Non-Starter')
-    plt.ylabel("Matches Played per Season", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Matches Played per Season", size=18)
+    chart.bar(-0.2, table_A['Starts'], label=player_A + ' Starter')
+    chart.bar(-0.2, table_A['Non-Starter'], bottom=table_A["Starts"], label=player_A + ' Non-Starter')
+    chart.bar(0.2, table_B['Starts'], label=player_B + ' Starter')
+    chart.bar(0.2, table_B['Non-Starter'], bottom=table_B["Starts"], label=player_B + ' Non-Starter')
+    chart.ylabel = "Matches Played per Season"
+    chart.title = "Matches Played per Season"
     # setting y ticks
-    max_y = max(table_A['MP'].max(), table_B['MP'].max())
+    max_y = np.nanmax([table_A['MP'], table_B['MP']])
     y_ticks = np.arange(0, max_y+5, 5)
-    plt.yticks(y_ticks)
+    chart.yticks = y_ticks
   
   # Expected Sections
   elif comparison == "xG":
-    plt.bar(X_axis - 0.2, table_A['xG'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['xG'], width = 0.4, label = player_B)
-    plt.ylabel("Expected Goals", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Expected Goals per Season", size=18)
+    chart.bar(-0.2, table_A['xG'], label=player_A)
+    chart.bar(0.2, table_B['xG'], label=player_B)
+    chart.ylabel = "Expected Goals"
+    chart.title = "Expected Goals per Season"
 
   elif comparison == "npxG":
-    plt.bar(X_axis - 0.2, table_A['npxG'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['npxG'], width = 0.4, label = player_B)
-    plt.ylabel("non-penalty Expected Goals", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("non-penalty Expected Goals per Season", size=18)
+    chart.bar(-0.2, table_A['npxG'], label=player_A)
+    chart.bar(0.2, table_B['npxG'], label=player_B)
+    chart.ylabel = "non-penalty Expected Goals"
+    chart.title = "non-penalty Expected Goals per Season"
 
   elif comparison == "xA":
-    plt.bar(X_axis - 0.2, table_A['xA'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['xA'], width = 0.4, label = player_B)
-    plt.ylabel("Expected Assists", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Expected Assists per Season", size=18)
+    chart.bar(-0.2, table_A['xA'], label=player_A)
+    chart.bar(0.2, table_B['xA'], label=player_B)
+    chart.ylabel = "Expected Assists"
+    chart.title = "Expected Assists per Season"
 
   elif comparison == "npxG+xA":
-    plt.bar(X_axis - 0.2, table_A['npxG+xA'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['npxG+xA'], width = 0.4, label = player_B)
-    plt.ylabel("Expected non-penalty Goals + Assists", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Expected non-penalty Goals + Assists per Season", size=18)
-  
-  plt.legend(loc='best', framealpha=0.5)
-  
-  # adjusts the size of the chart to the size of the figure
-  plt.tight_layout()
-  
-  # get the bytes data
-  chart = get_graph()
+    chart.bar(-0.2, table_A['npxG+xA'], label=player_A)
+    chart.bar(0.2, table_B['npxG+xA'], label=player_B)
+    chart.ylabel = "Expected non-penalty Goals + Assists"
+    chart.title = "Expected non-penalty Goals + Assists per Season"
   
   return chart
 
@@ -244,38 +449,11 @@ def compare_standard_stats_players(player_A_set: tuple, player_B_set: tuple, com
     SHOOTING STATISTICS
 """
 
-def clean_shooting_stats_table(raw_shooting_stats_table):
-  # Change the column structure to make it just 1 level
-  for col in raw_shooting_stats_table.columns:
-    if 'unnamed' in col[0].lower():
-      continue
-    new_colname = col[0] + ' - ' + col[1]
-    raw_shooting_stats_table.rename(columns={col[1]: new_colname}, inplace=True, level=1)
-  raw_shooting_stats_table = raw_shooting_stats_table.droplevel(level=0, axis=1)
-
-  # Drop mathces column and 
-  raw_shooting_stats_table = raw_shooting_stats_table.drop(["Matches", "Squad", "Country", "Comp", "LgRank"], axis=1)
-  # # Drop NaN values
-  # raw_shooting_stats_table = raw_shooting_stats_table.dropna()
-  
-  # Convert string values to numeric
-  for col in raw_shooting_stats_table.columns:
-    if col in ["Season"]:
-      continue
-    raw_shooting_stats_table[col] = pd.to_numeric(raw_shooting_stats_table[col], errors='coerce', downcast='integer')
-
-  # Group by and Aggregate
-  shooting_stats_table = raw_shooting_stats_table.groupby(["Season"]).aggregate('sum')
-  shooting_stats_table.reset_index(inplace=True)
-  shooting_stats_table.set_index("Season", inplace=True)
-  del raw_shooting_stats_table
-  
-  return shooting_stats_table
-
-
-def compare_shooting_stats_players(player_A_set:tuple, player_B_set:tuple, comparison:str='Goals', last_few_seasons:int=None):
+def get_shooting_stats_chart(player_A_set:tuple, player_B_set:tuple, comparison:str='Goals', last_few_seasons:int=None, alignment=None):
   """
-    player_A_set: tuple of (player_name of player A, table of player A)
+    Chart of the comparison between both players, drawn by charts.render_chart
+    player_A_set: tuple of (player_name of player A, stats of player A from clean_player_stats)
+    alignment: align_seasons of both players' stats, computed once per pair by the caller drawing all of its charts
     Comparison options:
     - 'Standard' Comparisons: ["Goals", "Shoot", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT", "Dist", "Goals Stack"]
     - 'Expected' Comparisons: ["xG", "npxG", "npxG/Sh", "G-xG", "np:G-xG"]
@@ -292,38 +470,17 @@ def compare_shooting_stats_players(player_A_set:tuple, player_B_set:tuple, compa
     return
 
   # unpack the tuple
-  player_A, table_A = player_A_set
-  player_B, table_B = player_B_set
-  table_A = table_A.copy()
-  table_B = table_B.copy()
-
-  # take subset of table with chosen category in the column name while also removing the first index name
-  assert (table_A.columns == table_B.columns).all()
-  for col in table_A.columns:
-    if category in col:
-      table_A.rename(columns={col: col.replace(f"{category} - ", "")}, inplace=True)
-      table_B.rename(columns={col: col.replace(f"{category} - ", "")}, inplace=True)
-      continue
-    table_A.drop(col, axis=1, inplace=True)
-    table_B.drop(col, axis=1, inplace=True)
-  
-  # set axis for season length
-  X_axis_A = np.arange(len(table_A.index))
-  X_axis_B = np.arange(len(table_B.index))
-
-  # get the fewest number of seasons recorded between two players to get similar comparisons
-  season_len = len(X_axis_A) if len(X_axis_A) <= len(X_axis_B) else len(X_axis_B)
-  X_axis = np.arange(season_len)
+  player_A, stats_A = player_A_set
+  player_B, stats_B = player_B_set
 
-  # cut the table rows
-  table_A = table_A[-season_len:].copy()
-  table_B = table_B[-season_len:].copy()
+  # seasons of both players, from the first season of the player who started later to get similar comparisons
+  if alignment is None:
+    alignment = align_seasons(stats_A, stats_B)
+  seasons = alignment.since_latest_debut()
 
   # expected metrics only recorded 5 seasons prior (since 2017-2018, code is created at April, 2022)
   if category == "Expected":
-    table_A = table_A[-5:].copy()
-    table_B = table_B[-5:].copy()
-    X_axis = np.arange(len(table_A.index))
+    seasons = seasons.last(5)
   
   # if the number of last few seasons is provided
   if last_few_seasons != None:
@@ -333,141 +490,113 @@ def compare_shooting_stats_players(player_A_set:tuple, player_B_set:tuple, compa
     if last_few_seasons > 0:
       print("Please provide number of seasons more than 0")
       return
-    table_A = table_A[-last_few_seasons:].copy()
-    table_B = table_B[-last_few_seasons:].copy()
-    X_axis = np.arange(len(table_A.index))
+    seasons = seasons.last(last_few_seasons)
 
-  # initialize figure
-  plt.switch_backend('AGG')
-  plt.figure(figsize=(10, 6))
+  # columns of the chosen category, without the category in their name
+  table_A, table_B = seasons.tables(f"shooting:{category} - ")
 
-  # get the rows where the seasons are recorded for both players
-  index = table_A.index
-  plt.xticks(X_axis, index, rotation=30, fontsize=12)
-  plt.xlabel("Seasons")
+  # initialize chart, a player without a row for a season has no bar above its label
+  chart = Chart(seasons.seasons, comparison)
 
   # Standard Sections
   if comparison == "Goals":
-    plt.bar(X_axis - 0.2, table_A['Gls'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Gls'], width = 0.4, label = player_B)
-    plt.ylabel("Goals Scored", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Goals Scored per Season", size=18)
+    chart.bar(-0.2, table_A['Gls'], label=player_A)
+    chart.bar(0.2, table_B['Gls'], label=player_B)
+    chart.ylabel = "Goals Scored"
+    chart.title = "Goals Scored per Season"
 
   elif comparison == "Shoot":
-    plt.bar(X_axis - 0.2, table_A['Sh'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Sh'], width = 0.4, label = player_B)
-    plt.ylabel("Shots", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots per Season", size=18)
+    chart.bar(-0.2, table_A['Sh'], label=player_A)
+    chart.bar(0.2, table_B['Sh'], label=player_B)
+    chart.ylabel = "Shots"
+    chart.title = "Shots per Season"
 
   elif comparison == "SoT":
-    plt.bar(X_axis - 0.2, table_A["SoT"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["SoT"], width = 0.4, label = player_B)
-    plt.ylabel("Shots on Target", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots on Target per Season", size=18)
+    chart.bar(-0.2, table_A["SoT"], label=player_A)
+    chart.bar(0.2, table_B["SoT"], label=player_B)
+    chart.ylabel = "Shots on Target"
+    chart.title = "Shots on Target per Season"
 
   elif comparison == "SoT%":
-    plt.bar(X_axis - 0.2, table_A["SoT%"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["SoT%"], width = 0.4, label = player_B)
-    plt.ylabel("Shots on Target Percentage", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots on Target Percentage per Season", size=18)
+    chart.bar(-0.2, table_A["SoT%"], label=player_A)
+    chart.bar(0.2, table_B["SoT%"], label=player_B)
+    chart.ylabel = "Shots on Target Percentage"
+    chart.title = "Shots on Target Percentage per Season"
 
   elif comparison == "Sh/90":
-    plt.bar(X_axis - 0.2, table_A["Sh/90"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["Sh/90"], width = 0.4, label = player_B)
-    plt.ylabel("Shots on Target per 90s", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots on Target per 90s per Season", size=18)
+    chart.bar(-0.2, table_A["Sh/90"], label=player_A)
+    chart.bar(0.2, table_B["Sh/90"], label=player_B)
+    chart.ylabel = "Shots on Target per 90s"
+    chart.title = "Shots on Target per 90s per Season"
 
   elif comparison == "SoT/90":
-    plt.bar(X_axis - 0.2, table_A["SoT/90"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["SoT/90"], width = 0.4, label = player_B)
-    plt.ylabel("Shots on Target per 90s", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots on Target per 90s per Season", size=18)
+    chart.bar(-0.2, table_A["SoT/90"], label=player_A)
+    chart.bar(0.2, table_B["SoT/90"], label=player_B)
+    chart.ylabel = "Shots on Target per 90s"
+    chart.title = "Shots on Target per 90s per Season"
 
   elif comparison == "G/Sh":
-    plt.bar(X_axis - 0.2, table_A["G/Sh"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["G/Sh"], width = 0.4, label = player_B)
-    plt.ylabel("Goals per Shots", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Goals per Shots per Season", size=18)
+    chart.bar(-0.2, table_A["G/Sh"], label=player_A)
+    chart.bar(0.2, table_B["G/Sh"], label=player_B)
+    chart.ylabel = "Goals per Shots"
+    chart.title = "Goals per Shots per Season"
 
   elif comparison == "G/SoT":
-    plt.bar(X_axis - 0.2, table_A["G/SoT"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["G/SoT"], width = 0.4, label = player_B)
-    plt.ylabel("Goals per Shots on Target", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Goals per Shots on Target per Season", size=18)
+    chart.bar(-0.2, table_A["G/SoT"], label=player_A)
+    chart.bar(0.2, table_B["G/SoT"], label=player_B)
+    chart.ylabel = "Goals per Shots on Target"
+    chart.title = "Goals per Shots on Target per Season"
 
   elif comparison == "Dist":
-    plt.bar(X_axis - 0.2, table_A["Dist"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["Dist"], width = 0.4, label = player_B)
-    plt.ylabel("Average Distance of Shots Taken from Goal per 90s", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Average Distance of Shots Taken from Goal per 90s per Season", size=18)
+    chart.bar(-0.2, table_A["Dist"], label=player_A)
+    chart.bar(0.2, table_B["Dist"], label=player_B)
+    chart.ylabel = "Average Distance of Shots Taken from Goal per 90s"
+    chart.title = "Average Distance of Shots Taken from Goal per 90s per Season"
 
   elif comparison == "Goals Stack":
     table_A["Non-Penalty-Goals"] = table_A["Gls"] - table_A["PK"]
     table_B["Non-Penalty-Goals"] = table_B["Gls"] - table_B["PK"]
-    plt.bar(X_axis - 0.2, table_A['Non-Penalty-Goals'], width = 0.4, label = player_A + ' Non-Penalty Goals')
-    plt.bar(X_axis - 0.2, table_A['PK'], bottom = table_A["Non-Penalty-Goals"], width = 0.4, label = player_A + ' Penalty Goals')
-    plt.bar(X_axis + 0.2, table_B['Non-Penalty-Goals'], width = 0.4, label = player_B + ' Non-Penalty Goals')
-    plt.bar(X_axis + 0.2, table_B['PK'], bottom = table_B["Non-Penalty-Goals"], width = 0.4, label = player_B + ' Penalty Goals')
-    plt.ylabel("Goals Scored per Season", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Goals Scored per Season", size=18)
+    chart.bar(-0.2, table_A['Non-Penalty-Goals'], label=player_A + ' Non-Penalty Goals')
+    chart.bar(-0.2, table_A['PK'], bottom=table_A["Non-Penalty-Goals"], label=player_A + ' Penalty Goals')
+    chart.bar(0.2, table_B['Non-Penalty-Goals'], label=player_B + ' Non-Penalty Goals')
+    chart.bar(0.2, table_B['PK'], bottom=table_B["Non-Penalty-Goals"], label=player_B + ' Penalty Goals')
+    chart.ylabel = "Goals Scored per Season"
+    chart.title = "Goals Scored per Season"
     # setting y ticks
-    max_y = max(table_A['Gls'].max(), table_B['Gls'].max())
+    max_y = np.nanmax([table_A['Gls'], table_B['Gls']])
     y_ticks = np.arange(0, max_y+5, 5)
-    plt.yticks(y_ticks)
+    chart.yticks = y_ticks
   
   # Expected Sections
   elif comparison == "xG":
-    plt.bar(X_axis - 0.2, table_A['xG'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['xG'], width = 0.4, label = player_B)
-    plt.ylabel("Expected Goals", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Expected Goals per Season", size=18)
+    chart.bar(-0.2, table_A['xG'], label=player_A)
+    chart.bar(0.2, table_B['xG'], label=player_B)
+    chart.ylabel = "Expected Goals"
+    chart.title = "Expected Goals per Season"
 
   elif comparison == "npxG":
-    plt.bar(X_axis - 0.2, table_A['npxG'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['npxG'], width = 0.4, label = player_B)
-    plt.ylabel("non-penalty Expected Goals", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("non-penalty Expected Goals per Season", size=18)
+    chart.bar(-0.2, table_A['npxG'], label=player_A)
+    chart.bar(0.2, table_B['npxG'], label=player_B)
+    chart.ylabel = "non-penalty Expected Goals"
+    chart.title = "non-penalty Expected Goals per Season"
 
   elif comparison == "npxG/Sh":
-    plt.bar(X_axis - 0.2, table_A['npxG/Sh'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['npxG/Sh'], width = 0.4, label = player_B)
-    plt.ylabel("Expected non-penalty Goals per Shots", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Expected non-penalty Goals per Shots per Season", size=18)
+    chart.bar(-0.2, table_A['npxG/Sh'], label=player_A)
+    chart.bar(0.2, table_B['npxG/Sh'], label=player_B)
+    chart.ylabel = "Expected non-penalty Goals per Shots"
+    chart.title = "Expected non-penalty Goals per Shots per Season"
 
   elif comparison == "G-xG":
-    plt.bar(X_axis - 0.2, table_A["G-xG"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["G-xG"], width = 0.4, label = player_B)
-    plt.ylabel("Goals-xG", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Goals-xG per Season", size=18)
+    chart.bar(-0.2, table_A["G-xG"], label=player_A)
+    chart.bar(0.2, table_B["G-xG"], label=player_B)
+    chart.ylabel = "Goals-xG"
+    chart.title = "Goals-xG per Season"
 
   elif comparison == "np:G-xG":
-    plt.bar(X_axis - 0.2, table_A["np:G-xG"], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B["np:G-xG"], width = 0.4, label = player_B)
-    plt.ylabel("npG-npxG", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Non Penalty Goals - Non Penalty Expected Goals per Season", size=18)
-  
-  plt.legend(loc='best', framealpha=0.5)
-  
-  # adjusts the size of the chart to the size of the figure
-  plt.tight_layout()
-  
-  # get the bytes data
-  chart = get_graph()
+    chart.bar(-0.2, table_A["np:G-xG"], label=player_A)
+    chart.bar(0.2, table_B["np:G-xG"], label=player_B)
+    chart.ylabel = "npG-npxG"
+    chart.title = "Non Penalty Goals - Non Penalty Expected Goals per Season"
   
   return chart
 
@@ -476,40 +605,11 @@ def compare_shooting_stats_players(player_A_set:tuple, player_B_set:tuple, compa
   PASSING
 """
 
-def clean_passing_stats_table(raw_passing_stats_table):
-  # Change the column structure to make it just 1 level
-  for col in raw_passing_stats_table.columns:
-    if 'unnamed' in col[0].lower():
-      continue
-    new_colname = col[0] + ' - ' + col[1]
-    raw_passing_stats_table[('unnamed', new_colname)] = raw_passing_stats_table[col]
-    raw_passing_stats_table.drop(col, inplace=True, axis=1)
-  raw_passing_stats_table = raw_passing_stats_table.droplevel(level=0, axis=1)
-
-  # Drop mathces column and 
-  raw_passing_stats_table = raw_passing_stats_table.drop(["Matches", "Squad", "Country", "Comp", "LgRank"], axis=1)
-  # # Drop NaN values
-  # raw_passing_stats_table = raw_passing_stats_table.dropna()
-  
-  # Convert string values to numeric
-  for col in raw_passing_stats_table.columns:
-    if col in ["Season"]:
-      continue
-    raw_passing_stats_table[col] = pd.to_numeric(raw_passing_stats_table[col], errors='coerce', downcast='float')
-    # raw_passing_stats_table[col] = raw_passing_stats_table[col].apply(pd.to_numeric, errors='coerce', downcast='float')
-
-  # Group by and Aggregate
-  passing_stats_table = raw_passing_stats_table.groupby(["Season"]).aggregate('sum')
-  passing_stats_table.reset_index(inplace=True)
-  passing_stats_table.set_index("Season", inplace=True)
-  del raw_passing_stats_table
-  
-  return passing_stats_table
-
-
-def compare_passing_stats_players(player_A_set:tuple, player_B_set:tuple, comparison:str=None, last_few_seasons:int=None):
+def get_passing_stats_chart(player_A_set:tuple, player_B_set:tuple, comparison:str=None, last_few_seasons:int=None, alignment=None):
   """
-    player_A_set: tuple of (player_name of player A, table of player A)
+    Chart of the comparison between both players, drawn by charts.render_chart
+    player_A_set: tuple of (player_name of player A, stats of player A from clean_player_stats)
+    alignment: align_seasons of both players' stats, computed once per pair by the caller drawing all of its charts
     Comparison options:
     - 'Total' Comparisons: ["Total - Passes Completed", "Total - Passes Attempted", "Total - Pass Completion %", "Total - Total Passes Distance", "Total - Progessive Passes Distance"]
     - 'Short' Comparisons: ["Short - Passes Completed", "Short - Passes Attempted", "Short - Pass Completion %"]
@@ -528,227 +628,179 @@ def compare_passing_stats_players(player_A_set:tuple, player_B_set:tuple, compar
     return
 
   # unpack the tuple
-  player_A, table_A = player_A_set
-  player_B, table_B = player_B_set
-  table_A = table_A.copy()
-  table_B = table_B.copy()
-  
-  # set axis for season length
-  X_axis_A = np.arange(len(table_A.index))
-  X_axis_B = np.arange(len(table_B.index))
-
-  # get the fewest number of seasons recorded between two players to get similar comparisons
-  season_len = len(X_axis_A) if len(X_axis_A) <= len(X_axis_B) else len(X_axis_B)
-  X_axis = np.arange(season_len)
+  player_A, stats_A = player_A_set
+  player_B, stats_B = player_B_set
 
-  # cut the table rows
-  table_A = table_A[-season_len:].copy()
-  table_B = table_B[-season_len:].copy()
+  # seasons of both players, from the first season of the player who started later to get similar comparisons
+  if alignment is None:
+    alignment = align_seasons(stats_A, stats_B)
+  seasons = alignment.since_latest_debut()
 
   # all the metrics except assist only recorded 5 seasons prior (since 2017-2018, code is created at Mei, 2022)
-  table_A = table_A[-5:].copy()
-  table_B = table_B[-5:].copy()
-  X_axis = np.arange(len(table_A.index))
+  seasons = seasons.last(5)
   
   # if the number of last few seasons is provided
   if last_few_seasons != None:
     if not isinstance(last_few_seasons, int):
       print("Please provide integer to specify last few seasons")
       return
-    table_A = table_A[-last_few_seasons:].copy()
-    table_B = table_B[-last_few_seasons:].copy()
-    X_axis = np.arange(len(table_A.index))
+    seasons = seasons.last(last_few_seasons)
 
-  # initialize figure
-  plt.switch_backend('AGG')
-  plt.figure(figsize=(10, 6))
+  table_A, table_B = seasons.tables("passing:")
 
-  # get the rows where the seasons are recorded for both players
-  index = table_A.index
-  plt.xticks(X_axis, index, rotation=30, fontsize=12)
-  plt.xlabel("Seasons", size=12)
+  # initialize chart, a player without a row for a season has no bar above its label
+  chart = Chart(seasons.seasons, comparison, xlabel_size=12)
 
   # Total Sections
   if comparison == "Total - Passes Completed":
-    plt.bar(X_axis - 0.2, table_A['Total - Cmp'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Total - Cmp'], width = 0.4, label = player_B)
-    plt.ylabel("Total Passes Completed", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Total Passes Completed per Season", size=18)
+    chart.bar(-0.2, table_A['Total - Cmp'], label=player_A)
+    chart.bar(0.2, table_B['Total - Cmp'], label=player_B)
+    chart.ylabel = "Total Passes Completed"
+    chart.title = "Total Passes Completed per Season"
 
   elif comparison == "Total - Passes Attempted":
-    plt.bar(X_axis - 0.2, table_A['Total - Att'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Total - Att'], width = 0.4, label = player_B)
-    plt.ylabel("Total Passes Attempted", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Total Passes Attempted per Season", size=18)
+    chart.bar(-0.2, table_A['Total - Att'], label=player_A)
+    chart.bar(0.2, table_B['Total - Att'], label=player_B)
+    chart.ylabel = "Total Passes Attempted"
+    chart.title = "Total Passes Attempted per Season"
 
   elif comparison == "Total - Pass Completion %":
-    plt.bar(X_axis - 0.2, table_A['Total - Cmp%'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Total - Cmp%'], width = 0.4, label = player_B)
-    plt.ylabel("Pass Completion %", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pass Completion % per Season", size=18)
+    chart.bar(-0.2, table_A['Total - Cmp%'], label=player_A)
+    chart.bar(0.2, table_B['Total - Cmp%'], label=player_B)
+    chart.ylabel = "Pass Completion %"
+    chart.title = "Pass Completion % per Season"
     
   elif comparison == "Total - Total Passes Distance":
-    plt.bar(X_axis - 0.2, table_A['Total - TotDist'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Total - TotDist'], width = 0.4, label = player_B)
-    plt.ylabel("Total Passes Distance (in yards)", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Passes Passes Distance (in yards) per Season", size=18)
+    chart.bar(-0.2, table_A['Total - TotDist'], label=player_A)
+    chart.bar(0.2, table_B['Total - TotDist'], label=player_B)
+    chart.ylabel = "Total Passes Distance (in yards)"
+    chart.title = "Passes Passes Distance (in yards) per Season"
     
   elif comparison == "Total - Progessive Passes Distance":
-    plt.bar(X_axis - 0.2, table_A['Total - PrgDist'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Total - PrgDist'], width = 0.4, label = player_B)
-    plt.ylabel("Progessive Passes Distance (in yards)", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Progessive Passes Distance (in yards) per Season", size=18)
+    chart.bar(-0.2, table_A['Total - PrgDist'], label=player_A)
+    chart.bar(0.2, table_B['Total - PrgDist'], label=player_B)
+    chart.ylabel = "Progessive Passes Distance (in yards)"
+    chart.title = "Progessive Passes Distance (in yards) per Season"
 
   elif comparison == "Total Passes Stack":
     table_A["Total-Failed-Passes"] = table_A["Total - Att"] - table_A["Total - Cmp"]
     table_B["Total-Failed-Passes"] = table_B["Total - Att"] - table_B["Total - Cmp"]
-    plt.bar(X_axis - 0.2, table_A['Total - Cmp'], width = 0.4, label = player_A + ' Total Completed Passes')
-    plt.bar(X_axis - 0.2, table_A['Total-Failed-Passes'], bottom = table_A["Total - Cmp"], width = 0.4, label = player_A + ' Total Failed Passes')
-    plt.bar(X_axis + 0.2, table_B['Total - Cmp'], width = 0.4, label = player_B + ' Total Completed Passes')
-    plt.bar(X_axis + 0.2, table_B['Total-Failed-Passes'], bottom = table_B["Total - Cmp"], width = 0.4, label = player_B + ' Total Failed Passes')
-    plt.ylabel("Total Passes Attempted", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Total Passes Attempted per Season", size=18)
+    chart.bar(-0.2, table_A['Total - Cmp'], label=player_A + ' Total Completed Passes')
+    chart.bar(-0.2, table_A['Total-Failed-Passes'], bottom=table_A["Total - Cmp"], label=player_A + ' Total Failed Passes')
+    chart.bar(0.2, table_B['Total - Cmp'], label=player_B + ' Total Completed Passes')
+    chart.bar(0.2, table_B['Total-Failed-Passes'], bottom=table_B["Total - Cmp"], label=player_B + ' Total Failed Passes')
+    chart.ylabel = "Total Passes Attempted"
+    chart.title = "Total Passes Attempted per Season"
     # setting y ticks
-    max_y = max(table_A['Total - Att'].max(), table_B['Total - Att'].max())
+    max_y = np.nanmax([table_A['Total - Att'], table_B['Total - Att']])
     y_ticks = np.arange(0, max_y+50, 100)
-    plt.yticks(y_ticks)
+    chart.yticks = y_ticks
   
   # Short Sections
   elif comparison == "Short - Passes Completed":
-    plt.bar(X_axis - 0.2, table_A['Short - Cmp'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Short - Cmp'], width = 0.4, label = player_B)
-    plt.ylabel("Short Passes Completed", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Short Passes Completed per Season", size=18)
+    chart.bar(-0.2, table_A['Short - Cmp'], label=player_A)
+    chart.bar(0.2, table_B['Short - Cmp'], label=player_B)
+    chart.ylabel = "Short Passes Completed"
+    chart.title = "Short Passes Completed per Season"
 
   elif comparison == "Short - Passes Attempted":
-    plt.bar(X_axis - 0.2, table_A['Short - Att'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Short - Att'], width = 0.4, label = player_B)
-    plt.ylabel("Short Passes Attempted", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Short Passes Attempted per Season", size=18)
+    chart.bar(-0.2, table_A['Short - Att'], label=player_A)
+    chart.bar(0.2, table_B['Short - Att'], label=player_B)
+    chart.ylabel = "Short Passes Attempted"
+    chart.title = "Short Passes Attempted per Season"
 
   elif comparison == "Short - Pass Completion %":
-    plt.bar(X_axis - 0.2, table_A['Short - Cmp%'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Short - Cmp%'], width = 0.4, label = player_B)
-    plt.ylabel("Short Pass Completion %", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Short Pass Completion % per Season", size=18)
+    chart.bar(-0.2, table_A['Short - Cmp%'], label=player_A)
+    chart.bar(0.2, table_B['Short - Cmp%'], label=player_B)
+    chart.ylabel = "Short Pass Completion %"
+    chart.title = "Short Pass Completion % per Season"
     
   # Medium Sections
   elif comparison == "Medium - Passes Completed":
-    plt.bar(X_axis - 0.2, table_A['Medium - Cmp'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Medium - Cmp'], width = 0.4, label = player_B)
-    plt.ylabel("Medium Passes Completed", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Medium Passes Completed per Season", size=18)
+    chart.bar(-0.2, table_A['Medium - Cmp'], label=player_A)
+    chart.bar(0.2, table_B['Medium - Cmp'], label=player_B)
+    chart.ylabel = "Medium Passes Completed"
+    chart.title = "Medium Passes Completed per Season"
 
   elif comparison == "Medium - Passes Attempted":
-    plt.bar(X_axis - 0.2, table_A['Medium - Att'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Medium - Att'], width = 0.4, label = player_B)
-    plt.ylabel("Medium Passes Attempted", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Medium Passes Attempted per Season", size=18)
+    chart.bar(-0.2, table_A['Medium - Att'], label=player_A)
+    chart.bar(0.2, table_B['Medium - Att'], label=player_B)
+    chart.ylabel = "Medium Passes Attempted"
+    chart.title = "Medium Passes Attempted per Season"
 
   elif comparison == "Medium - Pass Completion %":
-    plt.bar(X_axis - 0.2, table_A['Medium - Cmp%'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Medium - Cmp%'], width = 0.4, label = player_B)
-    plt.ylabel("Medium Pass Completion %", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Medium Pass Completion % per Season", size=18)
+    chart.bar(-0.2, table_A['Medium - Cmp%'], label=player_A)
+    chart.bar(0.2, table_B['Medium - Cmp%'], label=player_B)
+    chart.ylabel = "Medium Pass Completion %"
+    chart.title = "Medium Pass Completion % per Season"
     
   # Long Sections
   elif comparison == "Long - Passes Completed":
-    plt.bar(X_axis - 0.2, table_A['Long - Cmp'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Long - Cmp'], width = 0.4, label = player_B)
-    plt.ylabel("Long Passes Completed", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Long Passes Completed per Season", size=18)
+    chart.bar(-0.2, table_A['Long - Cmp'], label=player_A)
+    chart.bar(0.2, table_B['Long - Cmp'], label=player_B)
+    chart.ylabel = "Long Passes Completed"
+    chart.title = "Long Passes Completed per Season"
 
   elif comparison == "Long - Passes Attempted":
-    plt.bar(X_axis - 0.2, table_A['Long - Att'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Long - Att'], width = 0.4, label = player_B)
-    plt.ylabel("Long Passes Attempted", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Long Passes Attempted per Season", size=18)
+    chart.bar(-0.2, table_A['Long - Att'], label=player_A)
+    chart.bar(0.2, table_B['Long - Att'], label=player_B)
+    chart.ylabel = "Long Passes Attempted"
+    chart.title = "Long Passes Attempted per Season"
 
   elif comparison == "Long - Pass Completion %":
-    plt.bar(X_axis - 0.2, table_A['Long - Cmp%'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Long - Cmp%'], width = 0.4, label = player_B)
-    plt.ylabel("Long Pass Completion %", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Long Pass Completion % per Season", size=18)
+    chart.bar(-0.2, table_A['Long - Cmp%'], label=player_A)
+    chart.bar(0.2, table_B['Long - Cmp%'], label=player_B)
+    chart.ylabel = "Long Pass Completion %"
+    chart.title = "Long Pass Completion % per Season"
   
   # unnamed sections
   elif comparison == "Assists":
-    plt.bar(X_axis - 0.2, table_A['Ast'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Ast'], width = 0.4, label = player_B)
-    plt.ylabel("Assists", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Assists per Season", size=18)
+    chart.bar(-0.2, table_A['Ast'], label=player_A)
+    chart.bar(0.2, table_B['Ast'], label=player_B)
+    chart.ylabel = "Assists"
+    chart.title = "Assists per Season"
     
   elif comparison == "xA":
-    plt.bar(X_axis - 0.2, table_A['xA'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['xA'], width = 0.4, label = player_B)
-    plt.ylabel("Expected Assists", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Expected Assists per Season", size=18)
+    chart.bar(-0.2, table_A['xA'], label=player_A)
+    chart.bar(0.2, table_B['xA'], label=player_B)
+    chart.ylabel = "Expected Assists"
+    chart.title = "Expected Assists per Season"
     
   elif comparison == "A-xA":
-    plt.bar(X_axis - 0.2, table_A['A-xA'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['A-xA'], width = 0.4, label = player_B)
-    plt.ylabel("Assists - Expected Assists", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Assists - Expected Assists per Season", size=18)
+    chart.bar(-0.2, table_A['A-xA'], label=player_A)
+    chart.bar(0.2, table_B['A-xA'], label=player_B)
+    chart.ylabel = "Assists - Expected Assists"
+    chart.title = "Assists - Expected Assists per Season"
     
   elif comparison == "Key Passes":
-    plt.bar(X_axis - 0.2, table_A['KP'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['KP'], width = 0.4, label = player_B)
-    plt.ylabel("Key Passes", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Key Passes per Season", size=18)
+    chart.bar(-0.2, table_A['KP'], label=player_A)
+    chart.bar(0.2, table_B['KP'], label=player_B)
+    chart.ylabel = "Key Passes"
+    chart.title = "Key Passes per Season"
     
   elif comparison == "Final Third Passes":
-    plt.bar(X_axis - 0.2, table_A['1/3'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['1/3'], width = 0.4, label = player_B)
-    plt.ylabel("Passes into Final Third", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Passes into Final Third per Season", size=18)
+    chart.bar(-0.2, table_A['1/3'], label=player_A)
+    chart.bar(0.2, table_B['1/3'], label=player_B)
+    chart.ylabel = "Passes into Final Third"
+    chart.title = "Passes into Final Third per Season"
     
   elif comparison == "Passes into Penalty Area":
-    plt.bar(X_axis - 0.2, table_A['PPA'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['PPA'], width = 0.4, label = player_B)
-    plt.ylabel("Passes into Penalty Area", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Passes into Penalty Area per Season", size=18)
+    chart.bar(-0.2, table_A['PPA'], label=player_A)
+    chart.bar(0.2, table_B['PPA'], label=player_B)
+    chart.ylabel = "Passes into Penalty Area"
+    chart.title = "Passes into Penalty Area per Season"
     
   elif comparison == "Crosses into Penalty Area":
-    plt.bar(X_axis - 0.2, table_A['CrsPA'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['CrsPA'], width = 0.4, label = player_B)
-    plt.ylabel("Crosses into Penalty Area", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Crosses into Penalty Area per Season", size=18)
+    chart.bar(-0.2, table_A['CrsPA'], label=player_A)
+    chart.bar(0.2, table_B['CrsPA'], label=player_B)
+    chart.ylabel = "Crosses into Penalty Area"
+    chart.title = "Crosses into Penalty Area per Season"
     
   elif comparison == "Progressive Passes":
-    plt.bar(X_axis - 0.2, table_A['Prog'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Prog'], width = 0.4, label = player_B)
-    plt.ylabel("Progressive Passes", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Progressive Passes per Season", size=18)
-  
-  plt.legend(loc='best', framealpha=0.5)
-  
-  # adjusts the size of the chart to the size of the figure
-  plt.tight_layout()
-  
-  # get the bytes data
-  chart = get_graph()
+    chart.bar(-0.2, table_A['Prog'], label=player_A)
+    chart.bar(0.2, table_B['Prog'], label=player_B)
+    chart.ylabel = "Progressive Passes"
+    chart.title = "Progressive Passes per Season"
   
   return chart
 
@@ -757,46 +809,31 @@ def compare_passing_stats_players(player_A_set:tuple, player_B_set:tuple, compar
   DEFENSIVE ACTIONS
 """
 
-def clean_def_acts_stats_table(raw_def_acts_stats_table):
-  # Change the column structure to make it just 1 level
-  for col in raw_def_acts_stats_table.columns:
-    if 'unnamed' in col[0].lower():
-      continue
-    new_colname = col[0] + ' - ' + col[1]
-    raw_def_acts_stats_table[('unnamed', new_colname)] = raw_def_acts_stats_table[col]
-    raw_def_acts_stats_table.drop(col, inplace=True, axis=1)
-  raw_def_acts_stats_table = raw_def_acts_stats_table.droplevel(level=0, axis=1)
-
-  # Drop mathces column and 
-  raw_def_acts_stats_table = raw_def_acts_stats_table.drop(["Matches", "Squad", "Country", "Comp", "LgRank"], axis=1)
-  # # Drop NaN values
-  # raw_def_acts_stats_table = raw_def_acts_stats_table.dropna()
-  
-  # Convert string values to numeric
-  for col in raw_def_acts_stats_table.columns:
-    if col in ["Season"]:
-      continue
-    raw_def_acts_stats_table[col] = pd.to_numeric(raw_def_acts_stats_table[col], errors='coerce', downcast='float')
-    # raw_def_acts_stats_table[col] = raw_def_acts_stats_table[col].apply(pd.to_numeric, errors='coerce', downcast='float')
-
-  # Group by and Aggregate
-  def_acts_stats_table = raw_def_acts_stats_table.groupby(["Season"]).aggregate('sum')
-  def_acts_stats_table.reset_index(inplace=True)
-  def_acts_stats_table.set_index("Season", inplace=True)
-  del raw_def_acts_stats_table
-  
-  return def_acts_stats_table
-
-
-def compare_def_acts_stats_players(player_A_set:tuple, player_B_set:tuple, comparison:str=None, last_few_seasons:int=None):
+# columns of the defensive actions charts that fbref stopped publishing (schema.OPTIONAL_COLUMNS)
+DEF_ACTS_OPTIONAL_COLUMNS = {
+  "Pressures - Press Attempts": ["Pressures - Press"],
+  "Pressures - Press Successes": ["Pressures - Succ"],
+  "Pressures - Press Success %": ["Pressures - %"],
+  "Pressures Stack": ["Pressures - Press", "Pressures - Succ"],
+  "Pressures - Press in Def 3rd": ["Pressures - Def 3rd"],
+  "Pressures - Press in Mid 3rd": ["Pressures - Mid 3rd"],
+  "Pressures - Press in Att 3rd": ["Pressures - Att 3rd"],
+  "Pressures Area Stack": ["Pressures - Def 3rd", "Pressures - Mid 3rd", "Pressures - Att 3rd"],
+  "Blocks - Shots on Target Blocked": ["Blocks - ShSv"],
+}
+
+def get_def_acts_stats_chart(player_A_set:tuple, player_B_set:tuple, comparison:str=None, last_few_seasons:int=None, alignment=None):
   """
-    player_A_set: tuple of (player_name of player A, table of player A)
+    Chart of the comparison between both players, drawn by charts.render_chart
+    player_A_set: tuple of (player_name of player A, stats of player A from clean_player_stats)
+    alignment: align_seasons of both players' stats, computed once per pair by the caller drawing all of its charts
     Comparison options:
     - 'Tackles' Comparisons: ["Tackles - Tackles", "Tackles - Tackles Won", "Tackles - Def 3rd", "Tackles - Mid 3rd", "Tackles - Att 3rd", "Tackles Area Stack"]
     - 'Vs Dribbles' Comparisons: ["Vs Dribbles - Dribblers Tackled", "Vs Dribbles - Tackle Attempt Against Dribblers", "Vs Dribbles - Tackles Against Dribblers %", "Vs Dribbles - Dribbled Past", "Tackle Attempts Against Dribblers Stack"]
     - 'Pressures' Comparisons: ["Pressures - Press Attempts", "Pressures - Press Successes", "Pressures - Press Success %", "Pressures Stack", "Pressures - Press in Def 3rd", "Pressures - Press in Mid 3rd", "Pressures - Press in Att 3rd", "Pressures Area Stack"]
     - 'Blocks' Comparisons: ["Blocks - Blocks Made", "Blocks - Shots Blocked", "Blocks - Shots on Target Blocked", "Blocks - Passes Blocked"]
     - 'Other' Comparisons: ["Interceptions", "Tackles + Interceptions", "Clearences", "Errors Leading to Opponent's Shots"]
+    Returns None for the comparisons of DEF_ACTS_OPTIONAL_COLUMNS when either player's page lacks their columns.
   """
   # initialize category and comparison
   if comparison not in ["Tackles - Tackles", "Tackles - Tackles Won", "Tackles - Def 3rd", "Tackles - Mid 3rd", "Tackles - Att 3rd", "Tackles Area Stack"] + ["Vs Dribbles - Dribblers Tackled", "Vs Dribbles - Tackle Attempt Against Dribblers", "Vs Dribbles - Tackles Against Dribblers %", "Vs Dribbles - Dribbled Past", "Tackle Attempts Against Dribblers Stack"] + ["Pressures - Press Attempts", "Pressures - Press Successes", "Pressures - Press Success %", "Pressures Stack", "Pressures - Press in Def 3rd", "Pressures - Press in Mid 3rd", "Pressures - Press in Att 3rd", "Pressures Area Stack"] + ["Blocks - Blocks Made", "Blocks - Shots Blocked", "Blocks - Shots on Target Blocked", "Blocks - Passes Blocked"] + ["Interceptions", "Tackles + Interceptions", "Clearences", "Errors Leading to Opponent's Shots"]:
@@ -809,280 +846,398 @@ def compare_def_acts_stats_players(player_A_set:tuple, player_B_set:tuple, compa
     return
 
   # unpack the tuple
-  player_A, table_A = player_A_set
-  player_B, table_B = player_B_set
-  table_A = table_A.copy()
-  table_B = table_B.copy()
-  
-  # set axis for season length
-  X_axis_A = np.arange(len(table_A.index))
-  X_axis_B = np.arange(len(table_B.index))
-
-  # get the fewest number of seasons recorded between two players to get similar comparisons
-  season_len = len(X_axis_A) if len(X_axis_A) <= len(X_axis_B) else len(X_axis_B)
-  X_axis = np.arange(season_len)
+  player_A, stats_A = player_A_set
+  player_B, stats_B = player_B_set
 
-  # cut the table rows
-  table_A = table_A[-season_len:].copy()
-  table_B = table_B[-season_len:].copy()
+  # seasons of both players, from the first season of the player who started later to get similar comparisons
+  if alignment is None:
+    alignment = align_seasons(stats_A, stats_B)
+  seasons = alignment.since_latest_debut()
 
   # all the metrics except tackles won and interceptions only recorded 5 seasons prior (since 2017-2018, code is created at Mei, 2022)
-  table_A = table_A[-5:].copy()
-  table_B = table_B[-5:].copy()
-  X_axis = np.arange(len(table_A.index))
+  seasons = seasons.last(5)
   
   # if the number of last few seasons is provided
   if last_few_seasons != None:
     if not isinstance(last_few_seasons, int):
       print("Please provide integer to specify last few seasons")
       return
-    table_A = table_A[-last_few_seasons:].copy()
-    table_B = table_B[-last_few_seasons:].copy()
-    X_axis = np.arange(len(table_A.index))
+    seasons = seasons.last(last_few_seasons)
 
-  # initialize figure
-  plt.switch_backend('AGG')
-  plt.figure(figsize=(10, 6))
+  table_A, table_B = seasons.tables("defense:")
 
-  # get the rows where the seasons are recorded for both players
-  index = table_A.index
-  plt.xticks(X_axis, index, rotation=30, fontsize=12)
-  plt.xlabel("Seasons", size=12)
+  # no chart when the page of either player lacks its columns
+  for col in DEF_ACTS_OPTIONAL_COLUMNS.get(comparison, []):
+    if col not in table_A or col not in table_B:
+      return None
+
+  # initialize chart, a player without a row for a season has no bar above its label
+  chart = Chart(seasons.seasons, comparison, xlabel_size=12)
 
   # Tackles Sections
   if comparison == "Tackles - Tackles":
-    plt.bar(X_axis - 0.2, table_A['Tackles - Tkl'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tackles - Tkl'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles Made", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles Made per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - Tkl'], label=player_A)
+    chart.bar(0.2, table_B['Tackles - Tkl'], label=player_B)
+    chart.ylabel = "Tackles Made"
+    chart.title = "Tackles Made per Season"
 
   elif comparison == "Tackles - Tackles Won":
-    plt.bar(X_axis - 0.2, table_A['Tackles - TklW'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tackles - TklW'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles Won", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles Won per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - TklW'], label=player_A)
+    chart.bar(0.2, table_B['Tackles - TklW'], label=player_B)
+    chart.ylabel = "Tackles Won"
+    chart.title = "Tackles Won per Season"
 
   elif comparison == "Tackles - Tackles Won %":
     table_A['Tackles - Tackles Won %'] = (table_A['Tackles - Tackles Won'] / table_A['Tackles - Tackles']) * 100
     table_B['Tackles - Tackles Won %'] = (table_B['Tackles - Tackles Won'] / table_B['Tackles - Tackles']) * 100
-    plt.bar(X_axis - 0.2, table_A['Tackles - Tackles Won %'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tackles - Tackles Won %'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles Won %", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles Won % per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - Tackles Won %'], label=player_A)
+    chart.bar(0.2, table_B['Tackles - Tackles Won %'], label=player_B)
+    chart.ylabel = "Tackles Won %"
+    chart.title = "Tackles Won % per Season"
 
   elif comparison == "Tackles - Def 3rd":
-    plt.bar(X_axis - 0.2, table_A['Tackles - Def 3rd'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tackles - Def 3rd'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles in Defensive 3rd", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles in Defensive 3rd per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - Def 3rd'], label=player_A)
+    chart.bar(0.2, table_B['Tackles - Def 3rd'], label=player_B)
+    chart.ylabel = "Tackles in Defensive 3rd"
+    chart.title = "Tackles in Defensive 3rd per Season"
     
   elif comparison == "Tackles - Mid 3rd":
-    plt.bar(X_axis - 0.2, table_A['Tackles - Mid 3rd'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tackles - Mid 3rd'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles in Middle 3rd", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles in Middle 3rd per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - Mid 3rd'], label=player_A)
+    chart.bar(0.2, table_B['Tackles - Mid 3rd'], label=player_B)
+    chart.ylabel = "Tackles in Middle 3rd"
+    chart.title = "Tackles in Middle 3rd per Season"
     
   elif comparison == "Tackles - Att 3rd":
-    plt.bar(X_axis - 0.2, table_A['Tackles - Att 3rd'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tackles - Att 3rd'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles in Attacking 3rd", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles in Attacking 3rd per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - Att 3rd'], label=player_A)
+    chart.bar(0.2, table_B['Tackles - Att 3rd'], label=player_B)
+    chart.ylabel = "Tackles in Attacking 3rd"
+    chart.title = "Tackles in Attacking 3rd per Season"
 
   elif comparison == "Tackles Area Stack":
-    plt.bar(X_axis - 0.2, table_A['Tackles - Def 3rd'], width = 0.4, label = player_A + ' Tackles in Defensive 3rd')
-    plt.bar(X_axis - 0.2, table_A['Tackles - Mid 3rd'], bottom = table_A["Tackles - Def 3rd"], width = 0.4, label = player_A + ' Tackles in Middle Third')
-    plt.bar(X_axis - 0.2, table_A['Tackles - Att 3rd'], bottom = (table_A["Tackles - Def 3rd"] + table_A["Tackles - Mid 3rd"]), width = 0.4, label = player_A + ' Tackles in Attacking 3rd')
-    plt.bar(X_axis + 0.2, table_B['Tackles - Def 3rd'], width = 0.4, label = player_B + ' Tackles in Defensive 3rd')
-    plt.bar(X_axis + 0.2, table_B['Tackles - Mid 3rd'], bottom = table_B["Tackles - Def 3rd"], width = 0.4, label = player_B + ' Tackles in Middle Third')
-    plt.bar(X_axis + 0.2, table_B['Tackles - Att 3rd'], bottom = (table_B["Tackles - Def 3rd"] + table_B["Tackles - Mid 3rd"]), width = 0.4, label = player_B + ' Tackles in Attacking 3rd')
-    plt.ylabel("Tackles Made", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles Made in 3 Different Areas per Season", size=18)
+    chart.bar(-0.2, table_A['Tackles - Def 3rd'], label=player_A + ' Tackles in Defensive 3rd')
+    chart.bar(-0.2, table_A['Tackles - Mid 3rd'], bottom=table_A["Tackles - Def 3rd"], label=player_A + ' Tackles in Middle Third')
+    chart.bar(-0.2, table_A['Tackles - Att 3rd'], bottom=(table_A["Tackles - Def 3rd"] + table_A["Tackles - Mid 3rd"]), label=player_A + ' Tackles in Attacking 3rd')
+    chart.bar(0.2, table_B['Tackles - Def 3rd'], label=player_B + ' Tackles in Defensive 3rd')
+    chart.bar(0.2, table_B['Tackles - Mid 3rd'], bottom=table_B["Tackles - Def 3rd"], label=player_B + ' Tackles in Middle Third')
+    chart.bar(0.2, table_B['Tackles - Att 3rd'], bottom=(table_B["Tackles - Def 3rd"] + table_B["Tackles - Mid 3rd"]), label=player_B + ' Tackles in Attacking 3rd')
+    chart.ylabel = "Tackles Made"
+    chart.title = "Tackles Made in 3 Different Areas per Season"
 
   # Vs Dribbles Section
   elif comparison == "Vs Dribbles - Dribblers Tackled":
-    plt.bar(X_axis - 0.2, table_A['Vs Dribbles - Tkl'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Vs Dribbles - Tkl'], width = 0.4, label = player_B)
-    plt.ylabel("Dribblers Tackled", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Dribblers Tackled per Season", size=18)
+    chart.bar(-0.2, table_A['Vs Dribbles - Tkl'], label=player_A)
+    chart.bar(0.2, table_B['Vs Dribbles - Tkl'], label=player_B)
+    chart.ylabel = "Dribblers Tackled"
+    chart.title = "Dribblers Tackled per Season"
   
   elif comparison == "Vs Dribbles - Tackle Attempt Against Dribblers":
-    plt.bar(X_axis - 0.2, table_A['Vs Dribbles - Att'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Vs Dribbles - Att'], width = 0.4, label = player_B)
-    plt.ylabel("Tackle Attempts Against Dribblers", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackle Attempts Against Dribblers per Season", size=18)
+    chart.bar(-0.2, table_A['Vs Dribbles - Att'], label=player_A)
+    chart.bar(0.2, table_B['Vs Dribbles - Att'], label=player_B)
+    chart.ylabel = "Tackle Attempts Against Dribblers"
+    chart.title = "Tackle Attempts Against Dribblers per Season"
   
   elif comparison == "Vs Dribbles - Tackles Against Dribblers %":
-    plt.bar(X_axis - 0.2, table_A['Vs Dribbles - Tkl%'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Vs Dribbles - Tkl%'], width = 0.4, label = player_B)
-    plt.ylabel("Tackle Against Dribblers Success Rate", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackle Against Dribblers Success Rate per Season", size=18)
+    chart.bar(-0.2, table_A['Vs Dribbles - Tkl%'], label=player_A)
+    chart.bar(0.2, table_B['Vs Dribbles - Tkl%'], label=player_B)
+    chart.ylabel = "Tackle Against Dribblers Success Rate"
+    chart.title = "Tackle Against Dribblers Success Rate per Season"
   
   elif comparison == "Vs Dribbles - Dribbled Past":
-    plt.bar(X_axis - 0.2, table_A['Vs Dribbles - Past'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Vs Dribbles - Past'], width = 0.4, label = player_B)
-    plt.ylabel("Dribbled Past", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Dribbled Past per Season", size=18)
+    chart.bar(-0.2, table_A['Vs Dribbles - Past'], label=player_A)
+    chart.bar(0.2, table_B['Vs Dribbles - Past'], label=player_B)
+    chart.ylabel = "Dribbled Past"
+    chart.title = "Dribbled Past per Season"
   
   elif comparison == "Tackle Attempts Against Dribblers Stack":
-    plt.bar(X_axis - 0.2, table_A['Vs Dribbles - Past'], width = 0.4, label = player_A + ' Dribbled Past')
-    plt.bar(X_axis - 0.2, table_A['Vs Dribbles - Tkl'], bottom = table_A["Vs Dribbles - Past"], width = 0.4, label = player_A + ' Tackles Won vs Dribblers')
-    plt.bar(X_axis + 0.2, table_B['Vs Dribbles - Past'], width = 0.4, label = player_B + ' Dribbled Past')
-    plt.bar(X_axis + 0.2, table_B['Vs Dribbles - Tkl'], bottom = table_B["Vs Dribbles - Past"], width = 0.4, label = player_B + ' Tackles Won vs Dribblers')
-    plt.ylabel("Tackles vs Dribblers", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackle vs Dribblers per Season", size=18)
+    chart.bar(-0.2, table_A['Vs Dribbles - Past'], label=player_A + ' Dribbled Past')
+    chart.bar(-0.2, table_A['Vs Dribbles - Tkl'], bottom=table_A["Vs Dribbles - Past"], label=player_A + ' Tackles Won vs Dribblers')
+    chart.bar(0.2, table_B['Vs Dribbles - Past'], label=player_B + ' Dribbled Past')
+    chart.bar(0.2, table_B['Vs Dribbles - Tkl'], bottom=table_B["Vs Dribbles - Past"], label=player_B + ' Tackles Won vs Dribblers')
+    chart.ylabel = "Tackles vs Dribblers"
+    chart.title = "Tackle vs Dribblers per Season"
     
   # Pressures Section
   elif comparison == "Pressures - Press Attempts":
-    plt.bar(X_axis - 0.2, table_A['Pressures - Press'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Pressures - Press'], width = 0.4, label = player_B)
-    plt.ylabel("Press Attempts", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Press Attempts per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Press'], label=player_A)
+    chart.bar(0.2, table_B['Pressures - Press'], label=player_B)
+    chart.ylabel = "Press Attempts"
+    chart.title = "Press Attempts per Season"
   
   elif comparison == "Pressures - Press Successes":
-    plt.bar(X_axis - 0.2, table_A['Pressures - Succ'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Pressures - Succ'], width = 0.4, label = player_B)
-    plt.ylabel("Pressing Success", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressing Success per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Succ'], label=player_A)
+    chart.bar(0.2, table_B['Pressures - Succ'], label=player_B)
+    chart.ylabel = "Pressing Success"
+    chart.title = "Pressing Success per Season"
   
   elif comparison == "Pressures - Press Success %":
-    plt.bar(X_axis - 0.2, table_A['Pressures - %'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Pressures - %'], width = 0.4, label = player_B)
-    plt.ylabel("Pressing Success Rate", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressing Success Rate per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - %'], label=player_A)
+    chart.bar(0.2, table_B['Pressures - %'], label=player_B)
+    chart.ylabel = "Pressing Success Rate"
+    chart.title = "Pressing Success Rate per Season"
   
   elif comparison == "Pressures Stack":
     table_A['Pressures - Press_Fails'] = table_A["Pressures - Press"] - table_A["Pressures - Succ"]
     table_B['Pressures - Press_Fails'] = table_B["Pressures - Press"] - table_B["Pressures - Succ"]
-    plt.bar(X_axis - 0.2, table_A['Pressures - Press_Fails'], width = 0.4, label = player_A + ' Pressures Fail')
-    plt.bar(X_axis - 0.2, table_A['Pressures - Succ'], bottom = table_A["Pressures - Press_Fails"], width = 0.4, label = player_A + ' Pressures Success')
-    plt.bar(X_axis + 0.2, table_B['Pressures - Press_Fails'], width = 0.4, label = player_B + ' Pressures Fail')
-    plt.bar(X_axis + 0.2, table_B['Pressures - Succ'], bottom = table_B["Pressures - Press_Fails"], width = 0.4, label = player_B + ' Pressures Success')
-    plt.ylabel("Pressures", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressures per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Press_Fails'], label=player_A + ' Pressures Fail')
+    chart.bar(-0.2, table_A['Pressures - Succ'], bottom=table_A["Pressures - Press_Fails"], label=player_A + ' Pressures Success')
+    chart.bar(0.2, table_B['Pressures - Press_Fails'], label=player_B + ' Pressures Fail')
+    chart.bar(0.2, table_B['Pressures - Succ'], bottom=table_B["Pressures - Press_Fails"], label=player_B + ' Pressures Success')
+    chart.ylabel = "Pressures"
+    chart.title = "Pressures per Season"
   
   elif comparison == "Pressures - Press in Def 3rd":
-    plt.bar(X_axis - 0.2, table_A['Pressures - Def 3rd'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Pressures - Def 3rd'], width = 0.4, label = player_B)
-    plt.ylabel("Pressures in Defensive 3rd", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressures in Defensive 3rd per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Def 3rd'], label=player_A)
+    chart.bar(0.2, table_B['Pressures - Def 3rd'], label=player_B)
+    chart.ylabel = "Pressures in Defensive 3rd"
+    chart.title = "Pressures in Defensive 3rd per Season"
   
   elif comparison == "Pressures - Press in Mid 3rd":
-    plt.bar(X_axis - 0.2, table_A['Pressures - Mid 3rd'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Pressures - Mid 3rd'], width = 0.4, label = player_B)
-    plt.ylabel("Pressures in Middle 3rd", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressures in Middle 3rd per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Mid 3rd'], label=player_A)
+    chart.bar(0.2, table_B['Pressures - Mid 3rd'], label=player_B)
+    chart.ylabel = "Pressures in Middle 3rd"
+    chart.title = "Pressures in Middle 3rd per Season"
   
   elif comparison == "Pressures - Press in Att 3rd":
-    plt.bar(X_axis - 0.2, table_A['Pressures - Att 3rd'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Pressures - Att 3rd'], width = 0.4, label = player_B)
-    plt.ylabel("Pressures in Attacking 3rd", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressures in Attacking 3rd per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Att 3rd'], label=player_A)
+    chart.bar(0.2, table_B['Pressures - Att 3rd'], label=player_B)
+    chart.ylabel = "Pressures in Attacking 3rd"
+    chart.title = "Pressures in Attacking 3rd per Season"
   
   elif comparison == "Pressures Area Stack":
-    plt.bar(X_axis - 0.2, table_A['Pressures - Def 3rd'], width = 0.4, label = player_A + ' Pressures in Defensive 3rd')
-    plt.bar(X_axis - 0.2, table_A['Pressures - Mid 3rd'], bottom = table_A["Pressures - Def 3rd"], width = 0.4, label = player_A + ' Pressures in Middle Third')
-    plt.bar(X_axis - 0.2, table_A['Pressures - Att 3rd'], bottom = (table_A["Pressures - Def 3rd"] + table_A["Pressures - Mid 3rd"]), width = 0.4, label = player_A + ' Pressures in Attacking 3rd')
-    plt.bar(X_axis + 0.2, table_B['Pressures - Def 3rd'], width = 0.4, label = player_B + ' Pressures in Defensive 3rd')
-    plt.bar(X_axis + 0.2, table_B['Pressures - Mid 3rd'], bottom = table_B["Pressures - Def 3rd"], width = 0.4, label = player_B + ' Pressures in Middle Third')
-    plt.bar(X_axis + 0.2, table_B['Pressures - Att 3rd'], bottom = (table_B["Pressures - Def 3rd"] + table_B["Pressures - Mid 3rd"]), width = 0.4, label = player_B + ' Pressures in Attacking 3rd')
-    plt.ylabel("Pressures Made", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Pressures Made in 3 Different Areas per Season", size=18)
+    chart.bar(-0.2, table_A['Pressures - Def 3rd'], label=player_A + ' Pressures in Defensive 3rd')
+    chart.bar(-0.2, table_A['Pressures - Mid 3rd'], bottom=table_A["Pressures - Def 3rd"], label=player_A + ' Pressures in Middle Third')
+    chart.bar(-0.2, table_A['Pressures - Att 3rd'], bottom=(table_A["Pressures - Def 3rd"] + table_A["Pressures - Mid 3rd"]), label=player_A + ' Pressures in Attacking 3rd')
+    chart.bar(0.2, table_B['Pressures - Def 3rd'], label=player_B + ' Pressures in Defensive 3rd')
+    chart.bar(0.2, table_B['Pressures - Mid 3rd'], bottom=table_B["Pressures - Def 3rd"], label=player_B + ' Pressures in Middle Third')
+    chart.bar(0.2, table_B['Pressures - Att 3rd'], bottom=(table_B["Pressures - Def 3rd"] + table_B["Pressures - Mid 3rd"]), label=player_B + ' Pressures in Attacking 3rd')
+    chart.ylabel = "Pressures Made"
+    chart.title = "Pressures Made in 3 Different Areas per Season"
   
   # Blocks Section
   elif comparison == "Blocks - Blocks Made":
-    plt.bar(X_axis - 0.2, table_A['Blocks - Blocks'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Blocks - Blocks'], width = 0.4, label = player_B)
-    plt.ylabel("Blocks Made", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Blocks Made per Season", size=18)
+    chart.bar(-0.2, table_A['Blocks - Blocks'], label=player_A)
+    chart.bar(0.2, table_B['Blocks - Blocks'], label=player_B)
+    chart.ylabel = "Blocks Made"
+    chart.title = "Blocks Made per Season"
   
   elif comparison == "Blocks - Shots Blocked":
-    plt.bar(X_axis - 0.2, table_A['Blocks - Sh'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Blocks - Sh'], width = 0.4, label = player_B)
-    plt.ylabel("Shots Blocked", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots Blocked per Season", size=18)
+    chart.bar(-0.2, table_A['Blocks - Sh'], label=player_A)
+    chart.bar(0.2, table_B['Blocks - Sh'], label=player_B)
+    chart.ylabel = "Shots Blocked"
+    chart.title = "Shots Blocked per Season"
   
   elif comparison == "Blocks - Shots on Target Blocked":
-    plt.bar(X_axis - 0.2, table_A['Blocks - ShSv'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Blocks - ShSv'], width = 0.4, label = player_B)
-    plt.ylabel("Shots on Target Blocked", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Shots on Target Blocked per Season", size=18)
+    chart.bar(-0.2, table_A['Blocks - ShSv'], label=player_A)
+    chart.bar(0.2, table_B['Blocks - ShSv'], label=player_B)
+    chart.ylabel = "Shots on Target Blocked"
+    chart.title = "Shots on Target Blocked per Season"
   
   elif comparison == "Blocks - Passes Blocked":
-    plt.bar(X_axis - 0.2, table_A['Blocks - Pass'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Blocks - Pass'], width = 0.4, label = player_B)
-    plt.ylabel("Passes Blocked", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Passes Blocked per Season", size=18)
+    chart.bar(-0.2, table_A['Blocks - Pass'], label=player_A)
+    chart.bar(0.2, table_B['Blocks - Pass'], label=player_B)
+    chart.ylabel = "Passes Blocked"
+    chart.title = "Passes Blocked per Season"
   
   # Other Section
   elif comparison == "Interceptions":
-    plt.bar(X_axis - 0.2, table_A['Int'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Int'], width = 0.4, label = player_B)
-    plt.ylabel("Interceptions Made", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Interceptions Made per Season", size=18)
+    chart.bar(-0.2, table_A['Int'], label=player_A)
+    chart.bar(0.2, table_B['Int'], label=player_B)
+    chart.ylabel = "Interceptions Made"
+    chart.title = "Interceptions Made per Season"
   
   elif comparison == "Tackles + Interceptions":
-    plt.bar(X_axis - 0.2, table_A['Tkl+Int'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Tkl+Int'], width = 0.4, label = player_B)
-    plt.ylabel("Tackles + Interceptions Made", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Tackles + Interceptions Made per Season", size=18)
+    chart.bar(-0.2, table_A['Tkl+Int'], label=player_A)
+    chart.bar(0.2, table_B['Tkl+Int'], label=player_B)
+    chart.ylabel = "Tackles + Interceptions Made"
+    chart.title = "Tackles + Interceptions Made per Season"
   
   elif comparison == "Clearences":
-    plt.bar(X_axis - 0.2, table_A['Clr'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Clr'], width = 0.4, label = player_B)
-    plt.ylabel("Clearences", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Clearences per Season", size=18)
+    chart.bar(-0.2, table_A['Clr'], label=player_A)
+    chart.bar(0.2, table_B['Clr'], label=player_B)
+    chart.ylabel = "Clearences"
+    chart.title = "Clearences per Season"
   
   elif comparison == "Errors Leading to Opponent's Shots":
-    plt.bar(X_axis - 0.2, table_A['Err'], width = 0.4, label = player_A)
-    plt.bar(X_axis + 0.2, table_B['Err'], width = 0.4, label = player_B)
-    plt.ylabel("Errors Leading to Shots", size=12)
-    plt.yticks(fontsize=12)
-    plt.title("Errors Leading to Shots per Season", size=18)
-  
-  plt.legend(loc='best', framealpha=0.5)
-  
-  # adjusts the size of the chart to the size of the figure
-  plt.tight_layout()
-  
-  # get the bytes data
-  chart = get_graph()
+    chart.bar(-0.2, table_A['Err'], label=player_A)
+    chart.bar(0.2, table_B['Err'], label=player_B)
+    chart.ylabel = "Errors Leading to Shots"
+    chart.title = "Errors Leading to Shots per Season"
   
   return chart
 
 
-def get_graph():
-  buffer = io.BytesIO()
-  plt.savefig(buffer, format='png')
-  buffer.seek(0)
-  image_png = buffer.getvalue()
-  graph = base64.b64encode(image_png)
-  graph = graph.decode('utf-8')
-  buffer.close()
-  return graph
\ No newline at end of file
+"""
+    CHARTS OF THE COMPARE PAGE
+"""
+
+# chart builder and comparisons of every table option of the compare page, in the order of the page
+COMPARISONS = {
+  "standard_stats": (get_standard_stats_chart, [
+    "Minutes Played", "Starts", "Matches Played", "90s", "Starts Stack",
+    "xG", "npxG", "xA", "npxG+xA",
+  ]),
+  "shooting_stats": (get_shooting_stats_chart, [
+    "Goals", "Shoot", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT", "Dist", "Goals Stack",
+    "xG", "npxG", "npxG/Sh", "G-xG", "np:G-xG",
+  ]),
+  "passing_stats": (get_passing_stats_chart, [
+    "Total - Passes Completed", "Total - Passes Attempted", "Total - Pass Completion %", "Total - Total Passes Distance", "Total - Progessive Passes Distance", "Total Passes Stack",
+    "Short - Passes Completed", "Short - Passes Attempted", "Short - Pass Completion %",
+    "Medium - Passes Completed", "Medium - Passes Attempted", "Medium - Pass Completion %",
+    "Long - Passes Completed", "Long - Passes Attempted", "Long - Pass Completion %",
+    "Assists", "xA", "A-xA", "Key Passes", "Final Third Passes", "Passes into Penalty Area", "Crosses into Penalty Area", "Progressive Passes",
+  ]),
+  "defensive_actions_stats": (get_def_acts_stats_chart, [
+    "Tackles - Tackles", "Tackles - Tackles Won", "Tackles - Def 3rd", "Tackles - Mid 3rd", "Tackles - Att 3rd", "Tackles Area Stack",
+    "Vs Dribbles - Dribblers Tackled", "Vs Dribbles - Tackle Attempt Against Dribblers", "Vs Dribbles - Tackles Against Dribblers %", "Vs Dribbles - Dribbled Past", "Tackle Attempts Against Dribblers Stack",
+    "Pressures - Press Attempts", "Pressures - Press Successes", "Pressures - Press Success %", "Pressures Stack", "Pressures - Press in Def 3rd", "Pressures - Press in Mid 3rd", "Pressures - Press in Att 3rd", "Pressures Area Stack",
+    "Blocks - Blocks Made", "Blocks - Shots Blocked", "Blocks - Shots on Target Blocked", "Blocks - Passes Blocked",
+    "Interceptions", "Tackles + Interceptions", "Clearences", "Errors Leading to Opponent's Shots",
+  ]),
+}
+
+
+# namespace of the stats frame the charts of every table option read their columns from
+TABLE_OPT_NAMESPACES = {
+  "standard_stats": "standard",
+  "shooting_stats": "shooting",
+  "passing_stats": "passing",
+  "defensive_actions_stats": "defense",
+}
+
+
+def has_table(stats, table_opt):
+  """ Whether the player's page had the stats table of the table option, fbref only has standard stats for some leagues """
+  prefix = TABLE_OPT_NAMESPACES[table_opt] + ':'
+  return any(col.startswith(prefix) for col in stats.columns)
+
+
+def get_metric_id(table_opt, comparison):
+  """ Name of a comparison in the URL of its chart, e.g. 'shooting-sot90' for the 'SoT/90' comparison of 'shooting_stats' """
+  # 'SoT%' would otherwise share the id of 'SoT'
+  return table_opt.replace('_stats', '') + '-' + slugify(comparison.replace('%', ' pct'))
+
+
+# (table option, comparison) of every metric id
+CHART_METRICS = {
+  get_metric_id(table_opt, comparison): (table_opt, comparison)
+  for table_opt, (get_chart, comparisons) in COMPARISONS.items()
+  for comparison in comparisons
+}
+
+
+def get_comparison_chart(player_A_set, player_B_set, metric, last_few_seasons=None, alignment=None):
+  """ Chart of a metric id of CHART_METRICS, None when the players lack its columns """
+  table_opt, comparison = CHART_METRICS[metric]
+  if not has_table(player_A_set[1], table_opt) or not has_table(player_B_set[1], table_opt):
+    return None
+  get_chart = COMPARISONS[table_opt][0]
+  return get_chart(player_A_set, player_B_set, comparison=comparison, last_few_seasons=last_few_seasons, alignment=alignment)
+
+
+def get_comparison_charts(player_A_set, player_B_set, table_opt, last_few_seasons=None, alignment=None):
+  """
+    [(metric id, chart)] of every comparison of a table option, leaving out the charts the players lack the columns of,
+    empty when the page of either player has no stats table of the table option
+  """
+  get_chart, comparisons = COMPARISONS[table_opt]
+  charts = []
+  if not has_table(player_A_set[1], table_opt) or not has_table(player_B_set[1], table_opt):
+    return charts
+  for comparison in comparisons:
+    chart = get_chart(player_A_set, player_B_set, comparison=comparison, last_few_seasons=last_few_seasons, alignment=alignment)
+    if chart is not None:
+      charts.append((get_metric_id(table_opt, comparison), chart))
+  return charts
+
+
+def get_graph(chart):
+  """ PNG of the chart encoded in base64 for a data URI, None when there is no chart """
+  if chart is None:
+    return None
+  return base64.b64encode(render_chart(chart)).decode('utf-8')
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+  global _render_pool
+  if _render_pool is None:
+    with _render_pool_lock:
+      if _render_pool is None:
+        config = settings.FBREF_RENDER_POOL
+        _render_pool = WorkerPool('render', config['WORKERS'], config['MAX_PENDING'], max_jobs=config['MAX_JOBS'])
+  return _render_pool
+
+
+def get_chart_images(charts, player_ids=None, last_few_seasons=None):
+  """
+    render_chart of every chart, the charts missing from the chart cache are drawn in the render pool at once.
+    Images are only cached when the ids of the compared players are given.
+    A chart the pool fails to draw within JOB_TIMEOUT seconds is None like the charts without data,
+    raises WorkerPoolBusy when the pool has no place for the charts.
+  """
+  keys = [None] * len(charts)
+  images = [None] * len(charts)
+  if player_ids is not None:
+    for position, chart in enumerate(charts):
+      if chart is not None:
+        keys[position] = get_chart_key(player_ids, chart.name, last_few_seasons, CHART_STYLE, get_chart_digest(chart))
+        images[position] = get_cached_chart(keys[position])
+
+  missing = [position for position, chart in enumerate(charts) if chart is not None and images[position] is None]
+  for position, image in zip(missing, render_charts([charts[position] for position in missing])):
+    images[position] = image
+    if image is not None and keys[position] is not None:
+      cache_chart(keys[position], image)
+  return images
+
+
+def render_charts(charts):
+  """ render_chart of every chart in the render pool, None for the charts not drawn within JOB_TIMEOUT seconds """
+  config = settings.FBREF_RENDER_POOL
+  if not config['WORKERS']:
+    return [render_chart(chart) for chart in charts]
+
+  pool = get_render_pool()
+  jobs = []
+  try:
+    for chart in charts:
+      deadline = time.monotonic() + config['JOB_TIMEOUT']
+      jobs.append((deadline, pool.submit(render_chart, chart, timeout=config['TIMEOUT'])))
+  except WorkerPoolBusy:
+    for deadline, future in jobs:
+      future.cancel()
+    raise
+
+  images = []
+  errors = []
+  for deadline, future in jobs:
+    try:
+      images.append(future.result(timeout=max(0, deadline - time.monotonic())))
+    except (FutureTimeoutError, BrokenProcessPool) as e:
+      # a chart still waiting for a worker is dropped, a running one finishes in the background
+      future.cancel()
+      errors.append(e)
+      images.append(None)
+  if errors:
+    logger.warning("%d of %d charts not drawn in time: %r", len(errors), len(charts), errors[0])
+  return images
+
+
+def compare_standard_stats_players(player_A_set: tuple, player_B_set: tuple, comparison='Minutes Played', last_few_seasons=None, alignment=None):
+  return get_graph(get_standard_stats_chart(player_A_set, player_B_set, comparison, last_few_seasons, alignment))
+
+
+def compare_shooting_stats_players(player_A_set:tuple, player_B_set:tuple, comparison:str='Goals', last_few_seasons:int=None, alignment=None):
+  return get_graph(get_shooting_stats_chart(player_A_set, player_B_set, comparison, last_few_seasons, alignment))
+
+
+def compare_passing_stats_players(player_A_set:tuple, player_B_set:tuple, comparison:str=None, last_few_seasons:int=None, alignment=None):
+  return get_graph(get_passing_stats_chart(player_A_set, player_B_set, comparison, last_few_seasons, alignment))
+
+
+def compare_def_acts_stats_players(player_A_set:tuple, player_B_set:tuple, comparison:str=None, last_few_seasons:int=None, alignment=None):
+  return get_graph(get_def_acts_stats_chart(player_A_set, player_B_set, comparison, last_few_seasons, alignment))
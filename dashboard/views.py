@@ -1,250 +1,334 @@
-from django.http import HttpResponse, JsonResponse
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.http import parse_etags, urlencode
 
 from .utils import *
+from .models import PlayerPopularity
+from .ratelimit import RateLimitTimeout
+from .charts import get_chart_data
+from .schema import SchemaDriftError
 from .database.ID_VAL_PAIRS import PLAYERS
 from .database.DB import DB
 
 import time
+import json
+import asyncio
+import hashlib
+import functools
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# failures of scraping a page that is not cached
+FBREF_ERRORS = (RateLimitTimeout, FetchError, requests.RequestException, httpx.HTTPError)
+
+# name of every player id, as in the compare query string
+PLAYER_NAMES = dict(PLAYERS)
 
 
 def index(request):
     return render(request, 'dashboard/index.html')
 
 
-def compare(request, table_opt=None):
+def get_compare_options(request):
+    """ Returns (player_1_name, player_2_name, table_opt, last_few_seasons) from the query string """
     player_1_name = request.GET.get('player_1')
     player_2_name = request.GET.get('player_2')
     table_opt = request.GET.get('table_opt')
+    return player_1_name, player_2_name, table_opt, get_last_few_seasons(request)
+
+
+def get_last_few_seasons(request):
     try:
-        last_few_seasons = int(request.GET.get('last_few_seasons'))
+        return int(request.GET.get('last_few_seasons'))
     except:
-        last_few_seasons = None
-    
-    # if no player provided
-    if player_1_name == None or player_2_name == None:
-        return render(request, 'dashboard/compare.html')
-    
+        return None
+
+
+def get_players_ids(player_1_name, player_2_name):
     # get the player id
     for player in PLAYERS:
         if player[1] == player_1_name:
             player_1_id = player[0]
         if player[1] == player_2_name:
             player_2_id = player[0]
+    return player_1_id, player_2_id
+
+
+def record_players_requests(players):
+    # the cache warmer refreshes the most requested players first
+    for player_id, player_name in players:
+        PlayerPopularity.record(player_id, player_name)
+
+
+# lifetime of a chart image behind a versioned URL (see get_chart_url), the URL changes with the image
+CHART_MAX_AGE = 365 * 24 * 60 * 60
+
+# context key of the charts of every table option
+VIZZES_KEYS = {
+    "standard_stats": "std_stats_vizzes",
+    "shooting_stats": "shooting_vizzes",
+    "passing_stats": "passing_vizzes",
+    "defensive_actions_stats": "def_acts_vizzes",
+}
+
+
+# title of the section of every table option
+SECTION_TITLES = {
+    "standard_stats": "Standard Statistics",
+    "shooting_stats": "Shooting Statistics",
+    "passing_stats": "Passing Statistics",
+    "defensive_actions_stats": "Defensive Actions Statistics",
+}
+
+
+def get_table_opts(table_opt):
+    # the specified table, or all categories of data
+    if table_opt == None:
+        return list(COMPARISONS)
+    return [table_opt] if table_opt in COMPARISONS else []
+
+
+def get_chart_version(chart):
+    # changes whenever the image of the chart does: with the data drawn or with the style of render_chart
+    return f"{CHART_STYLE}-{get_chart_digest(chart)}"
+
+
+def get_chart_url(player_ids, metric, chart, last_few_seasons=None):
+    """ URL of the chart view drawing the chart, versioned by the chart so browsers and proxies can keep it for good """
+    query = {"v": get_chart_version(chart)}
+    if last_few_seasons is not None:
+        query["last_few_seasons"] = last_few_seasons
+    return reverse('chart', args=[player_ids[0], player_ids[1], metric]) + '?' + urlencode(query)
+
+
+def get_compare_context(player_1_name, player_2_name, player_1_stats, player_2_stats, table_opt=None, last_few_seasons=None, player_ids=None):
+    """
+        Charts of the stats frames of both players, returns the compare.html context.
+        Charts are not drawn here: the page links the URL of every chart, drawn by the chart view when the browser loads it.
+    """
+    context = {key: [] for key in VIZZES_KEYS.values()}
     
-    # initialize list to store vizzes
-    std_stats_vizzes = []
-    shooting_vizzes = []
-    passing_vizzes = []
-    def_acts_vizzes = []
+    # struct a set, every chart reads the columns of its category from the stats frames
+    player_A_set = (player_1_name, player_1_stats)
+    player_B_set = (player_2_name, player_2_stats)
+    # the seasons of both players are joined once for all the charts
+    alignment = align_seasons(player_1_stats, player_2_stats)
     
-    # scrap players data
-    # print("Scraping 1st player...")
-    player_1_soup = scrap_player(player_1_id, player_1_name)
-    # print("1st player scraped      ")
-    # delay for 4 seconds before the next scrap to prevent excessive request in a short period of time and getting blocked
+    for table_opt in get_table_opts(table_opt):
+        for metric, chart in get_comparison_charts(player_A_set, player_B_set, table_opt, last_few_seasons, alignment):
+            context[VIZZES_KEYS[table_opt]].append(get_chart_url(player_ids, metric, chart, last_few_seasons))
+    
+    context["player_1"] = player_1_name.replace('-', ' ')
+    context["player_2"] = player_2_name.replace('-', ' ')
+    return context
+
+
+def render_compare(request, context, pages):
+    # pages may be served stale while they are refreshed, tell how old the data is
+    oldest_page = min(pages, key=lambda page: page.fetched_at)
+    context["data_fetched_at"] = datetime.fromtimestamp(oldest_page.fetched_at, tz=timezone.utc)
+    response = render(request, 'dashboard/compare.html', context)
+    response["X-Data-Age"] = int(oldest_page.age)
+    return response
+
+
+def server_busy():
+    # the parse or render pool and its queue are full, ask the client to come back instead of piling up more work
+    response = HttpResponse("Too many comparisons in progress, please try again in a moment.", status=503)
+    response["Retry-After"] = settings.FBREF_PARSE_POOL['TIMEOUT']
+    return response
+
+
+def fbref_unavailable(error):
+    # no token of the request budget freed up in time, or fbref failed, and no stale copy of the page was cached
+    logger.warning("Could not fetch from fbref: %s", error)
+    response = HttpResponse("fbref is not answering right now, please try again in a moment.", status=503)
+    response["Retry-After"] = settings.FBREF_RATE_LIMIT['TIMEOUT']
+    return response
+
+
+def layout_changed(error):
+    # retrying would fail the same way until the schema is updated for the new layout of fbref
+    logger.error("Stats tables do not match their schema: %s", error)
+    return HttpResponse("The stats of this player could not be read, fbref changed the layout of its pages.", status=502)
+
+
+# failures of scraping and processing the players' pages answered by handle_scrap_errors
+SCRAP_ERRORS = (WorkerPoolBusy, SchemaDriftError) + FBREF_ERRORS
+
+
+def get_error_response(error):
+    if isinstance(error, WorkerPoolBusy):
+        return server_busy()
+    if isinstance(error, SchemaDriftError):
+        return layout_changed(error)
+    return fbref_unavailable(error)
+
+
+def handle_scrap_errors(view):
+    """ Decorator of the views scraping players (sync or async): SCRAP_ERRORS are answered with a 503 or 502 """
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            try:
+                return await view(request, *args, **kwargs)
+            except SCRAP_ERRORS as e:
+                return get_error_response(e)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except SCRAP_ERRORS as e:
+            return get_error_response(e)
+    return wrapper
+
+
+@handle_scrap_errors
+def compare(request, table_opt=None):
+    player_1_name, player_2_name, table_opt, last_few_seasons = get_compare_options(request)
+    
+    # if no player provided
+    if player_1_name == None or player_2_name == None:
+        return render(request, 'dashboard/compare.html')
+    
+    player_1_id, player_2_id = get_players_ids(player_1_name, player_2_name)
+    record_players_requests([(player_1_id, player_1_name), (player_2_id, player_2_name)])
+    
+    # scrap both players data concurrently
+    # requests to fbref are throttled per host to prevent excessive requests in a short period of time and getting blocked
     # source: https://www.sports-reference.com/bot-traffic.html
-    # for sec in range(0, 4):
-    #     if (10-sec) == 1:
-    #         print(f"Delay remaining: {4-sec} second  ", end='\r')  
-    #     else:  
-    #         print(f"Delay remaining: {4-sec} seconds ", end='\r')
-    #     time.sleep(1)
-    # print("Scraping 2nd player...        ")
-    player_2_soup = scrap_player(player_2_id, player_2_name)
-    # print("2nd player scraped      ")
+    (player_1_page, player_1_stats), (player_2_page, player_2_stats) = scrap_players([(player_1_id, player_1_name), (player_2_id, player_2_name)])
     
-    # get specified tables
-    if table_opt == "standard_stats":
-        player_1_table = clean_standard_stats_table(get_player_table(player_1_soup))
-        player_2_table = clean_standard_stats_table(get_player_table(player_2_soup))
-        
-        # struct a set
-        player_A_set = (player_1_name, player_1_table)
-        player_B_set = (player_2_name, player_2_table)
-        
-        # plot vizzes
-        std_choices = ["Minutes Played", "Starts", "Matches Played", "90s", "Starts Stack"]
-        expected_choices = ["xG", "npxG", "xA", "npxG+xA"]
-        for choice in std_choices:
-            viz = compare_standard_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            std_stats_vizzes.append(viz)
-        for choice in expected_choices:
-            viz = compare_standard_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            std_stats_vizzes.append(viz)
-        
-    elif table_opt == "shooting_stats":
-        player_1_table = clean_shooting_stats_table(get_player_table(player_1_soup, table_category="all_stats_shooting"))
-        player_2_table = clean_shooting_stats_table(get_player_table(player_2_soup, table_category="all_stats_shooting"))
+    context = get_compare_context(player_1_name, player_2_name, player_1_stats, player_2_stats, table_opt, last_few_seasons, (player_1_id, player_2_id))
+    return render_compare(request, context, [player_1_page, player_2_page])
+
+
+# threads building the charts of async compares
+_render_executor = ThreadPoolExecutor(max_workers=settings.FBREF_RENDER_WORKERS, thread_name_prefix='render')
+
+
+@handle_scrap_errors
+async def compare_async(request, table_opt=None):
+    """ Same as compare, but waiting on fbref does not hold a worker thread """
+    player_1_name, player_2_name, table_opt, last_few_seasons = get_compare_options(request)
     
-        # struct a set
-        player_A_set = (player_1_name, player_1_table)
-        player_B_set = (player_2_name, player_2_table)
-        
-        # plot vizzes
-        sht_choices = ["Goals", "Shoot", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT", "Dist", "Goals Stack"]
-        expected_choices = ["xG", "npxG", "npxG/Sh", "G-xG", "np:G-xG"]
-        for choice in sht_choices:
-            viz = compare_shooting_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            shooting_vizzes.append(viz)
-        for choice in expected_choices:
-            viz = compare_shooting_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            shooting_vizzes.append(viz)
-            
-    elif table_opt == "passing_stats":
-        player_1_table = clean_passing_stats_table(get_player_table(player_1_soup, table_category="all_stats_passing"))
-        player_2_table = clean_passing_stats_table(get_player_table(player_2_soup, table_category="all_stats_passing"))
-        
-        # struct a set
-        player_A_set = (player_1_name, player_1_table)
-        player_B_set = (player_2_name, player_2_table)
-        
-        # plot vizzes
-        total_choices = ["Total - Passes Completed", "Total - Passes Attempted", "Total - Pass Completion %", "Total - Total Passes Distance", "Total - Progessive Passes Distance", "Total Passes Stack"]
-        short_choices = ["Short - Passes Completed", "Short - Passes Attempted", "Short - Pass Completion %"]
-        medium_choices = ["Medium - Passes Completed", "Medium - Passes Attempted", "Medium - Pass Completion %"]
-        long_choices = ["Long - Passes Completed", "Long - Passes Attempted", "Long - Pass Completion %"]
-        other_choices = ["Assists", "xA", "A-xA", "Key Passes", "Final Third Passes", "Passes into Penalty Area", "Crosses into Penalty Area", "Progressive Passes"]
-        for choice in total_choices:
-            viz = compare_passing_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in short_choices:
-            viz = compare_passing_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in medium_choices:
-            viz = compare_passing_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in long_choices:
-            viz = compare_passing_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in other_choices:
-            viz = compare_passing_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
+    # if no player provided
+    if player_1_name == None or player_2_name == None:
+        return render(request, 'dashboard/compare.html')
     
-    elif table_opt == "defensive_actions_stats":
-        player_1_table = clean_def_acts_stats_table(get_player_table(player_1_soup, table_category="all_stats_defense"))
-        player_2_table = clean_def_acts_stats_table(get_player_table(player_2_soup, table_category="all_stats_defense"))
-        
-        # struct a set
-        player_A_set = (player_1_name, player_1_table)
-        player_B_set = (player_2_name, player_2_table)
-        
-        # plot vizzes
-        tackles_choices = ["Tackles - Tackles", "Tackles - Tackles Won", "Tackles - Def 3rd", "Tackles - Mid 3rd", "Tackles - Att 3rd", "Tackles Area Stack"]
-        vs_dribbles_choices = ["Vs Dribbles - Dribblers Tackled", "Vs Dribbles - Tackle Attempt Against Dribblers", "Vs Dribbles - Tackles Against Dribblers %", "Vs Dribbles - Dribbled Past", "Tackle Attempts Against Dribblers Stack"]
-        pressures_choices = ["Pressures - Press Attempts", "Pressures - Press Successes", "Pressures - Press Success %", "Pressures Stack", "Pressures - Press in Def 3rd", "Pressures - Press in Mid 3rd", "Pressures - Press in Att 3rd", "Pressures Area Stack"]
-        blocks_choices = ["Blocks - Blocks Made", "Blocks - Shots Blocked", "Blocks - Shots on Target Blocked", "Blocks - Passes Blocked"]
-        other_choices = ["Interceptions", "Tackles + Interceptions", "Clearences", "Errors Leading to Opponent's Shots"]
-        for choice in tackles_choices:
-            viz = compare_def_acts_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in vs_dribbles_choices:
-            viz = compare_def_acts_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in pressures_choices:
-            viz = compare_def_acts_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in blocks_choices:
-            viz = compare_def_acts_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in other_choices:
-            viz = compare_def_acts_stats_players(player_A_set, player_B_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
+    player_1_id, player_2_id = get_players_ids(player_1_name, player_2_name)
+    await sync_to_async(record_players_requests)([(player_1_id, player_1_name), (player_2_id, player_2_name)])
     
-    elif table_opt == None:
-        # plot all categories of data
-        player_1_std_table = clean_standard_stats_table(get_player_table(player_1_soup))
-        player_2_std_table = clean_standard_stats_table(get_player_table(player_2_soup))
-        player_1_shooting_table = clean_shooting_stats_table(get_player_table(player_1_soup, table_category="all_stats_shooting"))
-        player_2_shooting_table = clean_shooting_stats_table(get_player_table(player_2_soup, table_category="all_stats_shooting"))
-        player_1_passing_table = clean_passing_stats_table(get_player_table(player_1_soup, table_category="all_stats_passing"))
-        player_2_passing_table = clean_passing_stats_table(get_player_table(player_2_soup, table_category="all_stats_passing"))
-        player_1_def_acts_table = clean_def_acts_stats_table(get_player_table(player_1_soup, table_category="all_stats_defense"))
-        player_2_def_acts_table = clean_def_acts_stats_table(get_player_table(player_2_soup, table_category="all_stats_defense"))
-        
-        # struct a set
-        player_A_std_set = (player_1_name, player_1_std_table)
-        player_B_std_set = (player_2_name, player_2_std_table)
-        player_A_shooting_set = (player_1_name, player_1_shooting_table)
-        player_B_shooting_set = (player_2_name, player_2_shooting_table)
-        player_A_passing_set = (player_1_name, player_1_passing_table)
-        player_B_passing_set = (player_2_name, player_2_passing_table)
-        player_A_def_acts_set = (player_1_name, player_1_def_acts_table)
-        player_B_def_acts_set = (player_2_name, player_2_def_acts_table)
-        
-        # plot std vizzes
-        std_choices = ["Minutes Played", "Starts", "Matches Played", "90s", "Starts Stack"]
-        expected_choices = ["xG", "npxG", "xA", "npxG+xA"]
-        for choice in std_choices:
-            viz = compare_standard_stats_players(player_A_std_set, player_B_std_set, comparison=choice, last_few_seasons=last_few_seasons)
-            std_stats_vizzes.append(viz)
-        for choice in expected_choices:
-            viz = compare_standard_stats_players(player_A_std_set, player_B_std_set, comparison=choice, last_few_seasons=last_few_seasons)
-            std_stats_vizzes.append(viz)
-        
-        # plot shooting vizzes
-        sht_choices = ["Goals", "Shoot", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT", "Dist", "Goals Stack"]
-        expected_choices = ["xG", "npxG", "npxG/Sh", "G-xG", "np:G-xG"]
-        for choice in sht_choices:
-            viz = compare_shooting_stats_players(player_A_shooting_set, player_B_shooting_set, comparison=choice, last_few_seasons=last_few_seasons)
-            shooting_vizzes.append(viz)
-        for choice in expected_choices:
-            viz = compare_shooting_stats_players(player_A_shooting_set, player_B_shooting_set, comparison=choice, last_few_seasons=last_few_seasons)
-            shooting_vizzes.append(viz)
-            
-        # plot passing vizzes
-        total_choices = ["Total - Passes Completed", "Total - Passes Attempted", "Total - Pass Completion %", "Total - Total Passes Distance", "Total - Progessive Passes Distance", "Total Passes Stack"]
-        short_choices = ["Short - Passes Completed", "Short - Passes Attempted", "Short - Pass Completion %"]
-        medium_choices = ["Medium - Passes Completed", "Medium - Passes Attempted", "Medium - Pass Completion %"]
-        long_choices = ["Long - Passes Completed", "Long - Passes Attempted", "Long - Pass Completion %"]
-        other_choices = ["Assists", "xA", "A-xA", "Key Passes", "Final Third Passes", "Passes into Penalty Area", "Crosses into Penalty Area", "Progressive Passes"]
-        for choice in total_choices:
-            viz = compare_passing_stats_players(player_A_passing_set, player_B_passing_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in short_choices:
-            viz = compare_passing_stats_players(player_A_passing_set, player_B_passing_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in medium_choices:
-            viz = compare_passing_stats_players(player_A_passing_set, player_B_passing_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in long_choices:
-            viz = compare_passing_stats_players(player_A_passing_set, player_B_passing_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        for choice in other_choices:
-            viz = compare_passing_stats_players(player_A_passing_set, player_B_passing_set, comparison=choice, last_few_seasons=last_few_seasons)
-            passing_vizzes.append(viz)
-        
-        # plot defensive actions vizzes
-        tackles_choices = ["Tackles - Tackles", "Tackles - Tackles Won", "Tackles - Def 3rd", "Tackles - Mid 3rd", "Tackles - Att 3rd", "Tackles Area Stack"]
-        vs_dribbles_choices = ["Vs Dribbles - Dribblers Tackled", "Vs Dribbles - Tackle Attempt Against Dribblers", "Vs Dribbles - Tackles Against Dribblers %", "Vs Dribbles - Dribbled Past", "Tackle Attempts Against Dribblers Stack"]
-        pressures_choices = ["Pressures - Press Attempts", "Pressures - Press Successes", "Pressures - Press Success %", "Pressures Stack", "Pressures - Press in Def 3rd", "Pressures - Press in Mid 3rd", "Pressures - Press in Att 3rd", "Pressures Area Stack"]
-        blocks_choices = ["Blocks - Blocks Made", "Blocks - Shots Blocked", "Blocks - Shots on Target Blocked", "Blocks - Passes Blocked"]
-        other_choices = ["Interceptions", "Tackles + Interceptions", "Clearences", "Errors Leading to Opponent's Shots"]
-        for choice in tackles_choices:
-            viz = compare_def_acts_stats_players(player_A_def_acts_set, player_B_def_acts_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in vs_dribbles_choices:
-            viz = compare_def_acts_stats_players(player_A_def_acts_set, player_B_def_acts_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in pressures_choices:
-            viz = compare_def_acts_stats_players(player_A_def_acts_set, player_B_def_acts_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in blocks_choices:
-            viz = compare_def_acts_stats_players(player_A_def_acts_set, player_B_def_acts_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
-        for choice in other_choices:
-            viz = compare_def_acts_stats_players(player_A_def_acts_set, player_B_def_acts_set, comparison=choice, last_few_seasons=last_few_seasons)
-            def_acts_vizzes.append(viz)
+    # scrap both players data concurrently
+    (player_1_page, player_1_stats), (player_2_page, player_2_stats) = await ascrap_players([(player_1_id, player_1_name), (player_2_id, player_2_name)])
     
-    return render(request, 'dashboard/compare.html', {
-        "std_stats_vizzes": std_stats_vizzes,
-        "shooting_vizzes": shooting_vizzes,
-        "passing_vizzes": passing_vizzes,
-        "def_acts_vizzes": def_acts_vizzes,
+    # building the charts of every category is CPU-bound, keep it off the event loop
+    loop = asyncio.get_running_loop()
+    context = await loop.run_in_executor(_render_executor, functools.partial(
+        get_compare_context, player_1_name, player_2_name, player_1_stats, player_2_stats, table_opt, last_few_seasons,
+        (player_1_id, player_2_id),
+    ))
+    return render_compare(request, context, [player_1_page, player_2_page])
+    
+
+@handle_scrap_errors
+def chart(request, player_1_id, player_2_id, metric):
+    """
+        PNG of one chart of the compare page, metric is an id of CHART_METRICS.
+        The ETag is the version of the chart, so a browser revalidating an image gets a 304 without it being drawn.
+        A URL carrying the current version (from get_chart_url) is cached for CHART_MAX_AGE, others are revalidated.
+    """
+    players = PLAYER_NAMES
+    if player_1_id not in players or player_2_id not in players or metric not in CHART_METRICS:
+        raise Http404("No such chart")
+    last_few_seasons = get_last_few_seasons(request)
+    
+    (player_1_page, player_1_stats), (player_2_page, player_2_stats) = scrap_players([(player_1_id, players[player_1_id]), (player_2_id, players[player_2_id])])
+    
+    chart = get_comparison_chart((players[player_1_id], player_1_stats), (players[player_2_id], player_2_stats), metric, last_few_seasons)
+    if chart is None:
+        raise Http404("No data for this chart")
+    
+    version = get_chart_version(chart)
+    headers = {
+        "ETag": f'"{version}"',
+        "Cache-Control": f"public, max-age={CHART_MAX_AGE}, immutable" if request.GET.get('v') == version else "no-cache",
+    }
+    if f'"{version}"' in parse_etags(request.headers.get('If-None-Match', '')):
+        return HttpResponseNotModified(headers=headers)
+    
+    image, = get_chart_images([chart], (player_1_id, player_2_id), last_few_seasons)
+    # the render pool did not draw the chart in time
+    if image is None:
+        return server_busy()
+    return HttpResponse(image, content_type='image/png', headers=headers)
+
+
+def compare_client(request):
+    """
+        Same page as compare, but its charts are drawn by the browser (static/dashboard/compare.js) from the JSON of
+        compare_data: the server draws no image. The players are only scraped when the browser asks for their data.
+    """
+    player_1_name, player_2_name, table_opt, last_few_seasons = get_compare_options(request)
+    
+    # if no player provided
+    if player_1_name == None or player_2_name == None:
+        return render(request, 'dashboard/compare.html')
+    
+    player_1_id, player_2_id = get_players_ids(player_1_name, player_2_name)
+    record_players_requests([(player_1_id, player_1_name), (player_2_id, player_2_name)])
+    
+    query = '?' + urlencode({"last_few_seasons": last_few_seasons}) if last_few_seasons is not None else ''
+    context = {
+        "chart_sections": [
+            (SECTION_TITLES[table_opt], reverse('compare_data', args=[player_1_id, player_2_id, table_opt]) + query)
+            for table_opt in get_table_opts(table_opt)
+        ],
         "player_1": player_1_name.replace('-', ' '),
         "player_2": player_2_name.replace('-', ' '),
-    })
+    }
+    return render(request, 'dashboard/compare.html', context)
+
+
+@handle_scrap_errors
+def compare_data(request, player_1_id, player_2_id, table_opt):
+    """
+        JSON of the charts of a table option of the compare page: {'player_1', 'player_2', 'table_opt', 'charts'},
+        every chart described by charts.get_chart_data with its metric id. The ETag is a digest of the body.
+    """
+    players = PLAYER_NAMES
+    if player_1_id not in players or player_2_id not in players or table_opt not in COMPARISONS:
+        raise Http404("No such comparison")
+    last_few_seasons = get_last_few_seasons(request)
+    
+    (player_1_page, player_1_stats), (player_2_page, player_2_stats) = scrap_players([(player_1_id, players[player_1_id]), (player_2_id, players[player_2_id])])
     
+    alignment = align_seasons(player_1_stats, player_2_stats)
+    charts = get_comparison_charts((players[player_1_id], player_1_stats), (players[player_2_id], player_2_stats), table_opt, last_few_seasons, alignment)
+    body = json.dumps({
+        "player_1": players[player_1_id],
+        "player_2": players[player_2_id],
+        "table_opt": table_opt,
+        "charts": [dict(get_chart_data(chart), metric=metric) for metric, chart in charts],
+    }, separators=(',', ':'))
+    
+    etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+    # the data may change with every refresh of the players' pages, always revalidate it
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Data-Age": int(max(player_1_page.age, player_2_page.age))}
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return HttpResponseNotModified(headers=headers)
+    return HttpResponse(body, content_type='application/json', headers=headers)
+
 
 # API
 def database(request):
@@ -0,0 +1,102 @@
+"""
+    Bounded process pools for the CPU-heavy steps of a request.
+
+    Jobs run in worker processes, so they neither hold the GIL of the web worker threads nor block its event loop.
+    A pool accepts at most max_workers running plus max_pending queued jobs. Callers beyond that wait for a place
+    up to a timeout and then get WorkerPoolBusy, so a burst of requests cannot pile up unbounded work behind it.
+    run() also bounds the wait for the job itself: a job without a result by its deadline raises WorkerPoolTimeout,
+    and a job whose worker died (e.g. killed for lack of memory) raises WorkerPoolBusy, the next jobs get new workers.
+    With max_jobs, the workers are replaced by new ones after that many jobs, which returns the memory long-lived
+    workers hold on to (caches of fonts, fragmented heaps) to the system.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class WorkerPoolBusy(Exception):
+    """ Raised when no place frees up in the pool before the caller's deadline """
+
+
+class WorkerPoolTimeout(WorkerPoolBusy):
+    """ Raised when a job has no result before the caller's deadline """
+
+
+class WorkerPool:
+
+    def __init__(self, name, max_workers, max_pending=0, start_method='spawn', max_jobs=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self._jobs = 0
+        # spawned workers import the job's module themselves instead of inheriting the threads of a forked web worker
+        self._context = multiprocessing.get_context(start_method)
+        self._places = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is not None and self.max_jobs and self._jobs >= self.max_jobs:
+                # retired workers finish the jobs they were given and exit, new jobs go to new workers
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=self._context)
+                self._jobs = 0
+            self._jobs += 1
+            return self._executor
+
+    def _reset(self, executor):
+        """ Replace a broken executor (one of its workers died) by a new one for the next jobs """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def submit(self, fn, *args, timeout=None):
+        """ Queue fn(*args) and return its Future, waiting up to timeout seconds for a place in the pool """
+        if not self._places.acquire(timeout=timeout):
+            raise WorkerPoolBusy(f"The {self.name} pool is full, no place freed up within {timeout} seconds")
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._reset(executor)
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+        except BaseException:
+            self._places.release()
+            raise
+
+        def done(future):
+            self._places.release()
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._reset(executor)
+
+        future.add_done_callback(done)
+        return future
+
+    def run(self, fn, *args, timeout=None, job_timeout=None):
+        """
+            Run fn(*args) in the pool and return its result, fn and its arguments must be picklable.
+            Waits up to timeout seconds for a place and then up to job_timeout seconds for the result.
+            A job timing out is cancelled if it is still queued, a running one finishes in the background.
+        """
+        future = self.submit(fn, *args, timeout=timeout)
+        try:
+            return future.result(timeout=job_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise WorkerPoolTimeout(f"The {self.name} job had no result within {job_timeout} seconds") from None
+        except BrokenProcessPool as e:
+            raise WorkerPoolBusy(f"A worker of the {self.name} pool died running the job") from e
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)